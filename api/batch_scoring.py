@@ -0,0 +1,212 @@
+from typing import List, NamedTuple, Optional
+import numpy as np
+from .models import Lecture, UserPreferences, ScoringWeights
+from .data_loader import get_catalog
+from .scoring import count_adjacent_pairs, EMPTY_COMBINATION_SCORE
+from .solver import forbidden_slot_mask
+from .utils import day_names_to_mask, PERIODS_PER_DAY, NUM_DAYS
+
+_LOW_64 = (1 << 64) - 1
+# 비트마스크를 (요일 x 교시) 행렬로 펼칠 때 사용하는 비트 수
+SLOT_BITS = NUM_DAYS * PERIODS_PER_DAY
+
+class CombinationBatch(NamedTuple):
+    """
+    조합 N개를 열 단위 배열로 인코딩한 묶음.
+    slots는 (N, 요일, 교시) 불리언 행렬이고, mask_low/mask_high는 같은 정보를 담은 64비트 마스크입니다.
+    """
+    credits: np.ndarray # (N,) 총 학점
+    mask_low: np.ndarray # (N,) 슬롯 마스크 하위 64비트
+    mask_high: np.ndarray # (N,) 슬롯 마스크 상위 비트
+    slots: np.ndarray # (N, NUM_DAYS, PERIODS_PER_DAY) 슬롯 점유 여부
+    internal_pairs: np.ndarray # (N,) 각 강의 내부의 연속 교시 쌍 수의 합
+    sizes: np.ndarray # (N,) 조합에 포함된 강의 수
+
+def _split_mask(mask: int):
+    return np.uint64(mask & _LOW_64), np.uint64(mask >> 64)
+
+def encode_combinations(combinations: List[List[Lecture]]) -> CombinationBatch:
+    """
+    조합 목록을 배열로 인코딩합니다.
+    모든 조합의 강의를 하나의 평탄한 배열에 이어 붙인 뒤, reduceat으로 조합별 합계와 OR를 구합니다.
+    """
+    sizes = np.fromiter((len(combo) for combo in combinations), dtype=np.int64, count=len(combinations))
+    flat = [lec for combo in combinations for lec in combo]
+    lecture_credits = np.fromiter((lec.credits for lec in flat), dtype=np.int64, count=len(flat))
+    lecture_low = np.array([lec.slot_mask & _LOW_64 for lec in flat], dtype=np.uint64)
+    lecture_high = np.array([lec.slot_mask >> 64 for lec in flat], dtype=np.uint64)
+    lecture_pairs = np.fromiter((count_adjacent_pairs(lec.slot_mask) for lec in flat), dtype=np.int64, count=len(flat))
+
+    count = len(combinations)
+    credits = np.zeros(count, dtype=np.int64)
+    mask_low = np.zeros(count, dtype=np.uint64)
+    mask_high = np.zeros(count, dtype=np.uint64)
+    internal_pairs = np.zeros(count, dtype=np.int64)
+
+    # reduceat은 빈 구간을 처리하지 못하므로, 강의가 있는 조합에만 적용
+    non_empty = sizes > 0
+    if flat:
+        starts = (np.cumsum(sizes) - sizes)[non_empty]
+        credits[non_empty] = np.add.reduceat(lecture_credits, starts)
+        mask_low[non_empty] = np.bitwise_or.reduceat(lecture_low, starts)
+        mask_high[non_empty] = np.bitwise_or.reduceat(lecture_high, starts)
+        internal_pairs[non_empty] = np.add.reduceat(lecture_pairs, starts)
+
+    # 리틀 엔디언 바이트열로 펼친 뒤 비트 단위로 풀어 (N, 128) → (N, 요일, 교시) 행렬을 만듭니다.
+    packed = np.stack([mask_low, mask_high], axis=1).astype('<u8').view(np.uint8)
+    bits = np.unpackbits(packed, axis=1, bitorder='little')[:, :SLOT_BITS].astype(bool)
+    slots = bits.reshape(count, NUM_DAYS, PERIODS_PER_DAY)
+
+    return CombinationBatch(credits, mask_low, mask_high, slots, internal_pairs, sizes)
+
+def _intersects(batch: CombinationBatch, mask: int) -> np.ndarray:
+    """각 조합의 슬롯 마스크가 주어진 마스크와 겹치는지 여부를 반환합니다."""
+    low, high = _split_mask(mask)
+    return ((batch.mask_low & low) | (batch.mask_high & high)) != 0
+
+def score_batch(batch: CombinationBatch, preferences: UserPreferences, weights: ScoringWeights) -> np.ndarray:
+    """
+    rank_combinations와 같은 점수를 벡터 연산으로 계산합니다.
+    부동소수점 결과가 같도록 rank_combinations와 같은 순서로 더하고 뺍니다.
+    """
+    slots = batch.slots
+    has_slots = slots.any(axis=(1, 2))
+    day_count = slots.any(axis=2).sum(axis=1)
+    morning_slots = slots[:, :, 1:5].sum(axis=(1, 2))
+    adjacent_pairs = (slots[:, :, :-1] & slots[:, :, 1:]).sum(axis=(1, 2))
+    consecutive_count = adjacent_pairs - batch.internal_pairs
+    lunch_collisions = (slots[:, :, 4] & slots[:, :, 5]).sum(axis=1)
+
+    # 학점 점수 계산 (목표 학점 우선)
+    if preferences.target_credits is not None:
+        credit_diff = np.abs(batch.credits - preferences.target_credits)
+        score = (1 / (1 + credit_diff)) * 10 * weights.user_preference_multiplier
+    else:
+        score = (batch.credits * weights.maximize_credits).astype(np.float64)
+
+    # 슬롯이 없는 조합은 0을 더하고 빼므로 점수가 바뀌지 않음
+    score = score + np.where(has_slots, (5 - day_count) * weights.more_empty_days, 0)
+    score = score - np.where(has_slots, morning_slots * weights.fewer_morning_classes, 0)
+
+    # 사용자 선호도 적용
+    user_preference_score = np.zeros(len(score), dtype=np.int64)
+    if preferences.no_class_days:
+        on_empty_day = _intersects(batch, day_names_to_mask(preferences.no_class_days))
+        user_preference_score += np.where(on_empty_day, -5, 1)
+    if preferences.no_consecutive_classes:
+        user_preference_score -= consecutive_count * 10
+    if preferences.prefer_empty_lunch:
+        user_preference_score -= lunch_collisions * 10
+
+    score = score + user_preference_score * weights.user_preference_multiplier
+    return np.where(batch.sizes > 0, score, float(EMPTY_COMBINATION_SCORE))
+
+def filter_batch(
+    batch: CombinationBatch,
+    combinations: List[List[Lecture]],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+) -> np.ndarray:
+    """rank_combinations의 하드 필터를 통과하는 조합 여부를 불리언 배열로 반환합니다."""
+    keep = batch.credits <= weights.credit_limit
+
+    forbidden_mask = forbidden_slot_mask(preferences)
+    if forbidden_mask:
+        keep &= ~_intersects(batch, forbidden_mask)
+
+    # 필수 포함 강의는 조합 구성에 대한 조건이므로 조합별로 확인
+    if preferences.must_include_lectures:
+        required_nos = set(preferences.must_include_lectures)
+        required_courses = {lec.course_id for lec in get_catalog().get_lectures(required_nos)}
+        for index in np.flatnonzero(keep):
+            combo = combinations[index]
+            if {lec.course_id for lec in combo if lec.no in required_nos} != required_courses:
+                keep[index] = False
+    return keep
+
+def rank_combinations_batch(
+    combinations: List[List[Lecture]],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    top_k: Optional[int] = None,
+) -> List[List[Lecture]]:
+    """
+    rank_combinations의 벡터화 버전. 많은 조합을 한 번에 정렬할 때 사용합니다.
+    결과는 rank_combinations(...)[:top_k]와 같으며, 동점이면 입력 순서를 유지합니다.
+    top_k가 주어지면 argpartition으로 후보를 먼저 고른 뒤 그 안에서만 정렬합니다.
+    """
+    if not combinations:
+        return []
+
+    batch = encode_combinations(combinations)
+    candidates = np.flatnonzero(filter_batch(batch, combinations, preferences, weights))
+    scores = score_batch(batch, preferences, weights)[candidates]
+
+    if top_k is not None and top_k < len(candidates):
+        if top_k <= 0:
+            return []
+        # 상위 top_k 경계 점수를 구한 뒤, 경계 점수와 같은 조합은 입력 순서가 빠른 것부터 채움
+        partitioned = np.argpartition(-scores, top_k - 1)[:top_k]
+        threshold = scores[partitioned].min()
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:top_k - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(candidates))
+
+    # 점수 내림차순, 동점이면 입력 순서 (lexsort는 마지막 키가 1순위)
+    order = selected[np.lexsort((candidates[selected], -scores[selected]))]
+    return [combinations[index] for index in candidates[order]]
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    무작위 선택과 선호도에 대해 rank_combinations와 결과 순서가 같은지 확인합니다.
+    사용법 (저장소 루트에서): python -m api.batch_scoring
+    """
+    import random
+    import time
+    from .engine import find_combinations, rank_combinations
+    from .scoring import aggregate_lectures
+
+    print("--- 배치 점수 계산 일치 테스트 시작 ---")
+    random.seed(0)
+    catalog = get_catalog()
+    course_ids = list(catalog.by_course_id)
+    # 분반이 여러 개인 과목을 섞어 조합 수가 충분히 많아지도록 함
+    multi_section_ids = [course_id for course_id in course_ids if len(catalog.by_course_id[course_id]) > 1]
+    preference_options = [
+        {}, {'no_class_days': ['금']}, {'avoid_periods': [1, 9]}, {'avoid_morning': True},
+        {'prefer_afternoon': True}, {'prefer_morning': True}, {'avoid_afternoon': True},
+        {'no_consecutive_classes': True, 'prefer_empty_lunch': True},
+        {'target_credits': 18, 'no_class_days': ['월요일']},
+    ]
+
+    mismatches = 0
+    python_seconds = batch_seconds = 0.0
+    for trial in range(30):
+        selected_courses = random.sample(multi_section_ids, 4) + random.sample(course_ids, 4)
+        lecture_nos = [lec.no for course_id in selected_courses for lec in catalog.by_course_id[course_id]]
+        combinations = find_combinations(lecture_nos, 20000)
+        options = dict(random.choice(preference_options))
+        if random.random() < 0.3:
+            options['must_include_lectures'] = random.sample(lecture_nos, 1)
+        preferences = UserPreferences(**options)
+        weights = ScoringWeights(credit_limit=random.choice([9, 15, 23]))
+        top_k = random.choice([None, 1, 10, 100])
+
+        # 집계값을 넘겨 rank_combinations가 배치 계산으로 넘어가지 않고 파이썬 경로로 계산하게 함
+        start = time.perf_counter()
+        aggregates = [aggregate_lectures(combo) for combo in combinations]
+        expected = rank_combinations(combinations, preferences, weights, aggregates)[:top_k]
+        python_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        actual = rank_combinations_batch(combinations, preferences, weights, top_k)
+        batch_seconds += time.perf_counter() - start
+
+        if [[lec.no for lec in combo] for combo in expected] != [[lec.no for lec in combo] for combo in actual]:
+            mismatches += 1
+            print(f"불일치: 선호도={options}, top_k={top_k}")
+
+    print(f"불일치 {mismatches}건 / 30회, rank_combinations {python_seconds:.2f}s, 배치 {batch_seconds:.2f}s")
+    print("--- 배치 점수 계산 일치 테스트 종료 ---")
@@ -1,11 +1,15 @@
 import csv
+import hashlib
 import os
-from typing import List
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
 from .models import Lecture
+from .snapshot import default_snapshot_path, load_snapshot
 
 # 이 파일의 절대 경로를 기준으로 data 폴더의 경로를 설정
+# (TIMETABLE_CATALOG_CSV로 다른 CSV를 지정할 수 있음. 예: 벤치마크용 합성 카탈로그)
 current_dir = os.path.dirname(os.path.abspath(__file__))
-DEFAULT_CSV_PATH = os.path.join(current_dir, '..', 'data', '시간표.csv')
+DEFAULT_CSV_PATH = os.getenv("TIMETABLE_CATALOG_CSV") or os.path.join(current_dir, '..', 'data', '시간표.csv')
 
 def load_lectures(file_path: str = DEFAULT_CSV_PATH) -> List[Lecture]:
     """
@@ -39,6 +43,150 @@ def load_lectures(file_path: str = DEFAULT_CSV_PATH) -> List[Lecture]:
     
     return lectures
 
+def compute_file_digest(file_path: str) -> str:
+    """파일 내용의 SHA-256 해시(16진수 문자열)를 반환합니다."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CatalogState:
+    """
+    카탈로그 한 버전의 강의 목록과 인덱스. 만든 뒤에는 바꾸지 않습니다.
+    LectureCatalog는 다시 로드할 때 새 CatalogState를 만들어 한 번의 대입으로 교체하므로,
+    같은 CatalogState에서 읽은 버전과 인덱스는 항상 서로 맞습니다.
+    """
+    __slots__ = ('version', 'lectures', 'by_no', 'by_course_id', 'by_department', 'position')
+
+    def __init__(self, version: Optional[str] = None, lectures: Iterable[Lecture] = ()):
+        by_no: Dict[int, Lecture] = {}
+        by_course_id: Dict[str, List[Lecture]] = {}
+        by_department: Dict[str, List[Lecture]] = {}
+        position: Dict[int, int] = {}
+        lectures = tuple(lectures)
+        for index, lecture in enumerate(lectures):
+            by_no[lecture.no] = lecture
+            position[lecture.no] = index
+            by_course_id.setdefault(lecture.course_id, []).append(lecture)
+            by_department.setdefault(lecture.department, []).append(lecture)
+
+        # 현재 로드된 CSV 내용의 해시. 결과 캐시 등에서 카탈로그 버전으로 사용합니다.
+        self.version = version
+        self.lectures = lectures
+        self.by_no = by_no
+        self.by_course_id = by_course_id
+        self.by_department = by_department
+        self.position = position
+
+class LectureCatalog:
+    """
+    프로세스 전체에서 공유되는 강의 카탈로그.
+    CSV를 한 번만 로드하여 메모리에 유지하고, 강의 번호/교과번호/학부(과)별 인덱스를 제공합니다.
+    요청마다 파일의 수정 시각(mtime)만 확인하며, 수정 시각이 바뀌었고 내용 해시까지
+    달라진 경우에만 다시 로드합니다.
+    CSV와 해시가 일치하는 스냅샷 파일(python -m api.snapshot 으로 생성)이 있으면 CSV 대신 스냅샷을 읽습니다.
+
+    lectures, by_no, version 등은 현재 CatalogState(state)의 값입니다. 다시 로드되는 도중에도
+    버전과 인덱스가 서로 맞아야 하는 곳에서는 state를 한 번 읽어 그 값들을 사용하세요.
+    """
+
+    def __init__(self, file_path: str = DEFAULT_CSV_PATH, snapshot_path: Optional[str] = None):
+        self.file_path = file_path
+        self.snapshot_path = snapshot_path or default_snapshot_path(file_path)
+        self.state = CatalogState()
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.state.version
+
+    @property
+    def lectures(self) -> Sequence[Lecture]:
+        return self.state.lectures
+
+    @property
+    def by_no(self) -> Dict[int, Lecture]:
+        return self.state.by_no
+
+    @property
+    def by_course_id(self) -> Dict[str, List[Lecture]]:
+        return self.state.by_course_id
+
+    @property
+    def by_department(self) -> Dict[str, List[Lecture]]:
+        return self.state.by_department
+
+    def refresh(self) -> bool:
+        """
+        CSV 파일이 변경되었으면 다시 로드합니다.
+
+        :return: 실제로 다시 로드했으면 True
+        """
+        try:
+            mtime = os.path.getmtime(self.file_path)
+        except OSError:
+            return False
+
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            try:
+                version = compute_file_digest(self.file_path)
+            except OSError:
+                return False
+            if version == self.version:
+                # 내용은 그대로이고 수정 시각만 바뀐 경우 (예: touch)
+                self._mtime = mtime
+                return False
+
+            lectures = load_snapshot(self.snapshot_path, version) if os.path.exists(self.snapshot_path) else None
+            if lectures is None:
+                lectures = load_lectures(self.file_path)
+            # 새 인덱스와 버전을 한 번에 교체
+            self.state = CatalogState(version, lectures)
+            self._mtime = mtime
+            return True
+
+    def get_lecture(self, lecture_no: int) -> Optional[Lecture]:
+        return self.by_no.get(lecture_no)
+
+    def get_lectures(self, lecture_nos: Iterable[int]) -> List[Lecture]:
+        """
+        강의 번호 목록에 해당하는 강의들을 CSV 순서대로 반환합니다.
+        카탈로그에 없는 번호와 중복 번호는 무시합니다.
+        """
+        state = self.state
+        position = state.position
+        found_nos = sorted({no for no in lecture_nos if no in position}, key=position.__getitem__)
+        return [state.by_no[no] for no in found_nos]
+
+    def get_course_sections(self, course_id: str) -> List[Lecture]:
+        return self.by_course_id.get(course_id, [])
+
+    def get_department_lectures(self, department: str) -> List[Lecture]:
+        return self.by_department.get(department, [])
+
+_catalog: Optional[LectureCatalog] = None
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> LectureCatalog:
+    """
+    프로세스 전역 강의 카탈로그를 반환합니다.
+    처음 호출될 때 로드되며, 이후에는 CSV가 변경된 경우에만 다시 로드됩니다.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = LectureCatalog()
+    _catalog.refresh()
+    return _catalog
+
 # --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
 if __name__ == '__main__':
     """
@@ -60,5 +208,11 @@ if __name__ == '__main__':
             print(lecture.model_dump())
     else:
         print("실패: 강의 정보를 로드하지 못했습니다.")
+
+    print("\n--- 카탈로그 인덱스 ---")
+    catalog = LectureCatalog(file_path='../data/시간표.csv')
+    print(f"최초 로드: {catalog.refresh()}, 재확인: {catalog.refresh()}, 버전: {catalog.version[:12] if catalog.version else None}")
+    print(f"교과번호 {len(catalog.by_course_id)}개, 학부(과) {len(catalog.by_department)}개")
+    print([lecture.course_name for lecture in catalog.get_lectures([3, 1, 2, 1])])
         
     print("\n--- 데이터 로더 테스트 종료 ---")
\ No newline at end of file
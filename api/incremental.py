@@ -0,0 +1,191 @@
+import os
+import threading
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from .data_loader import get_catalog
+from .models import Lecture, SearchConstraints
+from .result_cache import ResultCache
+from .solver import SearchStats, group_by_course
+
+# 이전 탐색 결과를 재사용할 수 있는 최대 교과목 변화 수 (추가 + 제거). 넘으면 처음부터 탐색합니다.
+MAX_INCREMENTAL_DELTA = int(os.getenv("TIMETABLE_INCREMENTAL_DELTA", "2"))
+# 세션별 탐색 상태를 보관할 최대 개수와 시간(초)
+DEFAULT_MAX_SESSIONS = int(os.getenv("TIMETABLE_SESSION_SIZE", "1024"))
+DEFAULT_SESSION_TTL_SECONDS = float(os.getenv("TIMETABLE_SESSION_TTL", "1800"))
+# 세션에 보관할 수 있는 최대 조합 수. 응답의 개수 제한(10000)보다 크게 두어, 조합이 많은 선택도
+# 다음 요청에서 재사용할 수 있도록 세션을 위한 탐색은 이 개수까지 찾습니다.
+SESSION_MAX_COMBINATIONS = int(os.getenv("TIMETABLE_SESSION_MAX_COMBINATIONS", "100000"))
+
+class SolverState(NamedTuple):
+    """
+    세션에 보관하는 직전 탐색 결과.
+    combinations는 lecture_nos 선택에서 constraints를 모두 만족하는 조합 전체(강의 번호 튜플)이며,
+    시간 예산이나 조합 개수 제한 때문에 중간에 멈춘 탐색의 결과는 보관하지 않습니다.
+    """
+    lecture_nos: FrozenSet[int]
+    constraints: SearchConstraints
+    combinations: Tuple[Tuple[int, ...], ...]
+
+def _course_sections(lecture_nos) -> Dict[str, FrozenSet[int]]:
+    """선택을 교과번호 -> 선택한 분반 번호 집합으로 묶습니다."""
+    return {
+        group[0].course_id: frozenset(lec.no for lec in group)
+        for group in group_by_course(get_catalog().get_lectures(lecture_nos))
+    }
+
+def resolve_incrementally(
+    state: SolverState,
+    lecture_nos: List[int],
+    constraints: SearchConstraints,
+    max_combinations: int = SESSION_MAX_COMBINATIONS,
+    stats: Optional[SearchStats] = None,
+) -> Optional[List[List[Lecture]]]:
+    """
+    직전 선택의 조합 전체(state)에서 출발해 새 선택의 조합 전체를 만듭니다.
+    결과는 search_combinations(lecture_nos, constraints)와 같은 조합 집합입니다. (순서는 다를 수 있음)
+
+      - 빠진 교과목: 각 조합에서 그 교과목의 분반을 빼고(투영), 빈 조합과 중복 조합을 제거합니다.
+        (빠진 교과목을 건너뛴 조합도 원래 조합 전체에 들어 있으므로 투영 결과가 곧 새 조합 전체입니다.)
+      - 추가된 교과목: 기존 조합(필수 교과목이 없으면 빈 조합 포함)마다, 금지 슬롯·학점 상한을 지키고
+        시간이 겹치지 않는 새 분반을 하나씩 붙인 조합을 더합니다.
+      - 분반 구성이 바뀐 교과목은 빠졌다가 다시 추가된 것으로 처리합니다.
+
+    :return: 새 선택의 조합 목록. 다음 경우에는 None을 반환하며, 호출한 쪽에서 처음부터 탐색해야 합니다.
+             제약 조건이 달라진 경우, 교과목 변화가 MAX_INCREMENTAL_DELTA개를 넘는 경우,
+             바뀐 교과목에 필수 포함 강의가 있는 경우, 결과가 max_combinations개를 넘는 경우
+    """
+    if stats is None:
+        stats = SearchStats()
+    if state.constraints != constraints:
+        return None
+
+    by_no = get_catalog().by_no
+    old_sections = _course_sections(state.lecture_nos)
+    new_sections = _course_sections(lecture_nos)
+    removed = [course_id for course_id, nos in old_sections.items() if new_sections.get(course_id) != nos]
+    added = [course_id for course_id, nos in new_sections.items() if old_sections.get(course_id) != nos]
+    if len(removed) + len(added) > MAX_INCREMENTAL_DELTA:
+        return None
+    required_nos = constraints.required_lecture_nos
+    changed_nos = set().union(*(old_sections[c] for c in removed), *(new_sections[c] for c in added))
+    if changed_nos & required_nos:
+        return None
+
+    # 1. 빠진 교과목의 분반을 조합에서 제거 (투영 후 중복 제거)
+    removed_nos = set().union(*(old_sections[course_id] for course_id in removed))
+    combinations: Dict[Tuple[int, ...], None] = {}
+    for combo in state.combinations:
+        projected = tuple(no for no in combo if no not in removed_nos)
+        if projected:
+            combinations[projected] = None
+
+    # 2. 추가된 교과목의 분반을 붙인 조합 추가
+    has_required_group = any(no in by_no for no in required_nos)
+    credit_limit = constraints.credit_limit
+    for course_id in added:
+        sections = [
+            by_no[no] for no in sorted(new_sections[course_id])
+            if not by_no[no].slot_mask & constraints.forbidden_mask
+            and (credit_limit is None or by_no[no].credits <= credit_limit)
+        ]
+        stats.preference_prunes += len(new_sections[course_id]) - len(sections)
+        bases = list(combinations) if has_required_group else [()] + list(combinations)
+        for base in bases:
+            stats.nodes += 1
+            mask = credits = 0
+            for no in base:
+                mask |= by_no[no].slot_mask
+                credits += by_no[no].credits
+            for lec in sections:
+                if lec.slot_mask & mask:
+                    stats.conflict_prunes += 1
+                elif credit_limit is not None and credits + lec.credits > credit_limit:
+                    stats.credit_prunes += 1
+                else:
+                    combinations[base + (lec.no,)] = None
+            if len(combinations) > max_combinations:
+                return None
+
+    if len(combinations) > max_combinations:
+        return None
+    # search_combinations와 같이 조합 안의 강의를 교과목 그룹 순서(카탈로그 순서)로 정렬
+    group_order = {course_id: index for index, course_id in enumerate(_course_sections(
+        list(lecture_nos) + sorted(required_nos)))}
+    result = [
+        sorted((by_no[no] for no in combo), key=lambda lec: group_order[lec.course_id])
+        for combo in combinations
+    ]
+    stats.combinations = len(result)
+    stats.coverage = 1.0
+    return result
+
+def make_solver_state(lecture_nos: List[int], constraints: SearchConstraints,
+                      combinations: List[List[Lecture]]) -> SolverState:
+    return SolverState(
+        frozenset(lecture_nos), constraints, tuple(tuple(lec.no for lec in combo) for combo in combinations),
+    )
+
+def solver_state_from_nos(lecture_nos: List[int], constraints: SearchConstraints,
+                          combinations: Tuple[Tuple[int, ...], ...]) -> SolverState:
+    """강의 번호 튜플로 된 조합 전체(예: 결과 캐시의 완전한 결과)로 세션 상태를 만듭니다."""
+    return SolverState(frozenset(lecture_nos), constraints, tuple(combinations))
+
+_sessions: Optional[ResultCache] = None
+_sessions_lock = threading.Lock()
+
+def get_solver_sessions() -> ResultCache:
+    """
+    세션 핸들 -> SolverState 저장소를 반환합니다. 결과 캐시와 같은 LRU/TTL 규칙을 따르며,
+    카탈로그가 바뀌면 모든 세션 상태를 버립니다. 프로세스마다 따로 보관하므로
+    다른 인스턴스로 간 요청은 세션 상태 없이 처음부터 탐색합니다.
+    """
+    global _sessions
+    if _sessions is None:
+        with _sessions_lock:
+            if _sessions is None:
+                _sessions = ResultCache(max_entries=DEFAULT_MAX_SESSIONS, ttl_seconds=DEFAULT_SESSION_TTL_SECONDS)
+    return _sessions
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    교과목을 하나씩 더하고 빼면서, 증분 결과가 처음부터 탐색한 결과와 같은 조합 집합인지 확인합니다.
+    사용법 (저장소 루트에서): python -m api.incremental
+    """
+    import random
+    import time
+    from .models import ScoringWeights, UserPreferences
+    from .solver import compile_constraints, search_combinations
+
+    print("--- 증분 탐색 테스트 시작 ---")
+    catalog = get_catalog()
+    rng = random.Random(0)
+    department = max(catalog.by_department, key=lambda name: len(catalog.by_department[name]))
+    course_ids = sorted({lec.course_id for lec in catalog.by_department[department] if lec.slot_mask})
+    rng.shuffle(course_ids)
+    preferences_cases = [UserPreferences(), UserPreferences(no_class_days=['금'], avoid_periods=[1])]
+
+    for preferences in preferences_cases:
+        constraints = compile_constraints(preferences, ScoringWeights())
+        chosen = course_ids[:5]
+        nos = [lec.no for course_id in chosen for lec in catalog.by_course_id[course_id]]
+        state = make_solver_state(nos, constraints, search_combinations(nos, constraints))
+        for step in range(8):
+            if step % 3 == 2:
+                chosen = chosen[1:]
+            else:
+                chosen = chosen + [course_ids[5 + step]]
+            nos = [lec.no for course_id in chosen for lec in catalog.by_course_id[course_id]]
+            start = time.perf_counter()
+            incremental = resolve_incrementally(state, nos, constraints)
+            incremental_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            full = search_combinations(nos, constraints)
+            full_ms = (time.perf_counter() - start) * 1000
+            same = incremental is not None and (
+                sorted(tuple(lec.no for lec in combo) for combo in incremental)
+                == sorted(tuple(lec.no for lec in combo) for combo in full)
+            )
+            print(f"교과목 {len(chosen):2}개 | 조합 {len(full):5} | 증분 {incremental_ms:7.2f} ms | "
+                  f"전체 {full_ms:7.2f} ms | {'일치' if same else '불일치'}")
+            state = make_solver_state(nos, constraints, full)
+    print("--- 증분 탐색 테스트 종료 ---")
@@ -1,18 +1,50 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Literal, Optional, Tuple
 
 # 로컬 모듈 임포트
 from .models import Lecture, UserPreferences, ScoringWeights
-from .engine import find_combinations, rank_combinations, find_combinations_with_preferences
-from .preference_parser import parse_user_preferences, clear_preference_cache
-from .data_loader import load_lectures
+from .engine import rank_combinations
+from .solver import (
+    Deadline, SearchStats, compile_constraints, find_top_combinations, iter_top_combinations,
+    search_with_relaxation, relax_preferences,
+)
+from .preference_parser import clear_preference_cache
+from .preference_service import get_preference_service
+from .data_loader import get_catalog
+from .lecture_index import get_lecture_index
+from .search_executor import SearchQueueFull, get_search_executor
+from .parallel import (
+    BATCH_WORKERS, DEFAULT_WORKERS, find_top_combinations_parallel, get_process_pool, should_parallelize,
+    shutdown_process_pool,
+)
+from .metrics import RequestMetrics, metrics_registry
+from .incremental import (
+    SESSION_MAX_COMBINATIONS, get_solver_sessions, make_solver_state, resolve_incrementally, solver_state_from_nos,
+)
+from .result_cache import (
+    CachedResult, decode_cursor, encode_cursor, get_result_cache, get_result_handles, make_cache_key, new_result_id,
+)
 from .utils import normalize_day_format, preprocess_preference_text
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 선호도 분석용 LLM 클라이언트를 서버 시작 시 한 번 만들어 모든 요청에서 재사용
+    get_preference_service().warm_up()
+    yield
+    # 일괄 작업이나 병렬 탐색이 만든 작업자 프로세스 정리
+    shutdown_process_pool()
+
 # FastAPI 앱 생성
 # Vercel에서 실행될 때, 이 'app' 변수를 찾습니다.
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS 미들웨어 추가
 # 프론트엔드 개발 서버(localhost:5173) 및 Vercel 배포 환경에서 API 요청을 허용합니다.
@@ -26,10 +58,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# /api/results, /api/lectures/search 페이지 크기 기본값과 최댓값
+DEFAULT_PAGE_LIMIT = 20
+MAX_PAGE_LIMIT = 200
+# /api/lectures/search 페이지 크기 기본값
+DEFAULT_LECTURE_PAGE_LIMIT = 50
+# /api/generate 응답에 단계별 소요 시간(Server-Timing 헤더)을 포함할지 여부
+SERVER_TIMING_ENABLED = os.getenv("TIMETABLE_SERVER_TIMING", "1") != "0"
+
+# /api/generate/batch 한 번에 받을 수 있는 최대 작업 수와, 작업별 기본 top_k
+MAX_BATCH_JOBS = 1000
+DEFAULT_BATCH_TOP_K = 20
+# 전체 순위 결과(top_k 없음)에 담는 최대 조합 수 (search_with_relaxation의 기본 개수 제한과 같음)
+MAX_RANKED_COMBINATIONS = 10000
+
 # API 요청 본문을 위한 Pydantic 모델
 class TimetableRequest(BaseModel):
     lecture_nos: List[int]
     user_preference_text: str
+    # 지정하면 전체 조합을 만든 뒤 정렬하는 대신, 분기 한정 탐색으로 상위 top_k개만 찾습니다.
+    top_k: Optional[int] = Field(default=None, gt=0)
+    # 지정하면 이 시간(ms)이 지났을 때 탐색을 멈추고 그때까지 찾은 시간표를 반환합니다.
+    # 요청 하나의 모든 탐색이 나눠 쓰는 예산입니다. (증분 탐색 뒤에 전체 탐색을 하면 남은 시간만 사용)
+    time_budget_ms: Optional[int] = Field(default=None, gt=0)
+    # "compact"이면 시간표를 강의 번호 배열로 반환하고, 강의 정보는 lectures에 한 번씩만 담습니다.
+    response_format: Literal["full", "compact"] = "full"
+    # compact 형식에서 첫 페이지에 담을 시간표 수 (None이면 전체). 나머지는 /api/results/{result_id}로 가져옵니다.
+    limit: Optional[int] = Field(default=None, gt=0)
+    # True이면 세션에 탐색 상태를 남겨, 다음 요청에서 선택이 교과목 몇 개만 바뀌었을 때 이전 결과를 재사용합니다.
+    # 세션에는 조합 전체가 필요하므로 top_k와 함께 쓸 수 없습니다. 응답의 session_id를 다음 요청에 그대로 보냅니다.
+    # 응답의 session_saved가 False이면 (조합이 세션 개수 제한보다 많거나, 시간 예산 안에 끝나지 않았거나,
+    # 조건을 완화한 경우) 세션에 상태가 없으므로 다음 요청은 처음부터 탐색합니다.
+    incremental: bool = False
+    session_id: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_incremental(self) -> 'TimetableRequest':
+        if self.incremental and self.top_k is not None:
+            raise ValueError("incremental cannot be combined with top_k; page through the full result instead")
+        return self
+
+class BatchJob(BaseModel):
+    """일괄 생성 작업 하나 (학생 한 명의 선택과 선호도)"""
+    # 결과 이벤트에 그대로 돌려주는 작업 식별자 (생략하면 작업 순번)
+    id: Optional[str] = None
+    lecture_nos: List[int]
+    user_preference_text: str = ""
+    # 작업마다 상위 몇 개의 시간표를 돌려줄지 (None이면 전체)
+    top_k: Optional[int] = Field(default=DEFAULT_BATCH_TOP_K, gt=0)
+    time_budget_ms: Optional[int] = Field(default=None, gt=0)
+
+class BatchRequest(BaseModel):
+    jobs: List[BatchJob] = Field(min_length=1, max_length=MAX_BATCH_JOBS)
 
 @app.get("/api/lectures")
 def get_all_lectures():
@@ -37,68 +117,784 @@ def get_all_lectures():
     전체 강의 목록을 반환하는 API 엔드포인트.
     """
     try:
-        lectures = load_lectures()
+        lectures = get_catalog().lectures
         return [lecture.model_dump() for lecture in lectures]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"강의 목록을 불러오는 중 오류 발생: {e}")
 
+def lecture_filters(
+    q: Optional[str] = None,
+    department: Optional[str] = None,
+    course_type: Optional[str] = None,
+    detailed_area: Optional[str] = None,
+    grade: List[str] = Query(default=[]),
+    min_credits: Optional[int] = Query(default=None, ge=0),
+    max_credits: Optional[int] = Query(default=None, ge=0),
+    day: List[str] = Query(default=[]),
+    period: List[int] = Query(default=[]),
+    no: List[int] = Query(default=[]),
+    has_time: Optional[bool] = None,
+) -> Dict:
+    """강의 검색 조건 쿼리 파라미터 (/api/lectures/search, /api/lectures/fit 공통)"""
+    return {
+        "query": q, "department": department, "course_type": course_type, "detailed_area": detailed_area,
+        "grades": grade, "min_credits": min_credits, "max_credits": max_credits,
+        "days": day, "periods": period, "nos": no, "has_time": has_time,
+    }
+
+def lecture_page(filters: Dict, cursor: Optional[str], limit: int, **extra) -> Dict:
+    """검색 인덱스에서 조건에 맞는 강의 한 페이지를 가져와 응답 형식으로 만듭니다."""
+    try:
+        offset = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total, lectures = get_lecture_index().search(**filters, **extra, offset=offset, limit=limit)
+    end = offset + limit
+    return {
+        "total": total,
+        "lectures": [lecture.model_dump() for lecture in lectures],
+        "next_cursor": encode_cursor(end) if end < total else None,
+    }
+
+@app.get("/api/lectures/search")
+def search_lectures(
+    filters: Dict = Depends(lecture_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LECTURE_PAGE_LIMIT, gt=0, le=MAX_PAGE_LIMIT),
+):
+    """
+    조건에 맞는 강의를 카탈로그 순서로 limit개씩 반환하는 API 엔드포인트.
+    q는 과목명 또는 교과번호의 부분 문자열이며(공백 무시), grade/day/period/no는 여러 번 지정하면 그중 하나라도 맞는 강의를 찾습니다.
+    다음 페이지는 응답의 next_cursor를 cursor로 넘겨 가져옵니다.
+    """
+    return lecture_page(filters, cursor, limit)
+
+@app.get("/api/lectures/fit")
+def find_fitting_lectures(
+    chosen: List[int] = Query(default=[]),
+    exclude_chosen_courses: bool = True,
+    filters: Dict = Depends(lecture_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_LECTURE_PAGE_LIMIT, gt=0, le=MAX_PAGE_LIMIT),
+):
+    """
+    이미 고른 강의(chosen)들과 시간이 겹치지 않는 강의를 반환하는 API 엔드포인트. (/api/lectures/search의 조건과 함께 사용 가능)
+    탐색 없이 슬롯 → 강의 역색인의 합집합/여집합으로 계산합니다.
+    exclude_chosen_courses가 True이면 고른 강의와 같은 교과목의 다른 분반은 제외합니다.
+    chosen_conflict는 고른 강의들끼리 이미 시간이 겹치는지 여부입니다.
+    """
+    occupied_mask = 0
+    chosen_conflict = False
+    chosen_lectures = get_catalog().get_lectures(chosen)
+    for lecture in chosen_lectures:
+        chosen_conflict = chosen_conflict or bool(occupied_mask & lecture.slot_mask)
+        occupied_mask |= lecture.slot_mask
+    exclude_course_ids = {lecture.course_id for lecture in chosen_lectures} if exclude_chosen_courses else ()
+    return {
+        **lecture_page(filters, cursor, limit, free_slot_mask=occupied_mask, exclude_course_ids=exclude_course_ids),
+        "chosen_conflict": chosen_conflict,
+    }
+
+@app.get("/api/lectures/facets")
+def get_lecture_facets(department: Optional[str] = None, course_type: Optional[str] = None):
+    """
+    강의 검색 필터의 선택지(학부(과), 교과구분, 세부영역, 학년, 학점)를 반환하는 API 엔드포인트.
+    department, course_type을 지정하면 그 안에 실제로 있는 값만 반환합니다.
+    """
+    return get_lecture_index().facets(department, course_type)
+
+async def analyze_preferences(
+    user_preference_text: str,
+    metrics: Optional[RequestMetrics] = None,
+) -> Tuple[UserPreferences, bool]:
+    """
+    사용자 선호도 텍스트를 분석합니다.
+
+    :param metrics: 주어지면 전처리(preprocess)와 분석(preferences, 규칙/캐시/LLM) 시간을 기록합니다.
+    :return: (선호도, 조건을 이해했는지 여부)
+    """
+    metrics = metrics or RequestMetrics()
+    preferences = UserPreferences()
+    preferences_understood = True
+    if user_preference_text:
+        with metrics.stage("preprocess"):
+            processed_text = preprocess_preference_text(user_preference_text)
+        with metrics.stage("preferences"):
+            preferences_dict = await get_preference_service().parse(processed_text)
+        if not preferences_dict or all(value is None for value in preferences_dict.values()):
+            preferences_understood = False
+        else:
+            preferences = UserPreferences.model_validate(preferences_dict)
+            if preferences.no_class_days:
+                preferences.no_class_days = normalize_day_format(preferences.no_class_days)
+    return preferences, preferences_understood
+
+def search_ranked_timetables(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    time_budget_ms: Optional[float],
+    metrics: Optional[RequestMetrics] = None,
+    max_combinations: int = MAX_RANKED_COMBINATIONS,
+) -> Tuple[List[List[Lecture]], List[str], SearchStats]:
+    """
+    선호도를 제약 조건으로 적용하여 한 번만 탐색하고 순위를 매깁니다.
+    조건을 모두 만족하는 조합이 없으면, 같은 탐색 안에서 가장 적은 조건만 완화한 조합을 찾습니다.
+
+    병렬 탐색을 켠 경우(TIMETABLE_SEARCH_WORKERS가 2 이상) 큰 선택은 조건을 모두 지키는 조합을 작업 단위로
+    나눠 여러 프로세스에서 찾고, 단위별 상위 조합을 힙으로 합칩니다. 그런 조합이 없을 때만 남은 시간으로 완화 탐색을 합니다.
+
+    :param metrics: 주어지면 탐색(search)과 순위 매기기(ranking) 시간, 탐색 통계를 기록합니다.
+    :param max_combinations: 찾을 최대 조합 수 (증분 탐색 세션을 채울 때는 더 크게 지정)
+    :return: (순위순 시간표 목록, 완화한 조건 목록, 탐색 통계)
+    """
+    metrics = metrics or RequestMetrics()
+    stats = SearchStats()
+    if should_parallelize(request.lecture_nos, DEFAULT_WORKERS):
+        deadline = Deadline(time_budget_ms)
+        with metrics.stage("search"):
+            ranked_combinations = find_top_combinations_parallel(
+                request.lecture_nos, preferences, weights, max_combinations, max_combinations,
+                DEFAULT_WORKERS, time_budget_ms, stats,
+            )
+        metrics.record_search(stats)
+        if ranked_combinations or stats.timed_out:
+            return ranked_combinations, [], stats
+        time_budget_ms = deadline.remaining_ms()
+        stats = SearchStats()
+
+    with metrics.stage("search"):
+        search_result = search_with_relaxation(
+            request.lecture_nos, preferences, weights, max_combinations, time_budget_ms=time_budget_ms,
+            stats=stats,
+        )
+    metrics.record_search(stats)
+    relaxed_constraints = search_result.relaxed_constraints
+    metrics.relaxed = bool(relaxed_constraints)
+    # 완화된 조건을 제외한 선호도로 순위 매기기
+    with metrics.stage("ranking"):
+        ranking_preferences, ranking_weights = relax_preferences(preferences, weights, relaxed_constraints)
+        ranked_combinations = rank_combinations(
+            search_result.combinations, ranking_preferences, ranking_weights, search_result.aggregates,
+        )
+    return ranked_combinations, relaxed_constraints, stats
+
+def search_summary(relaxed_constraints: List[str], stats: SearchStats, cached: bool = False) -> Dict:
+    """
+    응답에 포함되는 탐색 결과 요약 (완화한 조건, 시간 예산 때문에 탐색을 끝까지 하지 못했는지 여부와 탐색한 비율,
+    결과 캐시에서 꺼낸 결과인지 여부)
+    """
+    return {
+        "relaxed_constraints": relaxed_constraints,
+        "search_incomplete": stats.timed_out,
+        "search_coverage": round(min(stats.coverage, 1.0), 4),
+        "cached": cached,
+    }
+
+def result_cache_key(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    catalog_version: Optional[str],
+) -> str:
+    """요청의 결과 캐시 키를 반환합니다."""
+    return make_cache_key(request.lecture_nos, preferences, weights, catalog_version, request.top_k)
+
+def lectures_from_cache(cached: CachedResult) -> List[List[Lecture]]:
+    """캐시에 저장된 강의 번호 튜플을 카탈로그의 Lecture 목록으로 되돌립니다."""
+    by_no = get_catalog().by_no
+    return [[by_no[no] for no in combo] for combo in cached.timetables]
+
+def to_cached_result(
+    ranked_combinations: List[List[Lecture]],
+    relaxed_constraints: List[str],
+    stats: SearchStats,
+    top_k: Optional[int] = None,
+) -> CachedResult:
+    """순위 결과를 강의 번호만 담은 CachedResult로 변환합니다. (top_k: 결과를 자른 개수)"""
+    return CachedResult(
+        tuple(tuple(lecture.no for lecture in combo) for combo in ranked_combinations),
+        tuple(relaxed_constraints),
+        stats.coverage,
+        top_k is None and not relaxed_constraints and not stats.timed_out and not stats.cap_hit,
+    )
+
+def store_cached_result(cache_key: str, catalog_version: Optional[str], result: CachedResult, stats: SearchStats):
+    """탐색을 끝까지 마친 결과만 캐시에 저장합니다. 시간 예산 때문에 중단된 결과는 다음 요청에서 다시 탐색합니다."""
+    if not stats.timed_out:
+        get_result_cache().set(cache_key, result, catalog_version)
+
+def compact_page(result: CachedResult, result_id: str, offset: int, limit: Optional[int]) -> Dict:
+    """
+    순위 결과의 한 페이지를 압축 형식으로 만듭니다.
+    시간표는 강의 번호 배열로, 강의 정보는 페이지에 나온 강의마다 한 번씩만 lectures에 담습니다.
+    """
+    end = len(result.timetables) if limit is None else offset + limit
+    page = result.timetables[offset:end]
+    by_no = get_catalog().by_no
+    lectures = {no: by_no[no].model_dump() for no in sorted({no for combo in page for no in combo})}
+    return {
+        "result_id": result_id,
+        "total": len(result.timetables),
+        "timetables": [list(combo) for combo in page],
+        "lectures": lectures,
+        "next_cursor": encode_cursor(end) if end < len(result.timetables) else None,
+    }
+
+def search_with_session(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    catalog_version: Optional[str],
+    session_id: str,
+    metrics: RequestMetrics,
+    deadline: Deadline,
+) -> Tuple[List[List[Lecture]], List[str], SearchStats]:
+    """
+    세션의 직전 탐색 상태를 이용해 순위 결과를 만듭니다.
+    직전 선택과 교과목 몇 개만 다르면 직전 조합 전체를 투영/확장해 새 조합 전체를 만들고(탐색 없음),
+    그렇지 않으면 search_ranked_timetables로 처음부터 탐색합니다.
+    세션을 위한 탐색은 SESSION_MAX_COMBINATIONS개까지 찾고, 완화 없이 끝까지 찾은 조합 전체를 다음 요청을 위해
+    세션에 보관합니다. (보관했는지는 metrics.session_saved에 기록) 응답에는 MAX_RANKED_COMBINATIONS개까지만 담으며,
+    그보다 많으면 stats.cap_hit를 표시합니다.
+
+    :param deadline: 요청의 시간 예산. 처음부터 탐색할 때는 남은 시간만 사용합니다.
+
+    :return: (순위순 시간표 목록, 완화한 조건 목록, 탐색 통계)
+    """
+    sessions = get_solver_sessions()
+    constraints = compile_constraints(preferences, weights)
+    state = sessions.get(session_id, catalog_version) if request.session_id else None
+    if state is not None:
+        stats = SearchStats()
+        with metrics.stage("search"):
+            combinations = resolve_incrementally(state, request.lecture_nos, constraints, stats=stats)
+        if combinations:
+            metrics.incremental = True
+            metrics.record_search(stats)
+            sessions.set(session_id, make_solver_state(request.lecture_nos, constraints, combinations), catalog_version)
+            metrics.session_saved = True
+            with metrics.stage("ranking"):
+                ranked_combinations = rank_combinations(combinations, preferences, weights)
+            return _limit_ranked(ranked_combinations, stats), [], stats
+
+    ranked_combinations, relaxed_constraints, stats = search_ranked_timetables(
+        request, preferences, weights, deadline.remaining_ms(), metrics, SESSION_MAX_COMBINATIONS,
+    )
+    if ranked_combinations and not relaxed_constraints and not stats.timed_out and not stats.cap_hit:
+        sessions.set(
+            session_id, make_solver_state(request.lecture_nos, constraints, ranked_combinations), catalog_version,
+        )
+        metrics.session_saved = True
+    return _limit_ranked(ranked_combinations, stats), relaxed_constraints, stats
+
+def _limit_ranked(ranked_combinations: List[List[Lecture]], stats: SearchStats) -> List[List[Lecture]]:
+    """세션용으로 더 많이 찾은 결과를 응답 개수 제한(MAX_RANKED_COMBINATIONS)까지 자릅니다."""
+    if len(ranked_combinations) > MAX_RANKED_COMBINATIONS:
+        stats.cap_hit = True
+        return ranked_combinations[:MAX_RANKED_COMBINATIONS]
+    return ranked_combinations
+
+def seed_session_from_cache(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    catalog_version: Optional[str],
+    session_id: str,
+    result: CachedResult,
+    metrics: RequestMetrics,
+):
+    """
+    결과 캐시에서 답한 증분 탐색 요청의 세션을 캐시된 결과로 채웁니다.
+    조합 전체를 담은 결과(result.complete)일 때만 채우며, 그 밖에는 다음 요청이 처음부터 탐색합니다.
+    """
+    if not result.complete:
+        return
+    constraints = compile_constraints(preferences, weights)
+    get_solver_sessions().set(
+        session_id, solver_state_from_nos(request.lecture_nos, constraints, result.timetables), catalog_version,
+    )
+    metrics.session_saved = True
+
+def search_timetables(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    deadline: Deadline,
+    metrics: RequestMetrics,
+) -> Tuple[List[List[Lecture]], List[str], SearchStats]:
+    """
+    세션 없이 탐색하고 순위를 매깁니다. top_k가 지정되면 분기 한정 탐색으로 상위 top_k개만 찾고,
+    없으면 search_ranked_timetables로 전체 조합을 찾아 정렬합니다.
+
+    :return: (순위순 시간표 목록, 완화한 조건 목록, 탐색 통계)
+    """
+    if request.top_k is None:
+        return search_ranked_timetables(request, preferences, weights, deadline.remaining_ms(), metrics)
+    stats = SearchStats()
+    relaxed_constraints: List[str] = []
+    with metrics.stage("search"):
+        ranked_combinations = find_top_combinations(
+            request.lecture_nos, preferences, weights, request.top_k, deadline.remaining_ms(), stats,
+            relaxed_constraints,
+        )
+    metrics.record_search(stats)
+    metrics.relaxed = bool(relaxed_constraints)
+    return ranked_combinations, relaxed_constraints, stats
+
+def compute_ranked_result(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    catalog_version: Optional[str],
+    cache_key: str,
+    metrics: RequestMetrics,
+    session_id: Optional[str] = None,
+) -> Tuple[CachedResult, SearchStats]:
+    """
+    결과 캐시를 확인하고, 없으면 탐색하고 순위를 매겨 캐시에 저장합니다. (CPU를 사용하므로 스레드에서 실행)
+    캐시 적중 여부는 metrics.cached에 기록됩니다.
+
+    :param session_id: request.incremental일 때 탐색 상태를 보관할 세션 핸들
+    :return: (순위 결과, 탐색 통계)
+    """
+    # 요청 하나의 시간 예산. 이 요청에서 실행하는 탐색은 모두 남은 시간만 사용
+    deadline = Deadline(request.time_budget_ms)
+    with metrics.stage("result_cache"):
+        result = get_result_cache().get(cache_key, catalog_version)
+    stats = SearchStats()
+    metrics.cached = result is not None
+    if result is not None:
+        stats.coverage = result.search_coverage
+        if request.incremental:
+            seed_session_from_cache(request, preferences, weights, catalog_version, session_id, result, metrics)
+        return result, stats
+
+    # 탐색 및 순위 매기기
+    #   top_k가 지정되면 분기 한정 탐색으로 상위 top_k개만 찾고, 조건을 만족하는 조합이 없으면 같은 탐색에서 완화
+    #   증분 탐색(incremental)을 요청하면 세션에 남은 직전 조합 전체에서 출발하거나, 전체 조합을 찾아 세션에 보관
+    #   (incremental과 top_k는 함께 올 수 없음)
+    if request.incremental:
+        ranked_combinations, relaxed_constraints, stats = search_with_session(
+            request, preferences, weights, catalog_version, session_id, metrics, deadline,
+        )
+    else:
+        ranked_combinations, relaxed_constraints, stats = search_timetables(
+            request, preferences, weights, deadline, metrics,
+        )
+    result = to_cached_result(ranked_combinations, relaxed_constraints, stats, request.top_k)
+    with metrics.stage("result_cache"):
+        store_cached_result(cache_key, catalog_version, result, stats)
+    return result, stats
+
+def build_generate_response(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    preferences_understood: bool,
+    metrics: RequestMetrics,
+) -> JSONResponse:
+    """분석한 선호도로 /api/generate 응답을 만듭니다. (결과 캐시 확인, 탐색, 직렬화를 포함하며 CPU를 사용하므로 스레드에서 실행)"""
+    # 2. 결과 캐시 확인, 3. 탐색 및 순위 매기기
+    weights = ScoringWeights()
+    session_id = (request.session_id or new_result_id()) if request.incremental else None
+    with metrics.stage("catalog"):
+        catalog_version = get_catalog().version
+    cache_key = result_cache_key(request, preferences, weights, catalog_version)
+    result, stats = compute_ranked_result(
+        request, preferences, weights, catalog_version, cache_key, metrics, session_id,
+    )
+    from_cache = metrics.cached
+
+    summary = {
+        "preferences_understood": preferences_understood,
+        **search_summary(list(result.relaxed_constraints), stats, cached=from_cache),
+    }
+    if request.incremental:
+        summary.update(
+            session_id=session_id, incremental=metrics.incremental, session_saved=metrics.session_saved,
+        )
+
+    # 4. 결과를 JSON으로 변환 (응답 본문 인코딩까지 이 스레드에서 수행)
+    with metrics.stage("serialization"):
+        if request.response_format == "compact":
+            # 끝까지 탐색한 결과는 캐시 키를 핸들로 사용해 같은 요청이 반복돼도 핸들이 늘어나지 않도록 함
+            result_id = new_result_id() if stats.timed_out else cache_key
+            get_result_handles().set(result_id, result, catalog_version)
+            return JSONResponse({**compact_page(result, result_id, 0, request.limit), **summary})
+
+        # 같은 강의가 여러 시간표에 나오므로 강의별 직렬화 결과를 재사용
+        by_no = get_catalog().by_no
+        dumps = {no: by_no[no].model_dump() for no in {no for combo in result.timetables for no in combo}}
+        result_json = [[dumps[no] for no in combo] for combo in result.timetables]
+        return JSONResponse({"timetables": result_json, **summary})
+
+def queue_full_error(error: SearchQueueFull) -> HTTPException:
+    """탐색 대기열이 가득 찼을 때 보낼 503 응답"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
 @app.post("/api/generate")
-def generate_timetable(request: TimetableRequest):
+async def generate_timetable(request: TimetableRequest):
     """
     과목 ID 리스트와 사용자 선호도 텍스트를 받아,
     최적의 시간표 조합들을 반환하는 API 엔드포인트.
-    1차 시도 후 결과가 없으면, 선호도를 반영하여 2차 시도를 합니다.
+    선호도는 탐색 중에 제약 조건으로 적용되므로 탐색은 한 번만 수행하며,
+    조건을 모두 만족하는 조합이 없으면 완화한 조건 목록(relaxed_constraints)을 함께 반환합니다.
+    같은 선택·선호도·카탈로그 버전에 대한 결과는 결과 캐시에서 바로 반환합니다(cached=True).
+
+    response_format이 "compact"이면 시간표를 강의 번호 배열로, 강의 정보는 lectures에 한 번씩만 담아 반환하고,
+    limit개씩 나눈 첫 페이지와 다음 페이지를 가져올 result_id, next_cursor를 함께 반환합니다.
+
+    선호도 분석(LLM 호출)은 이벤트 루프에서 비동기로 기다리고, 탐색은 탐색 전용 실행기에서 실행합니다.
+    탐색 대기열이 가득 차면 Retry-After 헤더와 함께 503을 반환합니다.
+
+    단계별 소요 시간은 Server-Timing 헤더로 함께 보내고(TIMETABLE_SERVER_TIMING=0이면 생략),
+    /api/metrics에 누적합니다.
     """
+    metrics = RequestMetrics()
+    status = 500
     try:
         # 1. 사용자 선호도 분석
-        preferences = UserPreferences()
-        preferences_understood = True
-        if request.user_preference_text:
-            processed_text = preprocess_preference_text(request.user_preference_text)
-            preferences_dict = parse_user_preferences(processed_text)
-            if not preferences_dict or all(value is None for value in preferences_dict.values()):
-                preferences_understood = False
-            else:
-                preferences = UserPreferences.model_validate(preferences_dict)
-                if preferences.no_class_days:
-                    preferences.no_class_days = normalize_day_format(preferences.no_class_days)
+        preferences, preferences_understood = await analyze_preferences(request.user_preference_text, metrics)
+        response = await get_search_executor().run(
+            build_generate_response, request, preferences, preferences_understood, metrics,
+        )
+        status = response.status_code
+        if SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = metrics.server_timing()
+        return response
 
-        # 2. 1차 시도: 선호도를 고려하지 않고 조합 생성 후 필터링
-        weights = ScoringWeights()
-        combinations = find_combinations(request.lecture_nos)
-        ranked_combinations = rank_combinations(combinations, preferences, weights)
-        
-        # 3. 1차 시도 실패 시 2차 시도
-        if not ranked_combinations:
-            # 선호도를 조합 생성에 직접 반영하여 다시 시도
-            combinations_v2 = find_combinations_with_preferences(request.lecture_nos, preferences)
-            # 다시 순위 매기기
-            ranked_combinations = rank_combinations(combinations_v2, preferences, weights)
-
-        # 4. 결과를 JSON으로 변환
-        result_json = [[lecture.model_dump() for lecture in combo] for combo in ranked_combinations]
-        
-        return {
-            "timetables": result_json,
-            "preferences_understood": preferences_understood
-        }
+    except SearchQueueFull as e:
+        status = 503
+        raise queue_full_error(e)
+    except ValueError as e:
+        status = 400
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
+    finally:
+        metrics_registry.observe("generate", str(status), metrics)
 
+@app.get("/api/results/{result_id}")
+def get_result_page(
+    result_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_LIMIT, gt=0, le=MAX_PAGE_LIMIT),
+):
+    """
+    compact 형식의 /api/generate가 반환한 result_id로 순위 결과의 다음 페이지를 가져오는 API 엔드포인트.
+    cursor는 이전 응답의 next_cursor이며, 생략하면 첫 페이지를 반환합니다.
+    결과 핸들이 만료되었거나 카탈로그가 바뀌었으면 404를 반환하므로 다시 생성해야 합니다.
+    """
+    try:
+        offset = decode_cursor(cursor)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    result = get_result_handles().get(result_id, get_catalog().version)
+    if result is None:
+        raise HTTPException(status_code=404, detail="결과가 만료되었습니다. 시간표를 다시 생성해 주세요.")
+    return compact_page(result, result_id, offset, limit)
+
+def _encode_event(event: str, payload: Dict, use_sse: bool) -> str:
+    """스트리밍 이벤트 하나를 NDJSON 한 줄 또는 SSE 메시지로 인코딩합니다."""
+    if use_sse:
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    return json.dumps({"type": event, **payload}, ensure_ascii=False) + "\n"
+
+@app.post("/api/generate/stream")
+async def generate_timetable_stream(request: TimetableRequest, http_request: Request):
+    """
+    /api/generate의 스트리밍 버전. 시간표를 찾는 대로 하나씩 보내므로 첫 결과가 빨리 도착하고,
+    전체 응답 본문을 서버 메모리에 만들지 않습니다.
+
+    기본 형식은 NDJSON(한 줄에 이벤트 하나, "type" 필드로 구분)이며,
+    Accept 헤더에 text/event-stream이 있으면 SSE 형식으로 보냅니다.
+    이벤트 순서: meta(조건 이해 여부) → timetable(순위, 강의 목록) 반복 → done(탐색 결과 요약)
+    탐색 중 오류가 나면 error 이벤트를 보내고 끝냅니다.
+
+    top_k가 지정되면 분기 한정 탐색이 순위를 확정하는 즉시 순위 순서로 보냅니다.
+    그렇지 않으면 전체 순위를 매긴 뒤 직렬화만 하나씩 하면서 보냅니다.
+    결과 캐시에 있는 결과는 탐색 없이 바로 보냅니다.
+    탐색은 탐색 전용 실행기에서 진행하며, 응답을 시작하기 전에 대기열이 가득 찼으면 503을 반환합니다.
+    """
+    metrics = RequestMetrics()
+    try:
+        preferences, preferences_understood = await analyze_preferences(request.user_preference_text, metrics)
+        get_search_executor().ensure_capacity()
+    except SearchQueueFull as e:
+        metrics_registry.observe("generate_stream", "503", metrics)
+        raise queue_full_error(e)
+    except ValueError as e:
+        metrics_registry.observe("generate_stream", "400", metrics)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        metrics_registry.observe("generate_stream", "500", metrics)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {e}")
 
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    def events():
+        yield "meta", {"preferences_understood": preferences_understood}
+        try:
+            # 요청 하나의 시간 예산 (캐시 확인 등 탐색 전 단계에 쓴 시간도 포함)
+            deadline = Deadline(request.time_budget_ms)
+            weights = ScoringWeights()
+            with metrics.stage("catalog"):
+                catalog_version = get_catalog().version
+            with metrics.stage("result_cache"):
+                cache_key = result_cache_key(request, preferences, weights, catalog_version)
+                cached = get_result_cache().get(cache_key, catalog_version)
+            stats = SearchStats()
+            metrics.cached = cached is not None
+            if cached is not None:
+                for rank, combo in enumerate(lectures_from_cache(cached)):
+                    yield "timetable", {"rank": rank, "lectures": [lecture.model_dump() for lecture in combo]}
+                stats.coverage = cached.search_coverage
+                yield "done", {
+                    "count": len(cached.timetables),
+                    **search_summary(list(cached.relaxed_constraints), stats, cached=True),
+                }
+                return
+
+            relaxed_constraints: List[str] = []
+            # 보낸 시간표를 모아 두었다가 탐색이 끝나면 캐시에 저장
+            sent_combinations: List[List[Lecture]] = []
+            if request.top_k is not None:
+                # 조건을 모두 만족하는 조합이 없으면 같은 탐색이 완화한 조합을 보내고 relaxed_constraints를 채움
+                for combo in iter_top_combinations(
+                        request.lecture_nos, preferences, weights, request.top_k, deadline.remaining_ms(), stats,
+                        relaxed_constraints):
+                    yield "timetable", {"rank": len(sent_combinations), "lectures": [lecture.model_dump() for lecture in combo]}
+                    sent_combinations.append(combo)
+                metrics.record_search(stats)
+                metrics.relaxed = bool(relaxed_constraints)
+            else:
+                ranked_combinations, relaxed_constraints, stats = search_ranked_timetables(
+                    request, preferences, weights, deadline.remaining_ms(), metrics,
+                )
+                for combo in ranked_combinations:
+                    yield "timetable", {"rank": len(sent_combinations), "lectures": [lecture.model_dump() for lecture in combo]}
+                    sent_combinations.append(combo)
+            store_cached_result(
+                cache_key, catalog_version,
+                to_cached_result(sent_combinations, relaxed_constraints, stats, request.top_k), stats,
+            )
+            yield "done", {"count": len(sent_combinations), **search_summary(relaxed_constraints, stats)}
+        except Exception as e:
+            yield "error", {"detail": f"An unexpected error occurred: {e}"}
+
+    async def encoded_events():
+        # 스트림은 응답을 시작한 뒤 상태 코드를 바꿀 수 없으므로 마지막 이벤트 종류를 상태로 기록
+        status = "200"
+        try:
+            async for event, payload in get_search_executor().iterate(events()):
+                if event == "error":
+                    status = "error"
+                yield _encode_event(event, payload, use_sse)
+        except SearchQueueFull as e:
+            # 자리를 확인한 뒤 응답을 시작하기 전에 다른 요청이 먼저 자리를 차지한 경우
+            status = "503"
+            yield _encode_event("error", {"detail": str(e), "retry_after": e.retry_after}, use_sse)
+        finally:
+            metrics_registry.observe("generate_stream", status, metrics)
+
+    return StreamingResponse(
+        encoded_events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        # 프록시가 응답을 모아서 보내지 않도록 버퍼링 비활성화
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def solve_batch_job(
+    request: TimetableRequest,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    catalog_version: Optional[str],
+) -> Tuple[CachedResult, SearchStats, RequestMetrics]:
+    """
+    일괄 작업 하나를 탐색하고 순위를 매깁니다. 프로세스 풀의 작업자 프로세스에서 실행되므로 모듈 수준에 둡니다.
+    결과는 강의 번호로만 돌려주므로, 작업자의 카탈로그가 일괄 작업을 시작할 때의 카탈로그와 다르면 실패로 처리합니다.
+
+    :return: (순위 결과, 탐색 통계, 작업자에서 기록한 요청 메트릭)
+    """
+    metrics = RequestMetrics()
+    if get_catalog().version != catalog_version:
+        raise RuntimeError("강의 카탈로그가 일괄 작업 도중 바뀌었습니다.")
+    ranked_combinations, relaxed_constraints, stats = search_timetables(
+        request, preferences, weights, Deadline(request.time_budget_ms), metrics,
+    )
+    return to_cached_result(ranked_combinations, relaxed_constraints, stats, request.top_k), stats, metrics
+
+@app.post("/api/generate/batch")
+async def generate_timetable_batch(request: BatchRequest, http_request: Request):
+    """
+    여러 (강의 선택, 선호도 문장) 작업의 시간표를 한 번에 생성하는 API 엔드포인트. (학과 사무실의 일괄 생성용)
+
+    - 같은 선호도 문장은 한 번만 분석하고, 선택·선호도·top_k가 같은 작업은 한 번만 탐색해 결과를 함께 보냅니다.
+    - 카탈로그 버전은 일괄 작업 시작 시 한 번 정하며, 모든 작업이 같은 카탈로그(강의별 슬롯 마스크)를 공유합니다.
+    - 탐색은 프로세스 풀에서 BATCH_WORKERS개씩 동시에 실행합니다. (GIL 때문에 스레드로는 CPU를 하나만 쓰므로)
+      /api/generate의 탐색 전용 실행기(스레드) 대기열은 차지하지 않습니다.
+    - 결과 캐시를 /api/generate와 함께 사용합니다. (캐시 확인과 저장은 서버 프로세스에서)
+
+    결과는 끝나는 순서대로 NDJSON(Accept에 text/event-stream이 있으면 SSE)으로 보냅니다.
+    이벤트 순서: meta(작업 수, 중복 제거 후 탐색 수/문장 수) → result 또는 error(작업별, 끝난 순서) 반복 → done
+    result 이벤트의 timetables는 강의 번호 배열이며, lectures에는 이 스트림에서 처음 나온 강의의 정보만 담습니다.
+    """
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+    jobs = request.jobs
+    job_ids = [job.id if job.id is not None else str(index) for index, job in enumerate(jobs)]
+
+    async def events():
+        start = time.perf_counter()
+        weights = ScoringWeights()
+        catalog = get_catalog()
+        catalog_version = catalog.version
+
+        # 1. 선호도 문장 중복 제거 후 분석 (선호도 분석 서비스가 LLM 동시 호출 수를 제한)
+        texts = list(dict.fromkeys(job.user_preference_text for job in jobs))
+        analyzed = await asyncio.gather(*(analyze_preferences(text) for text in texts), return_exceptions=True)
+        preferences_by_text = dict(zip(texts, analyzed))
+
+        # 2. 같은 결과가 나오는 작업끼리 묶기 (결과 캐시 키 기준)
+        unique_jobs: Dict[str, Tuple[TimetableRequest, UserPreferences, bool]] = {}
+        job_indexes_by_key: Dict[str, List[int]] = {}
+        failed: List[Tuple[int, str]] = []
+        for index, job in enumerate(jobs):
+            analysis = preferences_by_text[job.user_preference_text]
+            if isinstance(analysis, BaseException):
+                failed.append((index, f"선호도 분석 실패: {analysis}"))
+                continue
+            preferences, understood = analysis
+            job_request = TimetableRequest(
+                lecture_nos=job.lecture_nos, user_preference_text=job.user_preference_text,
+                top_k=job.top_k, time_budget_ms=job.time_budget_ms,
+            )
+            key = result_cache_key(job_request, preferences, weights, catalog_version)
+            unique_jobs.setdefault(key, (job_request, preferences, understood))
+            job_indexes_by_key.setdefault(key, []).append(index)
+
+        yield "meta", {"jobs": len(jobs), "unique_searches": len(unique_jobs), "unique_preferences": len(texts)}
+        for index, detail in failed:
+            yield "error", {"job": job_ids[index], "detail": detail}
+
+        # 3. 프로세스 풀에서 작업자 수만큼 동시에 실행하고, 끝나는 대로 결과 전송
+        #    (풀에 한꺼번에 넘기지 않아, 연결이 끊기면 아직 시작하지 않은 작업은 넘기지 않고 취소됨)
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(BATCH_WORKERS)
+
+        async def solve(key: str):
+            job_request, preferences, _ = unique_jobs[key]
+            metrics = RequestMetrics()
+            async with semaphore:
+                try:
+                    with metrics.stage("result_cache"):
+                        result = await asyncio.to_thread(get_result_cache().get, key, catalog_version)
+                    stats = SearchStats()
+                    metrics.cached = result is not None
+                    if result is not None:
+                        stats.coverage = result.search_coverage
+                    else:
+                        result, stats, job_metrics = await loop.run_in_executor(
+                            get_process_pool(BATCH_WORKERS), solve_batch_job,
+                            job_request, preferences, weights, catalog_version,
+                        )
+                        metrics.merge(job_metrics)
+                        with metrics.stage("result_cache"):
+                            await asyncio.to_thread(store_cached_result, key, catalog_version, result, stats)
+                except Exception as e:
+                    metrics_registry.observe("generate_batch", "500", metrics)
+                    return key, e
+            metrics_registry.observe("generate_batch", "200", metrics)
+            return key, (result, stats, metrics.cached)
+
+        sent_lecture_nos = set()
+        tasks = [asyncio.ensure_future(solve(key)) for key in unique_jobs]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                key, outcome = await finished
+                if isinstance(outcome, Exception):
+                    for index in job_indexes_by_key[key]:
+                        yield "error", {"job": job_ids[index], "detail": f"An unexpected error occurred: {outcome}"}
+                    continue
+                result, stats, cached = outcome
+                new_nos = sorted({no for combo in result.timetables for no in combo} - sent_lecture_nos)
+                sent_lecture_nos.update(new_nos)
+                payload = {
+                    "timetables": [list(combo) for combo in result.timetables],
+                    "lectures": {no: catalog.by_no[no].model_dump() for no in new_nos},
+                    "preferences_understood": unique_jobs[key][2],
+                    **search_summary(list(result.relaxed_constraints), stats, cached=cached),
+                }
+                for position, index in enumerate(job_indexes_by_key[key]):
+                    # 같은 결과를 받는 두 번째 작업부터는 강의 정보가 이미 전송됨
+                    yield "result", {"job": job_ids[index], **payload, **({"lectures": {}} if position else {})}
+        finally:
+            # 클라이언트가 연결을 끊으면 남은 탐색 취소
+            for task in tasks:
+                task.cancel()
+
+        yield "done", {
+            "count": len(jobs),
+            "failed": len(failed),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    async def encoded_events():
+        async for event, payload in events():
+            yield _encode_event(event, payload, use_sse)
+
+    return StreamingResponse(
+        encoded_events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/api/clear-cache")
 def clear_cache_endpoint():
     """
-    선호도 분석 캐시를 삭제하는 API 엔드포인트.
+    선호도 분석 캐시와 시간표 결과 캐시를 삭제하는 API 엔드포인트.
     """
     try:
         clear_preference_cache()
+        get_result_cache().clear()
         return {"message": "Preference cache cleared successfully."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear cache: {e}")
 
+@app.get("/api/cache/stats")
+def cache_stats_endpoint():
+    """
+    시간표 결과 캐시의 항목 수와 적중/실패/제거 횟수를 반환하는 API 엔드포인트.
+    """
+    return get_result_cache().stats()
+
+@app.get("/api/metrics")
+def metrics_endpoint():
+    """
+    요청 수, 단계별 소요 시간 히스토그램, 탐색 카운터(방문 노드, 가지치기, 조합 수 등),
+    캐시/탐색 실행기/LLM 호출 통계를 Prometheus 텍스트 형식으로 반환하는 API 엔드포인트.
+    """
+    cache_stats = get_result_cache().stats()
+    executor_stats = get_search_executor().stats()
+    service_stats = get_preference_service().stats()
+    counters = {
+        "timetable_result_cache_hits_total": ("결과 캐시 적중 수", cache_stats["hits"]),
+        "timetable_result_cache_misses_total": ("결과 캐시 실패 수", cache_stats["misses"]),
+        "timetable_result_cache_evictions_total": ("결과 캐시에서 밀려난 항목 수", cache_stats["evictions"]),
+        "timetable_search_executor_completed_total": ("탐색 실행기가 마친 작업 수", executor_stats["completed"]),
+        "timetable_search_executor_rejected_total": ("대기열이 가득 차 거절한 작업 수", executor_stats["rejected"]),
+        "timetable_preference_llm_calls_total": ("선호도 분석 LLM 호출 수", service_stats["llm_calls"]),
+        "timetable_preference_coalesced_total": ("진행 중인 LLM 호출에 합쳐진 요청 수", service_stats["coalesced"]),
+    }
+    gauges = {
+        "timetable_result_cache_entries": ("결과 캐시 항목 수", cache_stats["entries"]),
+        "timetable_search_executor_running": ("실행 중인 탐색 작업 수", executor_stats["running"]),
+        "timetable_search_executor_queued": ("대기 중인 탐색 작업 수", executor_stats["queued"]),
+    }
+    return PlainTextResponse(
+        metrics_registry.render(counters=counters, gauges=gauges),
+        media_type="text/plain; version=0.0.4",
+    )
+
 # 로컬 테스트를 위한 루트 엔드포인트
 @app.get("/")
 def read_root():
@@ -0,0 +1,251 @@
+import threading
+from itertools import islice
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+from .data_loader import CatalogState, get_catalog
+from .models import Lecture
+from .solver import iter_bits
+from .utils import day_names_to_mask, periods_mask
+
+def normalize_search_text(text: str) -> str:
+    """검색어와 과목명을 같은 형태로 맞춥니다. (NFKC 정규화, 소문자, 공백 제거)"""
+    return "".join(unicodedata.normalize("NFKC", text).lower().split())
+
+def _add_posting(index: Dict, key, position: int):
+    index[key] = index.get(key, 0) | (1 << position)
+
+class LectureSearchResult(NamedTuple):
+    total: int
+    lectures: List[Lecture]
+
+class LectureSearchIndex:
+    """
+    카탈로그 한 버전에 대한 강의 검색 인덱스.
+
+    모든 색인은 "강의 위치(카탈로그 CSV 순서) 비트셋"이며, 조건마다 비트셋을 골라 AND/OR로 합칩니다.
+      - 과목명/교과번호: 정규화한 글자 하나(1-gram)와 연속 두 글자(2-gram)별 비트셋.
+        검색어의 2-gram 비트셋을 모두 AND한 뒤, 후보에 대해서만 실제 부분 문자열인지 확인합니다.
+      - 학부(과) / 교과구분 / 세부영역 / 학점: 값별 비트셋 (정확히 일치)
+      - 학년: 학년 문자열의 글자별 비트셋 ("34"는 3학년과 4학년 모두에 색인)
+      - (요일, 교시) 슬롯: 그 슬롯을 사용하는 강의의 비트셋 (슬롯 → 강의 역색인)
+      - 교과번호: 같은 교과목의 분반들의 비트셋
+    """
+
+    def __init__(self, state: CatalogState):
+        self.version = state.version
+        self.lectures: List[Lecture] = list(state.lectures)
+        self._texts: List[str] = []
+        self.all_bits = (1 << len(self.lectures)) - 1
+        self.by_gram: Dict[str, int] = {}
+        self.by_department: Dict[str, int] = {}
+        self.by_course_type: Dict[str, int] = {}
+        self.by_detailed_area: Dict[str, int] = {}
+        self.by_grade: Dict[str, int] = {}
+        self.by_credits: Dict[int, int] = {}
+        self.by_slot: Dict[int, int] = {}
+        self.by_course_id: Dict[str, int] = {}
+        self.by_no: Dict[int, int] = {}
+        self.timed_bits = 0
+
+        for position, lecture in enumerate(self.lectures):
+            text = f"{normalize_search_text(lecture.course_name)}\x00{lecture.course_id}"
+            self._texts.append(text)
+            for gram in {text[i:i + n] for n in (1, 2) for i in range(len(text) - n + 1)}:
+                if "\x00" not in gram:
+                    _add_posting(self.by_gram, gram, position)
+            _add_posting(self.by_department, lecture.department, position)
+            _add_posting(self.by_course_type, lecture.course_type, position)
+            _add_posting(self.by_detailed_area, lecture.detailed_area, position)
+            for grade in set(lecture.grade):
+                _add_posting(self.by_grade, grade, position)
+            _add_posting(self.by_credits, lecture.credits, position)
+            for slot in iter_bits(lecture.slot_mask):
+                _add_posting(self.by_slot, slot, position)
+            _add_posting(self.by_course_id, lecture.course_id, position)
+            self.by_no[lecture.no] = 1 << position
+            if lecture.raw_time_location:
+                self.timed_bits |= 1 << position
+
+    def _text_bits(self, query: str) -> int:
+        query = normalize_search_text(query)
+        if not query:
+            return self.all_bits
+        if len(query) == 1:
+            return self.by_gram.get(query, 0)
+        bits = self.all_bits
+        for i in range(len(query) - 1):
+            bits &= self.by_gram.get(query[i:i + 2], 0)
+            if not bits:
+                return 0
+        # 2-gram이 모두 들어 있어도 이어져 있지 않을 수 있으므로 후보만 실제로 확인
+        if len(query) > 2:
+            for position in iter_bits(bits):
+                if query not in self._texts[position]:
+                    bits &= ~(1 << position)
+        return bits
+
+    def _slot_bits(self, slot_mask: int) -> int:
+        """slot_mask의 슬롯 중 하나라도 사용하는 강의의 비트셋"""
+        bits = 0
+        for slot in iter_bits(slot_mask):
+            bits |= self.by_slot.get(slot, 0)
+        return bits
+
+    @staticmethod
+    def _any_of(index: Dict, values: Iterable) -> int:
+        bits = 0
+        for value in values:
+            bits |= index.get(value, 0)
+        return bits
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        department: Optional[str] = None,
+        course_type: Optional[str] = None,
+        detailed_area: Optional[str] = None,
+        grades: Sequence[str] = (),
+        min_credits: Optional[int] = None,
+        max_credits: Optional[int] = None,
+        days: Sequence[str] = (),
+        periods: Sequence[int] = (),
+        nos: Sequence[int] = (),
+        has_time: Optional[bool] = None,
+        free_slot_mask: int = 0,
+        exclude_course_ids: Sequence[str] = (),
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> LectureSearchResult:
+        """
+        조건을 모두 만족하는 강의를 카탈로그 순서로 반환합니다. 여러 값을 받는 조건(grades, days, periods, nos)은
+        그중 하나라도 맞으면 만족합니다.
+
+        :param query: 과목명 또는 교과번호의 부분 문자열 (공백, 대소문자 무시)
+        :param has_time: True면 수업 시간이 있는 강의만, False면 없는 강의만
+        :param free_slot_mask: 이 마스크의 슬롯을 하나도 사용하지 않는 강의만 (이미 고른 시간표에 겹치지 않고 들어가는 강의)
+        :param exclude_course_ids: 이 교과목들의 분반은 제외
+        :return: (조건을 만족하는 전체 강의 수, offset부터 limit개의 강의)
+        """
+        bits = self.all_bits
+        if query:
+            bits &= self._text_bits(query)
+        if department:
+            bits &= self.by_department.get(department, 0)
+        if course_type:
+            bits &= self.by_course_type.get(course_type, 0)
+        if detailed_area:
+            bits &= self.by_detailed_area.get(detailed_area, 0)
+        if grades:
+            bits &= self._any_of(self.by_grade, {digit for grade in grades for digit in grade})
+        if min_credits is not None or max_credits is not None:
+            low = min_credits if min_credits is not None else min(self.by_credits, default=0)
+            high = max_credits if max_credits is not None else max(self.by_credits, default=0)
+            bits &= self._any_of(self.by_credits, range(low, high + 1))
+        if days:
+            bits &= self._slot_bits(day_names_to_mask(list(days)))
+        if periods:
+            bits &= self._slot_bits(periods_mask(periods))
+        if nos:
+            bits &= self._any_of(self.by_no, nos)
+        if has_time is not None:
+            bits &= self.timed_bits if has_time else ~self.timed_bits
+        if free_slot_mask:
+            bits &= ~self._slot_bits(free_slot_mask)
+        if exclude_course_ids:
+            bits &= ~self._any_of(self.by_course_id, exclude_course_ids)
+
+        # 전체 개수는 비트 수로 세고, 강의 목록은 요청한 페이지까지만 꺼냄
+        total = bits.bit_count()
+        end = total if limit is None else min(total, offset + limit)
+        page = list(islice(iter_bits(bits), offset, end)) if offset < end else []
+        return LectureSearchResult(total, [self.lectures[position] for position in page])
+
+    def facets(self, department: Optional[str] = None, course_type: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        검색 필터의 선택지. 교과구분/학년은 학부(과) 안에서, 세부영역은 학부(과)와 교과구분 안에서 실제로 있는 값만 반환합니다.
+        """
+        department_bits = self.by_department.get(department, 0) if department else self.all_bits
+        type_bits = department_bits & (self.by_course_type.get(course_type, 0) if course_type else self.all_bits)
+
+        def values_in(index: Dict, bits: int) -> List:
+            return sorted(value for value, value_bits in index.items() if value_bits & bits)
+
+        return {
+            "departments": sorted(self.by_department),
+            "course_types": values_in(self.by_course_type, department_bits),
+            "detailed_areas": values_in(self.by_detailed_area, type_bits),
+            "grades": values_in(self.by_grade, department_bits),
+            "credits": values_in(self.by_credits, department_bits),
+        }
+
+_index: Optional[LectureSearchIndex] = None
+_index_lock = threading.Lock()
+
+def get_lecture_index() -> LectureSearchIndex:
+    """
+    현재 카탈로그 버전의 검색 인덱스를 반환합니다.
+    카탈로그가 다시 로드되어 버전이 바뀐 경우에만 인덱스를 새로 만듭니다.
+    """
+    global _index
+    # 버전과 강의 목록을 같은 상태에서 읽도록 카탈로그 상태를 한 번만 가져옴
+    state = get_catalog().state
+    index = _index
+    if index is None or index.version != state.version:
+        with _index_lock:
+            if _index is None or _index.version != state.version:
+                _index = LectureSearchIndex(state)
+            index = _index
+    return index
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    인덱스 검색 결과가 전체 강의를 직접 거른 결과와 같은지 확인하고, 빌드/검색 시간을 출력합니다.
+    사용법 (저장소 루트에서): python -m api.lecture_index
+    """
+    import time
+
+    print("--- 강의 검색 인덱스 테스트 시작 ---")
+    start = time.perf_counter()
+    index = get_lecture_index()
+    print(f"인덱스 빌드: 강의 {len(index.lectures)}개, 2-gram 포함 {len(index.by_gram)}개, "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def brute_force(query="", department=None, grades=(), min_credits=None, days=()):
+        day_mask_value = day_names_to_mask(list(days))
+        return [
+            lecture for lecture in index.lectures
+            if normalize_search_text(query) in normalize_search_text(lecture.course_name) + "\x00" + lecture.course_id
+            and (department is None or lecture.department == department)
+            and (not grades or any(digit in lecture.grade for grade in grades for digit in grade))
+            and (min_credits is None or lecture.credits >= min_credits)
+            and (not days or lecture.slot_mask & day_mask_value)
+        ]
+
+    # 이미 고른 강의들과 겹치지 않는 강의: 슬롯 역색인 OR + 여집합 vs 전체 강의 직접 검사
+    chosen = [lecture for lecture in index.lectures if lecture.slot_mask][:6]
+    chosen_mask = 0
+    for lecture in chosen:
+        chosen_mask |= lecture.slot_mask
+    start = time.perf_counter()
+    total, _ = index.search(free_slot_mask=chosen_mask, has_time=True, limit=0)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    expected = sum(1 for lecture in index.lectures if lecture.raw_time_location and not lecture.slot_mask & chosen_mask)
+    print(f"빈 시간에 들어가는 강의 (고른 강의 {len(chosen)}개): {total}개 ({elapsed_ms:.3f} ms) "
+          f"{'일치' if total == expected else '불일치'}")
+
+    department = sorted(index.by_department)[0]
+    cases = [
+        {"query": "컴퓨터"}, {"query": "공학 설계"}, {"query": "영"}, {"query": "9000"},
+        {"department": department, "grades": ["3"]}, {"min_credits": 3, "days": ["금"]},
+        {"query": "영어", "grades": ["1", "2"], "days": ["월", "수"]},
+    ]
+    for case in cases:
+        start = time.perf_counter()
+        total, page = index.search(**case, limit=5)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        expected = brute_force(**case)
+        ok = total == len(expected) and [lecture.no for lecture in page] == [lecture.no for lecture in expected[:5]]
+        print(f"{str(case):60} -> {total:4}개 ({elapsed_ms:.2f} ms) {'일치' if ok else '불일치'}")
+    print(index.facets(department))
+    print("--- 강의 검색 인덱스 테스트 종료 ---")
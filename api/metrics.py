@@ -0,0 +1,182 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from .solver import SearchStats
+
+# 단계별 소요 시간 히스토그램의 구간 경계(초)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 요청 처리 단계 (/api/generate 파이프라인 순서)
+STAGES = ("preprocess", "preferences", "catalog", "result_cache", "search", "ranking", "serialization")
+
+# 탐색 통계 중 누적 카운터로 내보내는 값: (SearchStats 필드, 메트릭 이름, 설명)
+_SOLVER_COUNTERS = (
+    ("nodes", "timetable_search_nodes_total", "방문한 탐색 노드 수"),
+    ("conflict_prunes", "timetable_search_conflict_prunes_total", "전방 검사로 제거된 분반 동치류 수"),
+    ("credit_prunes", "timetable_search_credit_prunes_total", "학점 상한 때문에 시도하지 않은 선택지 수"),
+    ("dead_ends", "timetable_search_dead_ends_total", "필수 그룹의 도메인이 비어 잘라낸 가지 수"),
+    ("preference_prunes", "timetable_search_preference_prunes_total", "선호도 제약 때문에 제외한 분반 또는 가지 수"),
+    ("combinations", "timetable_search_combinations_total", "탐색이 내보낸 조합 수"),
+)
+
+class RequestMetrics:
+    """
+    요청 하나의 단계별 소요 시간과 탐색 통계.
+    같은 단계가 여러 번 실행되면 시간을 더합니다.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        # 이 요청에서 실행한 탐색들의 통계
+        self.searches: List[SearchStats] = []
+        self.cached = False
+        # 세션의 직전 탐색 결과에서 증분으로 답했는지 여부
+        self.incremental = False
+        # 조건을 모두 만족하는 조합이 없어 선호 조건을 완화한 결과를 돌려줬는지 여부
+        self.relaxed = False
+        # 증분 탐색 요청에서 다음 요청을 위해 세션에 탐색 상태를 보관했는지 여부
+        self.session_saved = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def record_search(self, stats: SearchStats):
+        self.searches.append(stats)
+
+    def merge(self, other: 'RequestMetrics'):
+        """다른 프로세스(일괄 작업의 작업자)에서 기록한 같은 요청의 단계 시간과 탐색 통계를 더합니다."""
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.searches.extend(other.searches)
+        self.cached = self.cached or other.cached
+        self.incremental = self.incremental or other.incremental
+        self.relaxed = self.relaxed or other.relaxed
+
+    def server_timing(self) -> str:
+        """Server-Timing 응답 헤더 값 (단위: ms)"""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(STAGE_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(STAGE_BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """
+    프로세스 전체의 누적 메트릭. /api/metrics에서 Prometheus 텍스트 형식으로 내보냅니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self.stage_seconds: Dict[str, _Histogram] = {}
+        self.solver_totals: Dict[str, int] = {field: 0 for field, _, _ in _SOLVER_COUNTERS}
+        self.cap_hits = 0
+        self.timeouts = 0
+        self.cached_responses = 0
+        self.incremental_solves = 0
+        self.relaxed_searches = 0
+
+    def observe(self, endpoint: str, status: str, metrics: RequestMetrics):
+        with self._lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for name, seconds in metrics.stages.items():
+                self.stage_seconds.setdefault(name, _Histogram()).observe(seconds)
+            self.cached_responses += metrics.cached
+            self.incremental_solves += metrics.incremental
+            self.relaxed_searches += metrics.relaxed
+            for stats in metrics.searches:
+                for field in self.solver_totals:
+                    self.solver_totals[field] += getattr(stats, field)
+                self.cap_hits += stats.cap_hit
+                self.timeouts += stats.timed_out
+
+    def render(
+        self,
+        counters: Optional[Dict[str, Tuple[str, float]]] = None,
+        gauges: Optional[Dict[str, Tuple[str, float]]] = None,
+    ) -> str:
+        """
+        Prometheus 텍스트 형식(0.0.4)으로 변환합니다.
+
+        :param counters: 다른 모듈이 세는 누적 값 {메트릭 이름: (설명, 값)} (캐시 적중 수 등)
+        :param gauges: 함께 내보낼 현재 값 {메트릭 이름: (설명, 값)} (캐시 크기, 대기열 길이 등)
+        """
+        lines: List[str] = []
+
+        def counter(name: str, help_text: str, value: float):
+            lines.extend((f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"))
+
+        with self._lock:
+            lines.extend(("# HELP timetable_requests_total 처리한 요청 수", "# TYPE timetable_requests_total counter"))
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'timetable_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+            lines.extend((
+                "# HELP timetable_stage_seconds 요청 처리 단계별 소요 시간",
+                "# TYPE timetable_stage_seconds histogram",
+            ))
+            for stage, histogram in sorted(self.stage_seconds.items(), key=lambda item: _stage_order(item[0])):
+                cumulative = 0
+                for bound, count in zip(STAGE_BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'timetable_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'timetable_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'timetable_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'timetable_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            for field, name, help_text in _SOLVER_COUNTERS:
+                counter(name, help_text, self.solver_totals[field])
+            counter("timetable_search_cap_hits_total", "조합 개수 제한(max_combinations)에 도달한 탐색 수", self.cap_hits)
+            counter("timetable_search_timeouts_total", "시간 예산이 끝나 중단된 탐색 수", self.timeouts)
+            counter("timetable_cached_responses_total", "결과 캐시에서 응답한 요청 수", self.cached_responses)
+            counter("timetable_incremental_solves_total", "직전 탐색 결과를 재사용해 증분으로 답한 요청 수",
+                    self.incremental_solves)
+            counter("timetable_search_relaxed_total", "조건을 모두 만족하는 조합이 없어 선호 조건을 완화한 탐색 수",
+                    self.relaxed_searches)
+
+        for name, (help_text, value) in (counters or {}).items():
+            counter(name, help_text, value)
+        for name, (help_text, value) in (gauges or {}).items():
+            lines.extend((f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"))
+        return "\n".join(lines) + "\n"
+
+def _stage_order(stage: str) -> Tuple[int, str]:
+    return (STAGES.index(stage) if stage in STAGES else len(STAGES), stage)
+
+metrics_registry = MetricsRegistry()
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    print("--- 메트릭 테스트 시작 ---")
+    request_metrics = RequestMetrics()
+    with request_metrics.stage("preferences"):
+        time.sleep(0.002)
+    with request_metrics.stage("search"):
+        time.sleep(0.01)
+    search_stats = SearchStats()
+    search_stats.nodes = 42
+    request_metrics.record_search(search_stats)
+    request_metrics.relaxed = True
+    print(f"Server-Timing: {request_metrics.server_timing()}")
+
+    registry = MetricsRegistry()
+    registry.observe("generate", "200", request_metrics)
+    print(registry.render(gauges={"timetable_result_cache_entries": ("결과 캐시 항목 수", 3)}))
+    print("--- 메트릭 테스트 종료 ---")
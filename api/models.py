@@ -1,5 +1,6 @@
-from typing import List, Optional, Tuple
-from pydantic import BaseModel, Field
+from typing import FrozenSet, List, Optional, Tuple
+from pydantic import BaseModel, Field, model_validator
+from .utils import time_slot_mask
 
 class Lecture(BaseModel):
     """
@@ -16,6 +17,13 @@ class Lecture(BaseModel):
     course_type: str = Field(alias='교과구분')
     detailed_area: str = Field(alias='세부영역')
     raw_time_location: Optional[str] = Field(alias='수업시간(강의실)')
+    # (요일 x 교시) 비트마스크. 로드 시점에 raw_time_location으로부터 한 번만 계산됩니다.
+    slot_mask: int = Field(default=0, exclude=True)
+
+    @model_validator(mode='after')
+    def compute_slot_mask(self) -> 'Lecture':
+        self.slot_mask = time_slot_mask(self.raw_time_location)
+        return self
 
 class ScoringWeights(BaseModel):
     """
@@ -28,6 +36,14 @@ class ScoringWeights(BaseModel):
     no_consecutive_classes: int = 2
     user_preference_multiplier: int = 100 # 사용자가 명시한 선호도에 대한 가중치 배수
 
+class SearchConstraints(BaseModel):
+    """
+    UserPreferences와 ScoringWeights를 탐색 중에 바로 검사할 수 있는 형태로 컴파일한 제약 조건
+    """
+    forbidden_mask: int = 0 # 조합에 포함되면 안 되는 (요일 x 교시) 슬롯 마스크
+    credit_limit: Optional[int] = None # 총 학점 상한 (None이면 제한 없음)
+    required_lecture_nos: FrozenSet[int] = frozenset() # 반드시 포함해야 하는 강의 번호 (같은 교과목이면 그중 하나)
+
 class UserPreferences(BaseModel):
     """
     사용자의 자연어 선호 조건을 구조화된 데이터로 담는 모델
@@ -0,0 +1,331 @@
+import heapq
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, List, Optional, Tuple
+from .models import Lecture, UserPreferences, ScoringWeights, SearchConstraints
+from .data_loader import get_catalog
+from .scoring import ScoreAggregates, score_from_aggregates
+from .solver import SearchStats, compile_constraints, group_by_course, search_combinations
+
+# 병렬 탐색에 사용할 기본 작업자(프로세스) 수. 1이면 병렬 탐색을 사용하지 않습니다.
+DEFAULT_WORKERS = int(os.getenv("TIMETABLE_SEARCH_WORKERS", "1"))
+# /api/generate/batch가 작업을 동시에 탐색할 작업자 프로세스 수
+BATCH_WORKERS = int(os.getenv("TIMETABLE_BATCH_WORKERS", str(os.cpu_count() or 1)))
+# 작업자 하나당 만들 작업 단위 수 (단위별 탐색 크기가 달라도 작업자가 고르게 바쁘도록)
+UNITS_PER_WORKER = 4
+# 작업 단위를 나눌 때 내려갈 최대 분기 깊이
+MAX_SPLIT_DEPTH = 4
+# 이보다 교과목이 적은 선택은 프로세스 간 전송 비용이 더 크므로 순차 탐색
+PARALLEL_MIN_COURSES = 10
+
+# 작업 단위: 분기 선택 경로 (동치류 번호, 건너뛰기는 None)
+WorkUnit = Tuple[Optional[int], ...]
+# 작업 단위 결과 조합: 강의 번호 튜플 (프로세스 간 전송량을 줄이기 위해 Lecture 대신 사용)
+LectureNos = Tuple[int, ...]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    병렬 탐색과 일괄 작업이 함께 쓰는 프로세스 풀을 반환합니다.
+    풀은 처음 요청될 때 DEFAULT_WORKERS, BATCH_WORKERS, workers 중 가장 큰 크기로 한 번 만들어져
+    이후 요청에서 재사용되며, 각 작업자 프로세스는 카탈로그를 한 번만 로드해 계속 사용합니다.
+    그보다 많은 작업자를 요청할 때만 풀을 새로 만들고, 기존 풀은 이미 받은 작업을 마친 뒤 종료됩니다.
+    (다른 요청이 기다리는 작업을 취소하지 않도록) 작업을 넘길 때마다 이 함수로 풀을 가져오세요.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=False)
+            size = max(workers, DEFAULT_WORKERS, BATCH_WORKERS)
+            # 서버 스레드가 있는 프로세스에서 fork하지 않도록 spawn 방식 사용
+            _pool = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = size
+        return _pool
+
+def shutdown_process_pool():
+    """병렬 탐색용 프로세스 풀을 종료합니다."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+def split_work_units(
+    selected_lecture_nos: List[int],
+    constraints: SearchConstraints,
+    min_units: int,
+    stats: Optional[SearchStats] = None,
+) -> List[WorkUnit]:
+    """
+    탐색 트리를 앞쪽 몇 단계의 분기에서 잘라 독립적인 작업 단위로 나눕니다.
+    작업 단위가 min_units개 이상이 되거나 MAX_SPLIT_DEPTH에 도달할 때까지 깊이를 늘리며,
+    반환 순서는 순차 탐색의 순서와 같습니다.
+
+    :param stats: 주어지면 나누는 과정의 탐색 통계(잘려 나간 가지의 탐색 비율 포함)를 더합니다.
+                  여기에 각 작업 단위의 탐색 비율을 더하면 전체 탐색 비율이 됩니다.
+    """
+    units: List[WorkUnit] = [()]
+    for depth in range(1, MAX_SPLIT_DEPTH + 1):
+        units = []
+        split_stats = SearchStats()
+        search_combinations(
+            selected_lecture_nos, constraints, prefixes_out=units, split_depth=depth, stats=split_stats,
+        )
+        if len(units) >= min_units:
+            break
+    if stats is not None:
+        stats.merge(split_stats)
+    return units
+
+def should_parallelize(selected_lecture_nos: List[int], workers: int) -> bool:
+    """
+    작업자가 둘 이상이고 선택한 교과목이 충분히 많을 때만 병렬 탐색을 사용합니다.
+    풀의 작업자 프로세스 안(일괄 작업 등)에서는 풀을 다시 만들지 않도록 나누지 않습니다.
+    """
+    if workers <= 1 or multiprocessing.parent_process() is not None:
+        return False
+    return len(group_by_course(get_catalog().get_lectures(selected_lecture_nos))) >= PARALLEL_MIN_COURSES
+
+def _remaining_budget_ms(deadline: Optional[float]) -> Optional[float]:
+    """벽시계 기준 마감 시각까지 남은 시간(ms). 프로세스마다 단조 시계가 다를 수 있어 time.time()을 사용합니다."""
+    if deadline is None:
+        return None
+    return max((deadline - time.time()) * 1000, 0.0)
+
+def _search_unit(
+    selected_lecture_nos: List[int],
+    constraints: SearchConstraints,
+    unit: WorkUnit,
+    max_combinations: int,
+    deadline: Optional[float] = None,
+) -> Tuple[List[LectureNos], SearchStats]:
+    """
+    작업자 프로세스에서 작업 단위 하나의 조합을 찾습니다.
+
+    :return: (강의 번호 튜플 목록, 이 단위의 탐색 통계)
+    """
+    stats = SearchStats()
+    combinations = search_combinations(
+        selected_lecture_nos, constraints, max_combinations, stats=stats, prefix=unit,
+        time_budget_ms=_remaining_budget_ms(deadline),
+    )
+    return [tuple(lec.no for lec in combo) for combo in combinations], stats
+
+def _search_unit_top(
+    selected_lecture_nos: List[int],
+    constraints: SearchConstraints,
+    unit: WorkUnit,
+    max_combinations: int,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    top_k: int,
+    deadline: Optional[float] = None,
+) -> Tuple[int, List[Tuple[float, int, LectureNos]], SearchStats]:
+    """
+    작업자 프로세스에서 작업 단위 하나의 상위 top_k개 조합을 찾습니다.
+
+    :return: (찾은 조합 수, 점수 내림차순의 [(점수, 작업 단위 안의 순서, 강의 번호 튜플)], 이 단위의 탐색 통계)
+    """
+    stats = SearchStats()
+    aggregates: List[ScoreAggregates] = []
+    combinations = search_combinations(
+        selected_lecture_nos, constraints, max_combinations, aggregates_out=aggregates, stats=stats,
+        prefix=unit, time_budget_ms=_remaining_budget_ms(deadline),
+    )
+    scores = [score_from_aggregates(agg, preferences, weights) for agg in aggregates]
+    best = heapq.nsmallest(top_k, range(len(combinations)), key=lambda index: (-scores[index], index))
+    return len(combinations), [
+        (scores[index], index, tuple(lec.no for lec in combinations[index])) for index in best
+    ], stats
+
+def _to_lectures(lecture_nos: LectureNos) -> List[Lecture]:
+    by_no = get_catalog().by_no
+    return [by_no[no] for no in lecture_nos]
+
+def search_combinations_parallel(
+    selected_lecture_nos: List[int],
+    constraints: SearchConstraints,
+    max_combinations: int = 10000,
+    workers: int = DEFAULT_WORKERS,
+    time_budget_ms: Optional[float] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[List[Lecture]]:
+    """
+    search_combinations의 병렬 버전. 작업 단위를 프로세스 풀에서 나눠 탐색합니다.
+
+    작업 단위의 결과를 순차 탐색 순서대로 이어 붙인 뒤 max_combinations에서 자르므로,
+    결과는 작업자 수와 관계없이 search_combinations와 항상 같습니다.
+    작업 단위는 작업자 수만큼만 순서대로 넘기고, 새 단위에는 앞쪽 단위들이 이미 채운 만큼을 뺀
+    남은 개수만 찾게 합니다. 개수 제한을 채우면 아직 넘기지 않은 단위는 탐색하지 않습니다.
+    시간 예산은 모든 작업 단위가 같은 마감 시각을 공유하는 방식으로 적용됩니다.
+    """
+    if stats is None:
+        stats = SearchStats()
+    if not should_parallelize(selected_lecture_nos, workers):
+        return search_combinations(
+            selected_lecture_nos, constraints, max_combinations, stats=stats, time_budget_ms=time_budget_ms,
+        )
+    deadline = None if time_budget_ms is None else time.time() + time_budget_ms / 1000
+    units = split_work_units(selected_lecture_nos, constraints, workers * UNITS_PER_WORKER, stats)
+    if len(units) <= 1:
+        stats.coverage = 0.0
+        return search_combinations(
+            selected_lecture_nos, constraints, max_combinations, stats=stats,
+            time_budget_ms=_remaining_budget_ms(deadline),
+        )
+
+    pending: Deque[Future] = deque()
+    next_unit = 0
+    all_combinations: List[List[Lecture]] = []
+    try:
+        while len(all_combinations) < max_combinations and (pending or next_unit < len(units)):
+            while next_unit < len(units) and len(pending) < workers:
+                # 뒤쪽 단위의 조합은 앞쪽 단위가 채우고 남은 개수만큼만 쓰이므로 그만큼만 찾음
+                pending.append(get_process_pool(workers).submit(
+                    _search_unit, selected_lecture_nos, constraints, units[next_unit],
+                    max_combinations - len(all_combinations), deadline,
+                ))
+                next_unit += 1
+            unit_combinations, unit_stats = pending.popleft().result()
+            stats.merge(unit_stats)
+            remaining = max_combinations - len(all_combinations)
+            all_combinations.extend(_to_lectures(lecture_nos) for lecture_nos in unit_combinations[:remaining])
+        if len(all_combinations) >= max_combinations:
+            stats.cap_hit = True
+    finally:
+        for future in pending:
+            future.cancel()
+    stats.combinations = len(all_combinations)
+    return all_combinations
+
+def find_top_combinations_parallel(
+    selected_lecture_nos: List[int],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    top_k: int = 10,
+    max_combinations: int = 10000,
+    workers: int = DEFAULT_WORKERS,
+    time_budget_ms: Optional[float] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[List[Lecture]]:
+    """
+    선호도를 제약으로 적용한 조합 중 상위 top_k개를 병렬로 찾습니다.
+    결과는 rank_combinations(find_combinations_with_preferences(..., max_combinations), ...)[:top_k]와 같습니다.
+
+    각 작업자는 자기 작업 단위의 상위 top_k개만 점수순으로 돌려주고, 이를 힙으로 (점수, 작업 단위 순서,
+    단위 안의 순서) 순서로 합쳐 동점 순서까지 순차 탐색과 같게 만듭니다. 작업 단위는 search_combinations_parallel과
+    같이 작업자 수만큼만 순서대로 넘기고, 새 단위에는 앞쪽 단위들이 채우고 남은 개수만 찾게 합니다.
+    넘길 때보다 앞쪽 단위가 더 채워 제한에 걸치게 된 단위 하나는 정확히 남은 개수만큼 다시 탐색합니다.
+    """
+    if stats is None:
+        stats = SearchStats()
+    if top_k <= 0:
+        return []
+    deadline = None if time_budget_ms is None else time.time() + time_budget_ms / 1000
+    constraints = compile_constraints(preferences, weights)
+    units: List[WorkUnit] = [()]
+    if should_parallelize(selected_lecture_nos, workers):
+        units = split_work_units(selected_lecture_nos, constraints, workers * UNITS_PER_WORKER, stats)
+        if len(units) <= 1:
+            units = [()]
+            stats.coverage = 0.0
+
+    unit_args = (max_combinations, preferences, weights, top_k)
+    # 작업 단위별 점수순 후보 목록: [(-점수, 작업 단위 순서, 단위 안의 순서, 강의 번호 튜플)]
+    unit_candidates: List[List[Tuple[float, int, int, LectureNos]]] = []
+    pending: Deque[Tuple[int, Future]] = deque()
+    next_unit = 0
+    offset = 0
+    try:
+        while offset < max_combinations and (pending or next_unit < len(units)):
+            if len(units) == 1:
+                # 나눌 수 없는 선택은 프로세스 간 전송 없이 이 프로세스에서 탐색
+                count, best, unit_stats = _search_unit_top(
+                    selected_lecture_nos, constraints, (), *unit_args, deadline,
+                )
+                unit_index, next_unit = 0, 1
+            else:
+                while next_unit < len(units) and len(pending) < workers:
+                    pending.append((next_unit, get_process_pool(workers).submit(
+                        _search_unit_top, selected_lecture_nos, constraints, units[next_unit],
+                        max_combinations - offset, *unit_args[1:], deadline,
+                    )))
+                    next_unit += 1
+                unit_index, future = pending.popleft()
+                count, best, unit_stats = future.result()
+            stats.merge(unit_stats)
+            remaining = max_combinations - offset
+            if count > remaining:
+                # 개수 제한에 걸친 단위: 제한 안쪽의 조합만으로 상위 top_k개를 다시 구함
+                count, best, _ = _search_unit_top(
+                    selected_lecture_nos, constraints, units[unit_index], remaining, *unit_args[1:], deadline,
+                )
+            unit_candidates.append([(-score, unit_index, index, lecture_nos) for score, index, lecture_nos in best])
+            offset += count
+        if offset >= max_combinations:
+            stats.cap_hit = True
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+    merged = heapq.merge(*unit_candidates)
+    results = [_to_lectures(lecture_nos) for _, _, _, lecture_nos in islice(merged, top_k)]
+    stats.combinations = len(results)
+    return results
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    작업자 수를 바꿔 가며 순차 탐색과 결과가 같은지 확인합니다.
+    사용법 (저장소 루트에서): python -m api.parallel
+    """
+    import random
+    import time
+    from .engine import rank_combinations
+    from .solver import search_combinations as sequential_search
+
+    print("--- 병렬 탐색 일치 테스트 시작 ---")
+    random.seed(0)
+    catalog = get_catalog()
+    multi_section_ids = [course_id for course_id in catalog.by_course_id if len(catalog.by_course_id[course_id]) > 1]
+    course_ids = list(catalog.by_course_id)
+
+    mismatches = 0
+    for trial in range(6):
+        selected_courses = random.sample(multi_section_ids, 4) + random.sample(course_ids, PARALLEL_MIN_COURSES - 4)
+        lecture_nos = [lec.no for course_id in selected_courses for lec in catalog.by_course_id[course_id]]
+        preferences = UserPreferences(**random.choice([{}, {'avoid_morning': True}, {'no_class_days': ['금']}]))
+        weights = ScoringWeights(credit_limit=random.choice([12, 18, 23]))
+        constraints = compile_constraints(preferences, weights)
+        max_combinations = random.choice([50, 1000, 100000])
+
+        start = time.perf_counter()
+        expected = sequential_search(lecture_nos, constraints, max_combinations)
+        expected_top = rank_combinations(expected, preferences, weights)[:10]
+        sequential_seconds = time.perf_counter() - start
+
+        for workers in (1, 2, 3):
+            start = time.perf_counter()
+            actual = search_combinations_parallel(lecture_nos, constraints, max_combinations, workers)
+            actual_top = find_top_combinations_parallel(lecture_nos, preferences, weights, 10, max_combinations, workers)
+            parallel_seconds = time.perf_counter() - start
+            same = [[lec.no for lec in combo] for combo in actual] == [[lec.no for lec in combo] for combo in expected] \
+                and [[lec.no for lec in combo] for combo in actual_top] == [[lec.no for lec in combo] for combo in expected_top]
+            if not same:
+                mismatches += 1
+            print(f"시도 {trial}, 작업자 {workers}: 조합 {len(actual)}개, "
+                  f"{'일치' if same else '불일치'} (순차 {sequential_seconds:.2f}s, 병렬 {parallel_seconds:.2f}s)")
+
+    shutdown_process_pool()
+    print(f"불일치 {mismatches}건")
+    print("--- 병렬 탐색 일치 테스트 종료 ---")
@@ -1,7 +1,9 @@
 import os
-import json
+import threading
 from typing import Dict
 from .models import UserPreferences
+from .preference_store import PreferenceStore
+from .rule_parser import parse_preferences_locally
 
 # LangChain 관련 라이브러리 임포트
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -10,71 +12,72 @@ from langchain.chains import create_extraction_chain_pydantic
 # .env 파일 로드를 위한 라이브러리
 from dotenv import load_dotenv
 
-# 파일 기반 캐시 설정
-CACHE_FILE = 'preference_cache.json'
+# SQLite 기반 캐시. 처음 조회할 때 데이터베이스를 엽니다.
+preference_store = PreferenceStore()
 
-def load_cache() -> Dict[str, Dict]:
-    if not os.path.exists(CACHE_FILE):
-        return {}
-    try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (IOError, json.JSONDecodeError):
-        return {}
+# LLM 호출 타임아웃(초)
+LLM_TIMEOUT_SECONDS = 8
+LLM_INVOKE_CONFIG = {"configurable": {"timeout": LLM_TIMEOUT_SECONDS}}
 
-def save_cache(cache: Dict[str, Dict]):
-    try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, ensure_ascii=False, indent=4)
-    except IOError:
-        pass # 파일 쓰기 실패 시 무시
+_structured_model = None
+_model_lock = threading.Lock()
 
-preference_cache = load_cache()
+def get_structured_model():
+    """
+    UserPreferences 구조로 출력하는 LLM 클라이언트를 반환합니다.
+    .env 로드와 클라이언트 생성은 프로세스에서 처음 호출될 때 한 번만 수행합니다.
+
+    :raises ValueError: GOOGLE_API_KEY가 없는 경우
+    """
+    global _structured_model
+    if _structured_model is None:
+        with _model_lock:
+            if _structured_model is None:
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                dotenv_path = os.path.join(script_dir, '..', '.env')
+                if os.path.exists(dotenv_path):
+                    load_dotenv(dotenv_path)
+
+                api_key = os.getenv("GOOGLE_API_KEY")
+                if not api_key:
+                    raise ValueError("GOOGLE_API_KEY 환경 변수를 찾을 수 없습니다. .env 파일을 확인하세요.")
+
+                llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=api_key, convert_system_message_to_human=True)
+                _structured_model = llm.with_structured_output(UserPreferences)
+    return _structured_model
 
 def clear_preference_cache():
     """
-    메모리와 디스크에서 캐시를 모두 지웁니다.
+    캐시를 모두 지웁니다.
     """
-    global preference_cache
-    preference_cache.clear()
-    if os.path.exists(CACHE_FILE):
-        try:
-            os.remove(CACHE_FILE)
-        except OSError as e:
-            print(f"Error removing cache file: {e}")
+    preference_store.clear()
 
 def parse_user_preferences(user_input: str) -> Dict:
     """
     사용자의 자연어 입력을 LangChain과 LLM을 사용하여 분석하고,
     UserPreferences Pydantic 모델에 정의된 구조로 변환합니다.
-    결과는 파일 캐시에 저장됩니다.
+    결과는 캐시에 저장되며, 공백과 문장 부호만 다른 입력은 같은 캐시 항목을 사용합니다.
+    정형화된 문장은 규칙 기반 분석기로 먼저 처리하고, 규칙으로 완전히 설명되지 않는 문장만 LLM에 보냅니다.
     """
-    if user_input in preference_cache:
-        return preference_cache[user_input]
+    local_result = parse_preferences_locally(user_input)
+    if local_result is not None:
+        return local_result
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    dotenv_path = os.path.join(script_dir, '..', '.env')
-    if os.path.exists(dotenv_path):
-        load_dotenv(dotenv_path)
-    
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY 환경 변수를 찾을 수 없습니다. .env 파일을 확인하세요.")
+    cached = preference_store.get(user_input)
+    if cached is not None:
+        return cached
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", google_api_key=api_key, convert_system_message_to_human=True)
-    structured_llm = llm.with_structured_output(UserPreferences)
+    structured_llm = get_structured_model()
 
     try:
-        # 8초의 타임아웃 설정
-        result = structured_llm.invoke(user_input, config={"configurable": {"timeout": 8}})
+        result = structured_llm.invoke(user_input, config=LLM_INVOKE_CONFIG)
         result_dict = result.model_dump()
     except Exception as e:
         # 타임아웃 또는 다른 오류 발생 시, 빈 딕셔너리 반환
         print(f"Preference parsing error: {e}")
         result_dict = {}
 
-    preference_cache[user_input] = result_dict
-    save_cache(preference_cache)
+    preference_store.set(user_input, result_dict)
 
     return result_dict
 
@@ -0,0 +1,166 @@
+import asyncio
+import os
+from typing import Dict, Optional
+from .models import UserPreferences
+from .preference_store import PreferenceStore, normalize_preference_key
+from .rule_parser import parse_preferences_locally
+from .preference_parser import LLM_INVOKE_CONFIG, LLM_TIMEOUT_SECONDS, get_structured_model, preference_store
+
+# LLM 제공자에게 동시에 보낼 수 있는 최대 요청 수
+DEFAULT_LLM_CONCURRENCY = int(os.getenv("PREFERENCE_LLM_CONCURRENCY", "4"))
+
+class PreferenceParsingService:
+    """
+    프로세스 전체에서 재사용하는 비동기 선호도 분석 서비스.
+
+    - LLM 클라이언트는 한 번만 만들어 재사용하고, ainvoke로 이벤트 루프를 막지 않고 호출합니다.
+    - 같은 문장(정규화한 키 기준)에 대한 요청이 동시에 들어오면 진행 중인 호출 하나를 함께 기다립니다.
+    - 제공자에게 동시에 보내는 호출 수를 max_concurrency개로 제한합니다.
+
+    - 선호도 캐시(SQLite) 조회와 저장은 잠금을 기다릴 수 있으므로 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+
+    model을 지정하면 그 모델을 사용합니다. (ainvoke(text, config=...)가 UserPreferences를 반환하는 객체,
+    예: 테스트용 가짜 모델) 지정하지 않으면 처음 LLM이 필요할 때 get_structured_model()을 사용합니다.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        max_concurrency: int = DEFAULT_LLM_CONCURRENCY,
+        timeout_seconds: float = LLM_TIMEOUT_SECONDS,
+        store: Optional[PreferenceStore] = None,
+    ):
+        self._model = model
+        self.timeout_seconds = timeout_seconds
+        self.store = store if store is not None else preference_store
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.llm_calls = 0
+        self.coalesced = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_structured_model()
+        return self._model
+
+    def warm_up(self) -> bool:
+        """
+        서버 시작 시 LLM 클라이언트를 미리 만듭니다.
+        API 키가 없으면 False를 반환하고, 실제로 LLM이 필요한 요청에서 오류를 알립니다.
+        """
+        try:
+            self.model
+        except ValueError:
+            return False
+        return True
+
+    async def parse(self, user_input: str) -> Dict:
+        """
+        parse_user_preferences의 비동기 버전. 규칙 기반 분석 → 캐시 → LLM 순서로 시도합니다.
+
+        :raises ValueError: LLM이 필요한데 GOOGLE_API_KEY가 없는 경우
+        """
+        local_result = parse_preferences_locally(user_input)
+        if local_result is not None:
+            return local_result
+
+        cached = await asyncio.to_thread(self.store.get, user_input)
+        if cached is not None:
+            return cached
+
+        key = normalize_preference_key(user_input)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call_model(user_input))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # 기다리던 요청 하나가 취소되어도 함께 기다리는 다른 요청의 호출은 계속되도록 shield
+        return await asyncio.shield(task)
+
+    async def _call_model(self, user_input: str) -> Dict:
+        model = self.model
+        async with self._semaphore:
+            self.llm_calls += 1
+            try:
+                result = await asyncio.wait_for(
+                    model.ainvoke(user_input, config=LLM_INVOKE_CONFIG), self.timeout_seconds,
+                )
+                result_dict = result.model_dump()
+            except Exception as e:
+                # 타임아웃 또는 다른 오류 발생 시, 빈 딕셔너리 반환
+                print(f"Preference parsing error: {e}")
+                result_dict = {}
+        await asyncio.to_thread(self.store.set, user_input, result_dict)
+        return result_dict
+
+    def stats(self) -> Dict:
+        return {"llm_calls": self.llm_calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+_service: Optional[PreferenceParsingService] = None
+
+def get_preference_service() -> PreferenceParsingService:
+    """프로세스 전역 선호도 분석 서비스를 반환합니다."""
+    global _service
+    if _service is None:
+        _service = PreferenceParsingService()
+    return _service
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    가짜 모델로 동일 문장 요청 합치기와 동시 호출 수 제한을 확인합니다.
+    사용법 (저장소 루트에서): python -m api.preference_service
+    """
+    import tempfile
+    import time
+
+    class FakePreferenceModel:
+        """
+        테스트용 로컬 모델. 정해 둔 응답(문장 -> 선호도 딕셔너리)을 delay초 뒤에 반환하고,
+        정해 두지 않은 문장에는 빈 선호도를 반환합니다. 동시에 처리 중인 최대 호출 수를 기록합니다.
+        """
+
+        def __init__(self, responses: Optional[Dict[str, Dict]] = None, delay: float = 0.05):
+            self.responses = responses or {}
+            self.delay = delay
+            self.calls = 0
+            self.active = 0
+            self.max_active = 0
+
+        async def ainvoke(self, text: str, config=None) -> UserPreferences:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                await asyncio.sleep(self.delay)
+                return UserPreferences(**self.responses.get(text, {}))
+            finally:
+                self.active -= 1
+
+    async def main():
+        with tempfile.TemporaryDirectory() as directory:
+            store = PreferenceStore(os.path.join(directory, "cache.sqlite3"), legacy_path=None)
+            model = FakePreferenceModel({"컴퓨터 구조는 꼭 넣어줘": {"must_include_lectures": [1]}}, delay=0.1)
+            service = PreferenceParsingService(model, max_concurrency=2, store=store)
+
+            start = time.perf_counter()
+            same = await asyncio.gather(*[service.parse("컴퓨터 구조는 꼭 넣어줘") for _ in range(10)])
+            print(f"같은 문장 10건: 모델 호출 {model.calls}회, 합쳐진 요청 {service.coalesced}건, "
+                  f"{time.perf_counter() - start:.2f}s, 결과 동일: {all(result == same[0] for result in same)}")
+
+            start = time.perf_counter()
+            await asyncio.gather(*[service.parse(f"알 수 없는 문장 {index}") for index in range(6)])
+            print(f"다른 문장 6건: 최대 동시 호출 {model.max_active}회 (제한 2), {time.perf_counter() - start:.2f}s")
+
+            calls = model.calls
+            await service.parse("컴퓨터 구조는 꼭 넣어줘!")
+            await service.parse("금공강")
+            print(f"캐시/규칙으로 처리된 문장의 추가 모델 호출: {model.calls - calls}회")
+            store.close()
+
+    print("--- 비동기 선호도 분석 서비스 테스트 시작 ---")
+    asyncio.run(main())
+    print("--- 비동기 선호도 분석 서비스 테스트 종료 ---")
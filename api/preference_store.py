@@ -0,0 +1,257 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional
+
+# 선호도 분석 결과를 저장하는 SQLite 파일. (여러 작업자 프로세스가 함께 사용)
+# 배포 환경(Vercel 등)은 임시 디렉터리만 쓸 수 있으므로 기본 위치를 임시 디렉터리로 둡니다.
+DEFAULT_DB_FILE = os.getenv(
+    "PREFERENCE_CACHE_DB", os.path.join(tempfile.gettempdir(), "preference_cache.sqlite3"),
+)
+# 이전 버전에서 사용하던 JSON 캐시 파일. 데이터베이스를 처음 만들 때 한 번만 가져옵니다.
+LEGACY_CACHE_FILE = 'preference_cache.json'
+# 보관할 최대 항목 수. 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+DEFAULT_MAX_ENTRIES = int(os.getenv("PREFERENCE_CACHE_SIZE", "5000"))
+# 다른 프로세스가 쓰기 잠금을 잡고 있을 때 기다리는 최대 시간(초)
+DEFAULT_BUSY_TIMEOUT = 5.0
+# 잠금 때문에 실패한 SQLite 결과 코드 (SQLITE_BUSY, SQLITE_LOCKED; 확장 코드는 하위 8비트가 같음)
+_BUSY_ERROR_CODES = (5, 6)
+
+def normalize_preference_key(text: str) -> str:
+    """
+    캐시 키로 사용할 정규형 문자열을 만듭니다.
+    전각/반각 등을 NFKC로 통일하고 소문자로 바꾼 뒤, 공백과 문장 부호를 제거하므로
+    "금요일 공강!", "금요일공강" 같이 거의 같은 문장은 같은 키가 됩니다.
+    단, 숫자와 숫자 사이의 구분자는 공백 하나로 남깁니다. ("1, 2교시"와 "12교시"는 다른 키)
+    """
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    separated = "".join(
+        " " if char.isspace() or unicodedata.category(char).startswith("P") else char
+        for char in normalized
+    )
+    return _NON_DIGIT_SEPARATOR.sub("", re.sub(r" +", " ", separated))
+
+# 양쪽이 모두 숫자가 아닌 구분자 (제거 대상)
+_NON_DIGIT_SEPARATOR = re.compile(r"(?<!\d) | (?!\d)")
+
+class PreferenceStore:
+    """
+    SQLite 기반 선호도 분석 캐시.
+    항목마다 한 행을 추가/갱신하므로 저장 비용이 캐시 크기와 무관하고, 쓰기는 트랜잭션 단위로 원자적이며
+    여러 프로세스가 동시에 써도 서로의 항목을 덮어쓰지 않습니다.
+    데이터베이스는 처음 조회하거나 저장할 때 열립니다.
+
+    데이터베이스를 열거나 쓸 수 없으면 (읽기 전용 파일 시스템, 손상된 파일, 입출력 오류 등) 경고를 한 번 출력하고
+    그 뒤로는 캐시 없이 동작합니다. (조회는 항상 None, 저장은 무시)
+    다른 프로세스가 잠금을 busy_timeout초 넘게 잡고 있는 경우는 일시적이므로 그 호출만 건너뜁니다.
+    (조회는 캐시 미스, 저장은 생략)
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_FILE, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 legacy_path: Optional[str] = LEGACY_CACHE_FILE, busy_timeout: float = DEFAULT_BUSY_TIMEOUT):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.legacy_path = legacy_path
+        self.busy_timeout = busy_timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.disabled = False
+
+    def _handle_error(self, error: sqlite3.Error):
+        """잠금 대기 시간 초과는 이번 호출만 건너뛰고, 그 밖의 데이터베이스 오류는 캐시를 끕니다. (락을 잡은 상태에서 호출)"""
+        if not _is_busy_error(error):
+            self._disable(error)
+
+    def _disable(self, error: sqlite3.Error):
+        """데이터베이스 오류가 나면 캐시를 끕니다. (락을 잡은 상태에서 호출)"""
+        print(f"Preference cache disabled ({self.db_path}): {error}")
+        self.disabled = True
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+            self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """데이터베이스를 열고, 처음 만드는 경우 테이블을 만들고 이전 JSON 캐시를 가져옵니다. (락을 잡은 상태에서 호출)"""
+        if self._connection is None:
+            # isolation_level=None: 트랜잭션을 직접 BEGIN/COMMIT으로 관리
+            connection = sqlite3.connect(
+                self.db_path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None,
+            )
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("BEGIN IMMEDIATE")
+            except BaseException:
+                connection.close()
+                raise
+            try:
+                created = connection.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='preferences'"
+                ).fetchone() is None
+                if created:
+                    connection.execute(
+                        "CREATE TABLE preferences (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+                    )
+                    connection.execute("CREATE INDEX preferences_last_used ON preferences (last_used)")
+                    self._import_legacy(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
+
+    def _import_legacy(self, connection: sqlite3.Connection):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            return
+        now = time.time()
+        connection.executemany(
+            "INSERT OR REPLACE INTO preferences (key, value, last_used) VALUES (?, ?, ?)",
+            [(normalize_preference_key(text), json.dumps(value, ensure_ascii=False), now)
+             for text, value in legacy.items()],
+        )
+
+    def get(self, text: str) -> Optional[Dict]:
+        key = normalize_preference_key(text)
+        row = None
+        with self._lock:
+            if self.disabled:
+                return None
+            try:
+                connection = self._connect()
+                row = connection.execute("SELECT value FROM preferences WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                connection.execute("UPDATE preferences SET last_used = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.Error as e:
+                # 잠금 때문에 사용 시각만 갱신하지 못한 경우에는 읽은 값을 그대로 돌려줌
+                self._handle_error(e)
+                if row is None or self.disabled:
+                    return None
+        return json.loads(row[0])
+
+    def set(self, text: str, value: Dict):
+        key = normalize_preference_key(text)
+        with self._lock:
+            if self.disabled:
+                return
+            try:
+                connection = self._connect()
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO preferences (key, value, last_used) VALUES (?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), time.time()),
+                    )
+                    # 최근 사용한 max_entries개를 제외한 나머지를 삭제 (LRU)
+                    connection.execute(
+                        "DELETE FROM preferences WHERE key IN "
+                        "(SELECT key FROM preferences ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                self._handle_error(e)
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self.disabled:
+                return 0
+            try:
+                return self._connect().execute("SELECT COUNT(*) FROM preferences").fetchone()[0]
+            except sqlite3.Error as e:
+                self._handle_error(e)
+                return 0
+
+    def clear(self):
+        with self._lock:
+            if self.disabled:
+                return
+            try:
+                self._connect().execute("DELETE FROM preferences")
+            except sqlite3.Error as e:
+                self._handle_error(e)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+def _is_busy_error(error: sqlite3.Error) -> bool:
+    """다른 연결이 잠금을 잡고 있어 실패한 오류인지 여부 ("database is locked" 등)"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in _BUSY_ERROR_CODES
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    키 정규화, LRU 제거, 여러 스레드의 동시 저장, 이전 JSON 캐시 가져오기를 확인합니다.
+    사용법 (저장소 루트에서): python -m api.preference_store
+    """
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("--- 선호도 캐시 저장소 테스트 시작 ---")
+    print(f"정규화: {normalize_preference_key('  금요일 공강, 해주세요!! ')!r} == {normalize_preference_key('금요일공강 해주세요')!r}")
+    print(f"숫자 구분: {normalize_preference_key('1, 2교시 싫어')!r} != {normalize_preference_key('12교시 싫어')!r}")
+
+    unavailable = PreferenceStore("/nonexistent/dir/cache.sqlite3", legacy_path=None)
+    unavailable.set("문장", {"index": 0})
+    print(f"열 수 없는 데이터베이스: 조회 {unavailable.get('문장')}, 캐시 꺼짐 {unavailable.disabled}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = PreferenceStore(os.path.join(directory, "cache.sqlite3"), max_entries=3, legacy_path=None)
+        for index in range(5):
+            store.set(f"문장 {index}", {"index": index})
+        store.get("문장 2")
+        store.set("문장 5", {"index": 5})
+        print(f"LRU 제거 후 항목 수: {len(store)}, 문장 2 유지: {store.get('문장2') is not None}, 문장 3 제거: {store.get('문장 3') is None}")
+
+        # 두 저장소 객체(서로 다른 작업자 프로세스에 해당)가 동시에 써도 항목이 사라지지 않음
+        path = os.path.join(directory, "shared.sqlite3")
+        writers = [PreferenceStore(path, legacy_path=None) for _ in range(2)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: writers[i % 2].set(f"동시 {i}", {"i": i}), range(200)))
+        print(f"동시 저장 200건 후 항목 수: {len(writers[0])}")
+
+        # 다른 연결이 쓰기 잠금을 잡고 있으면 저장만 건너뛰고 캐시는 계속 사용
+        busy = PreferenceStore(path, legacy_path=None, busy_timeout=0.05)
+        busy.set("잠금 전", {"i": -1})
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        busy.set("잠금 중", {"i": -2})
+        locked_read = busy.get("잠금 전")
+        blocker.execute("ROLLBACK")
+        blocker.close()
+        print(f"잠금 중: 조회 {locked_read}, 캐시 꺼짐 {busy.disabled}, 잠금 뒤 저장 후 조회 "
+              f"{busy.set('잠금 뒤', {'i': -3}) or busy.get('잠금 뒤')}")
+
+        legacy_path = os.path.join(directory, "legacy.json")
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump({"연강 없게 해주세요": {"no_consecutive_classes": True}}, f, ensure_ascii=False)
+        migrated = PreferenceStore(os.path.join(directory, "migrated.sqlite3"), legacy_path=legacy_path)
+        print(f"이전 JSON 캐시 가져오기: {migrated.get('연강 없게 해주세요.')}")
+    print("--- 선호도 캐시 저장소 테스트 종료 ---")
@@ -0,0 +1,327 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from .models import UserPreferences, ScoringWeights
+
+# 프로세스 안에 보관할 최대 결과 수와 보관 시간(초)
+DEFAULT_MAX_ENTRIES = int(os.getenv("TIMETABLE_RESULT_CACHE_SIZE", "256"))
+DEFAULT_TTL_SECONDS = float(os.getenv("TIMETABLE_RESULT_CACHE_TTL", "600"))
+# 지정하면 여러 프로세스가 함께 쓰는 공유 저장소로 이 디렉터리를 사용합니다.
+SHARED_CACHE_DIR = os.getenv("TIMETABLE_RESULT_CACHE_DIR")
+
+# 순서가 의미 없는 선호도 필드. 같은 조건이 같은 키가 되도록 정렬해서 해시합니다.
+_UNORDERED_PREFERENCE_FIELDS = ("no_class_days", "avoid_periods", "must_include_lectures")
+
+class CachedResult(NamedTuple):
+    """
+    캐시에 저장되는 순위 결과.
+    시간표는 강의 번호 튜플로만 저장하고, 꺼낼 때 카탈로그에서 Lecture로 되돌립니다.
+    complete는 조건을 모두 만족하는 조합 전체를 담았는지(완화, top_k, 개수 제한, 시간 예산 때문에
+    빠진 조합이 없는지) 여부이며, 참이면 이 결과로 증분 탐색 세션을 채울 수 있습니다.
+    """
+    timetables: Tuple[Tuple[int, ...], ...]
+    relaxed_constraints: Tuple[str, ...]
+    search_coverage: float
+    complete: bool = False
+
+def canonical_preferences(preferences: UserPreferences) -> Dict:
+    """선호도를 순서와 무관한 정규형 딕셔너리로 변환합니다."""
+    values = preferences.model_dump(mode="json")
+    for field in _UNORDERED_PREFERENCE_FIELDS:
+        if values.get(field) is not None:
+            values[field] = sorted(set(values[field]))
+    return values
+
+def make_cache_key(
+    lecture_nos: Iterable[int],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    catalog_version: Optional[str],
+    top_k: Optional[int] = None,
+) -> str:
+    """
+    (선택한 강의 번호, 선호도, 가중치, 카탈로그 버전, top_k)의 정규형 JSON에 대한 SHA-256 해시를 반환합니다.
+    강의 번호는 정렬·중복 제거하므로 선택 순서가 달라도 같은 키가 됩니다.
+    """
+    payload = {
+        "lecture_nos": sorted(set(lecture_nos)),
+        "preferences": canonical_preferences(preferences),
+        "weights": weights.model_dump(mode="json"),
+        "catalog_version": catalog_version,
+        "top_k": top_k,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class CacheBackend(ABC):
+    """
+    여러 프로세스(서버 인스턴스)가 함께 쓰는 공유 캐시 저장소의 인터페이스.
+    Redis 같은 외부 저장소를 붙일 때 이 클래스를 상속해 네 메서드를 구현합니다.
+    (하나라도 구현하지 않으면 객체를 만들 때 TypeError가 발생합니다.)
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResult]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: CachedResult, ttl_seconds: float):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+class LocalFileBackend(CacheBackend):
+    """
+    공유 저장소의 로컬 대체 구현. 키마다 JSON 파일 하나에 결과와 만료 시각을 저장합니다.
+    임시 파일에 쓴 뒤 os.replace로 바꾸므로, 동시에 읽는 프로세스가 반쯤 쓰인 파일을 보지 않습니다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            self.delete(key)
+            return None
+        return CachedResult(
+            tuple(tuple(combo) for combo in entry["timetables"]),
+            tuple(entry["relaxed_constraints"]),
+            entry["search_coverage"],
+            entry.get("complete", False),
+        )
+
+    def set(self, key: str, value: CachedResult, ttl_seconds: float):
+        entry = {**value._asdict(), "expires_at": time.time() + ttl_seconds}
+        temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            pass # 공유 저장소 쓰기 실패는 무시 (프로세스 캐시만 사용)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".json"):
+                self.delete(name[:-len(".json")])
+
+class ResultCache:
+    """
+    순위 결과를 위한 프로세스 내 LRU 캐시.
+    항목 수가 max_entries를 넘으면 가장 오래 쓰지 않은 항목부터, 저장한 지 ttl_seconds가 지난 항목은
+    꺼낼 때 제거합니다. 카탈로그 버전이 바뀌면 이전 버전의 결과를 모두 버립니다.
+    공유 저장소(backend)가 있으면 프로세스 캐시에 없을 때 공유 저장소를 읽고, 저장할 때 함께 씁니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[float, CachedResult]]" = OrderedDict()
+        self._catalog_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, catalog_version: Optional[str]):
+        """카탈로그가 다시 로드되었으면 프로세스 캐시를 비웁니다. (락을 잡은 상태에서 호출)"""
+        if catalog_version != self._catalog_version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._catalog_version = catalog_version
+
+    def _store(self, key: str, value: CachedResult):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, catalog_version: Optional[str]) -> Optional[CachedResult]:
+        with self._lock:
+            self._check_version(catalog_version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        # 공유 저장소 조회는 파일/네트워크 I/O이므로 락 밖에서 수행
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.shared_hits += 1
+            if catalog_version == self._catalog_version:
+                self._store(key, value)
+        return value
+
+    def set(self, key: str, value: CachedResult, catalog_version: Optional[str]):
+        with self._lock:
+            self._check_version(catalog_version)
+            self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl_seconds)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+def encode_cursor(offset: int) -> str:
+    """페이지 시작 위치를 클라이언트에 넘길 불투명한 커서 문자열로 변환합니다."""
+    return base64.urlsafe_b64encode(f"o{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """
+    encode_cursor로 만든 커서를 페이지 시작 위치로 되돌립니다. 커서가 없으면 0(첫 페이지)입니다.
+
+    :raises ValueError: 올바른 커서가 아닌 경우
+    """
+    if not cursor:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("잘못된 커서입니다.")
+    if not decoded.startswith("o") or not decoded[1:].isdigit():
+        raise ValueError("잘못된 커서입니다.")
+    return int(decoded[1:])
+
+def new_result_id() -> str:
+    """끝까지 탐색하지 못한 결과처럼 캐시 키를 결과 핸들로 쓸 수 없을 때 사용할 임의의 핸들을 만듭니다."""
+    return secrets.token_hex(16)
+
+_result_cache: Optional[ResultCache] = None
+_result_handles: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """프로세스 전역 결과 캐시를 반환합니다. TIMETABLE_RESULT_CACHE_DIR이 있으면 공유 저장소로 사용합니다."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                backend = LocalFileBackend(SHARED_CACHE_DIR) if SHARED_CACHE_DIR else None
+                _result_cache = ResultCache(backend=backend)
+    return _result_cache
+
+def get_result_handles() -> ResultCache:
+    """
+    페이지 단위 조회를 위해 순위 결과를 보관하는 핸들 저장소를 반환합니다.
+    결과 캐시와 같은 LRU/TTL 규칙을 따르지만, 같은 요청의 결과를 재사용하는 용도가 아니므로
+    적중률 등 통계를 결과 캐시와 따로 셉니다.
+    """
+    global _result_handles
+    if _result_handles is None:
+        with _result_cache_lock:
+            if _result_handles is None:
+                backend = LocalFileBackend(os.path.join(SHARED_CACHE_DIR, "handles")) if SHARED_CACHE_DIR else None
+                _result_handles = ResultCache(backend=backend)
+    return _result_handles
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    키 정규화, LRU/TTL 제거, 카탈로그 버전 무효화, 공유 저장소 읽기를 확인합니다.
+    사용법 (저장소 루트에서): python -m api.result_cache
+    """
+    import tempfile
+
+    print("--- 결과 캐시 테스트 시작 ---")
+    weights = ScoringWeights()
+    key_a = make_cache_key([3, 1, 2, 1], UserPreferences(no_class_days=['금', '월']), weights, "v1")
+    key_b = make_cache_key([1, 2, 3], UserPreferences(no_class_days=['월', '금']), weights, "v1")
+    key_c = make_cache_key([1, 2, 3], UserPreferences(no_class_days=['월', '금']), weights, "v2")
+    print(f"선택/요일 순서가 달라도 같은 키: {key_a == key_b}, 카탈로그 버전이 다르면 다른 키: {key_a != key_c}")
+
+    result = CachedResult(((1, 2), (1, 3)), (), 1.0)
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", result, "v1")
+    cache.set("b", result, "v1")
+    cache.get("a", "v1")
+    cache.set("c", result, "v1") # 가장 오래 쓰지 않은 b가 제거됨
+    print(f"LRU 제거: a={cache.get('a', 'v1') is not None}, b={cache.get('b', 'v1') is not None}")
+    print(f"카탈로그 버전 변경 후: a={cache.get('a', 'v2') is not None}")
+
+    short_cache = ResultCache(ttl_seconds=0.01)
+    short_cache.set("a", result, "v1")
+    time.sleep(0.02)
+    print(f"TTL 만료 후: a={short_cache.get('a', 'v1') is not None}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        writer = ResultCache(backend=LocalFileBackend(directory))
+        reader = ResultCache(backend=LocalFileBackend(directory))
+        writer.set("shared", result, "v1")
+        print(f"다른 프로세스 캐시에서 공유 저장소 읽기: {reader.get('shared', 'v1') == result}")
+        print(reader.stats())
+
+    print(f"커서 왕복: {[decode_cursor(encode_cursor(offset)) for offset in (0, 7, 120)]}, 빈 커서: {decode_cursor(None)}")
+    print(cache.stats())
+    print("--- 결과 캐시 테스트 종료 ---")
@@ -0,0 +1,113 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from .models import UserPreferences
+from .utils import DAY_NAMES
+
+# 자주 쓰이는 부정/긍정 표현 (뒤따르는 어미까지 함께 소비)
+_NEGATIVE = r'(?:싫|없|빼|제외|피하|피해|ㄴㄴ|노노|안\s*듣|안)\S*'
+_POSITIVE = r'(?:만|위주|좋|선호|원해|ㄱㄱ)\S*'
+# 조사
+_PARTICLE = r'(?:은|는|이|가|을|를|에|에는|엔)?'
+# 요일 나열 구분자 (예: "수, 목요일", "월수요일", "화랑 금")
+_DAY_SEPARATOR = r'(?:\s*(?:요일)?\s*(?:,|/|·|와|과|랑|이랑|및|\s)\s*|요일|)'
+
+def _days_rule(match: re.Match, result: Dict):
+    days = [day for day in DAY_NAMES if day in match.group('days')]
+    result['no_class_days'] = sorted(set(result.get('no_class_days') or []) | set(days), key=DAY_NAMES.index)
+
+def _periods_rule(match: re.Match, result: Dict):
+    periods = {int(number) for number in re.findall(r'\d+', match.group('periods'))}
+    result['avoid_periods'] = sorted(set(result.get('avoid_periods') or []) | periods)
+
+def _time_of_day_rule(match: re.Match, result: Dict):
+    morning = match.group('when') in ('오전', '아침')
+    if match.group('negative'):
+        result['avoid_morning' if morning else 'avoid_afternoon'] = True
+    else:
+        result['prefer_morning' if morning else 'prefer_afternoon'] = True
+
+def _flag_rule(field: str) -> Callable[[re.Match, Dict], None]:
+    def apply(match: re.Match, result: Dict):
+        result[field] = True
+    return apply
+
+def _credits_rule(match: re.Match, result: Dict):
+    result['target_credits'] = int(match.group('credits'))
+
+# (패턴, 적용 함수). 앞의 규칙이 소비한 부분은 뒤의 규칙에서 다시 보지 않습니다.
+_RULES: List[Tuple[re.Pattern, Callable[[re.Match, Dict], None]]] = [
+    # "연강 싫어", "연강 없게", "우주공강"
+    (re.compile(rf'연강\s*{_PARTICLE}\s*{_NEGATIVE}|우주\s*공강\S*'), _flag_rule('no_consecutive_classes')),
+    # "금공강", "수목요일 공강해주세요", "금요일 수업은 없게" (앞 글자가 한글이면 "지금 공강" 같은 단어의 일부이므로 제외)
+    (re.compile(
+        rf'(?<![가-힣])(?P<days>[월화수목금](?:{_DAY_SEPARATOR}[월화수목금])*)\s*(?:요일)?\s*{_PARTICLE}\s*'
+        rf'(?:공강\S*|(?:수업|강의)\s*{_PARTICLE}\s*{_NEGATIVE})'
+    ), _days_rule),
+    # "1교시 싫어", "1, 9교시 제외"
+    (re.compile(
+        rf'(?<!\d)(?P<periods>\d{{1,2}}(?:\s*(?:교시)?\s*(?:,|/|·|와|과|랑|이랑|및|\s)\s*\d{{1,2}})*)\s*교시\s*'
+        rf'(?:수업|강의)?\s*{_PARTICLE}\s*{_NEGATIVE}'
+    ), _periods_rule),
+    # "오전 수업 싫어", "아침 수업 없게", "오후만 ㄱㄱ", "오후 수업 좋아요"
+    (re.compile(
+        rf'(?P<when>오전|아침|오후|저녁)\s*(?:에)?\s*(?:수업|강의)?\s*{_PARTICLE}\s*'
+        rf'(?:(?P<negative>{_NEGATIVE})|{_POSITIVE})'
+    ), _time_of_day_rule),
+    # "점심시간 확보", "점심시간은 있어야지", "밥 먹을 시간 챙겨줘"
+    (re.compile(
+        rf'(?:점심\s*(?:시간)?|밥\s*(?:먹을|먹는)\s*시간)\s*{_PARTICLE}\s*'
+        r'(?:확보|비워|비우|있어야|있었으면|있게|보장|챙겨|필요)\S*'
+    ), _flag_rule('prefer_empty_lunch')),
+    # "20학점", "18학점 정도로", "21학점 맞춰줘"
+    # 뒤따르는 말은 아래 표현만 소비합니다. ("20학점 미만", "20학점 싫어"의 나머지 말은 남겨 LLM으로 넘김)
+    (re.compile(
+        r'(?<!\d)(?P<credits>\d{1,2})\s*학점\s*(?:정도|쯤|내외|만)?\s*(?:으로|로)?\s*(?:맞춰\S*|채워\S*|들을래|듣고|들을게)?'
+    ), _credits_rule),
+]
+
+# 규칙이 소비하고 남은 부분이 이 표현들로만 이루어져 있으면 문장 전체를 이해한 것으로 봅니다.
+_FILLER = re.compile(
+    r'해\S*|주세요|줘|줘요|부탁\S*|만들어\S*|그리고|하고|또|좀|제발|꼭|좋겠\S*|싶\S*|듣고|'
+    r'수업|강의|시간표|요|ㄱㄱ|ㅠ+|ㅜ+|ㅎ+|ㅋ+'
+)
+_TOKEN_SEPARATOR = re.compile(r'[\s,./·!?~\-]+')
+
+def parse_preferences_locally(text: str) -> Optional[Dict]:
+    """
+    정형화된 선호도 문장("금공강", "1교시 싫어", "연강 없게", "20학점", "점심시간 확보" 등)을
+    LLM 없이 규칙으로 분석합니다.
+
+    확신 검사: 규칙이 소비하지 못한 부분에 채움말(해주세요, 좀, 수업 등) 외의 단어가 남아 있으면
+    문장을 완전히 이해하지 못한 것으로 보고 None을 반환합니다. 이 경우 호출한 쪽에서 LLM을 사용합니다.
+
+    :return: UserPreferences 형식의 딕셔너리, 또는 확신할 수 없으면 None
+    """
+    result: Dict = {}
+    residual = text
+    for pattern, apply in _RULES:
+        for match in pattern.finditer(residual):
+            apply(match, result)
+        residual = pattern.sub(' ', residual)
+
+    if not result:
+        return None
+    if any(not _FILLER.fullmatch(token) for token in _TOKEN_SEPARATOR.split(residual) if token):
+        return None
+    return UserPreferences(**result).model_dump()
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    print("--- 규칙 기반 선호도 분석 테스트 시작 ---")
+    test_inputs = [
+        "금공강", "1교시 싫어", "1, 9교시 제외해줘", "연강 없게", "20학점", "점심시간 확보",
+        "수, 목요일 공강\n", "오후만 ㄱㄱ", "아침 수업 없게 해주세요", "금요일 공강, 점심시간은 있어야지",
+        "지금 공강이 너무 많아", "모극ㅁ 공강", "최대 20학점", "컴퓨터 구조는 꼭 넣어줘",
+        "18학점 정도로 맞춰줘", "20학점 싫어", "20학점 미만", "20학점 넘게",
+    ]
+    for text in test_inputs:
+        parsed = parse_preferences_locally(text)
+        if parsed is None:
+            print(f"{text!r:32} -> LLM 필요")
+        else:
+            print(f"{text!r:32} -> {({key: value for key, value in parsed.items() if value is not None})}")
+    print("--- 규칙 기반 선호도 분석 테스트 종료 ---")
@@ -0,0 +1,184 @@
+from typing import List, NamedTuple
+from .models import Lecture, UserPreferences, ScoringWeights
+from .utils import (
+    periods_mask, day_mask, day_names_to_mask,
+    PERIODS_PER_DAY, NUM_DAYS, MORNING_MASK,
+)
+
+# 같은 요일 안에서 다음 교시가 존재하는 슬롯들의 마스크 (연강 판정용)
+ADJACENT_MASK = periods_mask(range(PERIODS_PER_DAY - 1))
+# 4교시 슬롯 마스크. 4교시와 5교시가 모두 수업이면 점심시간이 없는 것으로 봅니다.
+LUNCH_MASK = periods_mask([4])
+DAY_MASKS = [day_mask(day) for day in range(NUM_DAYS)]
+# 빈 조합에 부여되는 점수 (rank_combinations와 동일)
+EMPTY_COMBINATION_SCORE = -9999
+
+def count_days(mask: int) -> int:
+    """수업이 있는 요일 수를 반환합니다."""
+    return sum(1 for day_bits in DAY_MASKS if mask & day_bits)
+
+def count_morning_slots(mask: int) -> int:
+    """오전(1-4교시) 슬롯 수를 반환합니다."""
+    return (mask & MORNING_MASK).bit_count()
+
+def count_adjacent_pairs(mask: int) -> int:
+    """같은 요일에서 연속된 두 교시가 모두 차 있는 쌍의 수를 반환합니다."""
+    return (mask & (mask >> 1) & ADJACENT_MASK).bit_count()
+
+def count_lunch_collisions(mask: int) -> int:
+    """4교시와 5교시가 모두 수업인 요일 수를 반환합니다."""
+    return (mask & (mask >> 1) & LUNCH_MASK).bit_count()
+
+class ScoreAggregates(NamedTuple):
+    """
+    시간표 점수 계산에 필요한 집계값.
+    강의를 하나씩 추가하면서 갱신되며, 완성된 시간표의 점수는 이 값만으로 O(1)에 계산됩니다.
+    """
+    credits: int = 0
+    slot_mask: int = 0
+    day_count: int = 0
+    morning_slots: int = 0
+    consecutive_count: int = 0 # 서로 다른 강의가 연속된 교시에 붙어 있는 횟수
+    lunch_collisions: int = 0 # 4교시와 5교시가 모두 수업인 요일 수
+    lecture_count: int = 0
+
+EMPTY_AGGREGATES = ScoreAggregates()
+
+def add_lecture(aggregates: ScoreAggregates, lecture: Lecture) -> ScoreAggregates:
+    """
+    집계값에 강의 하나를 추가한 새 집계값을 반환합니다.
+    조합 안의 강의들은 슬롯이 겹치지 않으므로, 새로 생긴 인접 쌍 중 강의 내부의 쌍을 빼면
+    기존 강의와 새 강의 사이의 연강만 남습니다.
+    """
+    lecture_mask = lecture.slot_mask
+    old_mask = aggregates.slot_mask
+    new_mask = old_mask | lecture_mask
+    return ScoreAggregates(
+        credits=aggregates.credits + lecture.credits,
+        slot_mask=new_mask,
+        day_count=count_days(new_mask),
+        morning_slots=aggregates.morning_slots + count_morning_slots(lecture_mask),
+        consecutive_count=aggregates.consecutive_count + count_adjacent_pairs(new_mask)
+            - count_adjacent_pairs(old_mask) - count_adjacent_pairs(lecture_mask),
+        lunch_collisions=count_lunch_collisions(new_mask),
+        lecture_count=aggregates.lecture_count + 1,
+    )
+
+def aggregate_lectures(lectures: List[Lecture]) -> ScoreAggregates:
+    """강의 목록 전체의 집계값을 계산합니다."""
+    aggregates = EMPTY_AGGREGATES
+    for lecture in lectures:
+        aggregates = add_lecture(aggregates, lecture)
+    return aggregates
+
+class ScoreState:
+    """
+    백트래킹 탐색 중 강의를 넣고 뺄 때(push/pop) 점수 집계값을 함께 유지하는 상태 객체.
+    완성된 시간표의 점수나 부분 시간표의 점수 상한을 다시 계산하지 않고 바로 구할 수 있습니다.
+    """
+
+    def __init__(self):
+        self._stack: List[ScoreAggregates] = [EMPTY_AGGREGATES]
+
+    @property
+    def aggregates(self) -> ScoreAggregates:
+        return self._stack[-1]
+
+    def push(self, lecture: Lecture):
+        self._stack.append(add_lecture(self._stack[-1], lecture))
+
+    def pop(self):
+        if len(self._stack) > 1:
+            self._stack.pop()
+
+    def score(self, preferences: UserPreferences, weights: ScoringWeights) -> float:
+        return score_from_aggregates(self.aggregates, preferences, weights)
+
+def score_from_aggregates(
+    aggregates: ScoreAggregates,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+) -> float:
+    """
+    집계값만으로 rank_combinations와 같은 점수를 계산합니다.
+    하드 필터를 통과한 비어 있지 않은 조합을 전제로 합니다.
+    """
+    score = 0
+
+    # 학점 점수 계산 (목표 학점 우선)
+    if preferences.target_credits is not None:
+        credit_diff = abs(aggregates.credits - preferences.target_credits)
+        score += (1 / (1 + credit_diff)) * 10 * weights.user_preference_multiplier
+    else:
+        score += aggregates.credits * weights.maximize_credits
+
+    if aggregates.slot_mask:
+        score += (5 - aggregates.day_count) * weights.more_empty_days
+        score -= aggregates.morning_slots * weights.fewer_morning_classes
+
+    # 사용자 선호도 적용
+    user_preference_score = 0
+    if preferences.no_class_days:
+        if aggregates.slot_mask & day_names_to_mask(preferences.no_class_days):
+            user_preference_score -= 5
+        else:
+            user_preference_score += 1
+
+    if preferences.no_consecutive_classes and aggregates.consecutive_count > 0:
+        user_preference_score -= aggregates.consecutive_count * 10
+
+    if preferences.prefer_empty_lunch:
+        user_preference_score -= aggregates.lunch_collisions * 10
+
+    score += user_preference_score * weights.user_preference_multiplier
+    return score
+
+def score_upper_bound(
+    aggregates: ScoreAggregates,
+    max_additional_credits: int,
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+) -> float:
+    """
+    부분 시간표에 강의를 더 추가해서 얻을 수 있는 점수의 상한(낙관적 추정치)을 계산합니다.
+
+    강의를 추가하면 수업 요일, 오전 슬롯, 연강, 점심 충돌은 줄어들지 않으므로
+    현재 값을 그대로 사용하고, 학점만 남은 그룹에서 얻을 수 있는 최대치까지 늘어난다고 가정합니다.
+    공강 요일 위반은 탐색 중 하드 제약으로 제거되므로 보너스를 받는 것으로 봅니다.
+    가중치가 음수이면 이 가정이 깨지므로 상한을 무한대로 둡니다.
+    """
+    if min(weights.maximize_credits, weights.fewer_morning_classes, weights.more_empty_days,
+           weights.user_preference_multiplier) < 0:
+        return float('inf')
+
+    total_credits = aggregates.credits
+    max_credits = min(total_credits + max_additional_credits, weights.credit_limit)
+    score = 0
+
+    if preferences.target_credits is not None:
+        if total_credits <= preferences.target_credits <= max_credits:
+            credit_diff = 0
+        else:
+            credit_diff = min(abs(total_credits - preferences.target_credits),
+                              abs(max_credits - preferences.target_credits))
+        score += (1 / (1 + credit_diff)) * 10 * weights.user_preference_multiplier
+    else:
+        score += max(total_credits, max_credits) * weights.maximize_credits
+
+    if aggregates.slot_mask:
+        score += (5 - aggregates.day_count) * weights.more_empty_days
+        score -= aggregates.morning_slots * weights.fewer_morning_classes
+    else:
+        # 아직 슬롯이 없으면 최종 조합은 슬롯이 없거나(0점) 최소 하루 이상 수업이 있음
+        score += 4 * weights.more_empty_days
+
+    user_preference_score = 0
+    if preferences.no_class_days:
+        user_preference_score += 1
+    if preferences.no_consecutive_classes:
+        user_preference_score -= aggregates.consecutive_count * 10
+    if preferences.prefer_empty_lunch:
+        user_preference_score -= aggregates.lunch_collisions * 10
+
+    score += user_preference_score * weights.user_preference_multiplier
+    return score
@@ -0,0 +1,169 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 탐색을 실행할 전용 스레드 수
+DEFAULT_SEARCH_THREADS = int(os.getenv("TIMETABLE_SEARCH_THREADS", str(min(4, os.cpu_count() or 1))))
+# 실행 중인 탐색 외에 대기열에서 기다릴 수 있는 최대 요청 수. 넘으면 503으로 거절합니다.
+DEFAULT_MAX_QUEUE = int(os.getenv("TIMETABLE_SEARCH_QUEUE", "32"))
+# 평균 탐색 시간을 추정할 때 최근 탐색에 주는 가중치 (지수 이동 평균)
+_DURATION_SMOOTHING = 0.2
+
+class SearchQueueFull(Exception):
+    """탐색 대기열이 가득 찬 경우. retry_after는 다시 시도하기까지 기다릴 것을 권하는 시간(초)입니다."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"탐색 요청이 많아 처리할 수 없습니다. {retry_after}초 후 다시 시도해 주세요.")
+        self.retry_after = retry_after
+
+class SearchExecutor:
+    """
+    CPU를 사용하는 탐색/순위 매기기 전용 실행기.
+
+    FastAPI 기본 스레드 풀과 분리된 스레드 풀에서 실행하므로, LLM 응답을 기다리는 요청이나
+    캐시에서 바로 응답하는 요청이 오래 걸리는 탐색 때문에 밀리지 않습니다.
+    실행 중인 작업과 대기 중인 작업을 합쳐 max_workers + max_queue개를 넘으면 새 요청을 받지 않고
+    SearchQueueFull을 발생시킵니다. (대기열이 끝없이 길어져 모든 요청이 느려지는 대신 일부를 빨리 거절)
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_SEARCH_THREADS, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="timetable-search")
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.average_seconds = 0.0
+
+    def _check_capacity(self):
+        """자리가 없으면 SearchQueueFull을 발생시킵니다. (락을 잡은 상태에서 호출)"""
+        if self._admitted >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise SearchQueueFull(self._retry_after())
+
+    def _admit(self):
+        with self._lock:
+            self._check_capacity()
+            self._admitted += 1
+
+    def ensure_capacity(self):
+        """
+        새 작업을 받을 자리가 있는지 미리 확인합니다. (자리를 차지하지는 않음)
+        스트리밍 응답처럼 응답을 시작한 뒤에는 503을 보낼 수 없는 경우, 응답을 시작하기 전에 사용합니다.
+
+        :raises SearchQueueFull: 대기열이 가득 찬 경우
+        """
+        with self._lock:
+            self._check_capacity()
+
+    def _release(self):
+        with self._lock:
+            self._admitted -= 1
+
+    def _retry_after(self) -> int:
+        """대기 중인 작업이 모두 처리되는 데 걸릴 시간을 평균 탐색 시간으로 추정합니다. (락을 잡은 상태에서 호출)"""
+        waves = self._admitted / self.max_workers
+        return max(1, math.ceil(waves * self.average_seconds))
+
+    def _timed(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                if self.completed == 1:
+                    self.average_seconds = elapsed
+                else:
+                    self.average_seconds += _DURATION_SMOOTHING * (elapsed - self.average_seconds)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        fn(*args)를 탐색 전용 스레드에서 실행하고 결과를 기다립니다.
+
+        :raises SearchQueueFull: 대기열이 가득 찬 경우 (fn은 실행되지 않음)
+        """
+        self._admit()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+        finally:
+            self._release()
+
+    async def iterate(self, iterable: Iterable[T]) -> AsyncIterator[T]:
+        """
+        동기 이터러블(예: 스트리밍 이벤트 생성기)을 탐색 전용 스레드에서 한 항목씩 진행합니다.
+        순회가 끝날 때까지 대기열 자리 하나를 차지합니다.
+
+        :raises SearchQueueFull: 대기열이 가득 찬 경우 (첫 항목을 요청할 때 발생)
+        """
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            iterator = iter(iterable)
+            done = object()
+            while True:
+                item = await loop.run_in_executor(self._executor, next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            self._release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(0, self._admitted - self._running),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "average_ms": round(self.average_seconds * 1000, 1),
+            }
+
+_search_executor: Optional[SearchExecutor] = None
+_search_executor_lock = threading.Lock()
+
+def get_search_executor() -> SearchExecutor:
+    """프로세스 전역 탐색 실행기를 반환합니다."""
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = SearchExecutor()
+    return _search_executor
+
+# --- 테스트를 위한 실행 블록 (핵심 원칙 4) ---
+if __name__ == '__main__':
+    """
+    작업자 2개, 대기열 3개인 실행기에 작업 8개를 동시에 넣어 5개만 실행되고 3개는 거절되는지 확인합니다.
+    사용법 (저장소 루트에서): python -m api.search_executor
+    """
+    async def main():
+        executor = SearchExecutor(max_workers=2, max_queue=3)
+
+        async def submit(index):
+            try:
+                return await executor.run(time.sleep, 0.1)
+            except SearchQueueFull as e:
+                return f"거절 (retry_after={e.retry_after})"
+
+        results = await asyncio.gather(*[submit(index) for index in range(8)])
+        print(f"결과: {results}")
+        print(executor.stats())
+
+    print("--- 탐색 실행기 테스트 시작 ---")
+    asyncio.run(main())
+    print("--- 탐색 실행기 테스트 종료 ---")
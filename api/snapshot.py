@@ -0,0 +1,211 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional
+from .models import Lecture
+
+# 카탈로그 스냅샷 파일 형식 (리틀 엔디언, struct-of-arrays)
+#
+#   헤더: MAGIC(4) | 형식 버전(u32) | 강의 수 n(u32) | 문자열 수 m(u32) | 원본 CSV SHA-256(32)
+#         | Lecture 스키마 해시(8)
+#   열 배열: no(i32 x n) | credits(i32 x n) | slot_mask 하위 64비트(u64 x n) | 상위 비트(u64 x n)
+#            | 문자열 필드별 문자열 테이블 인덱스(u32 x n) x len(STRING_FIELDS)
+#   문자열 테이블: 오프셋(u32 x (m + 1)) | UTF-8 바이트열
+#
+# 동일한 문자열(학부명, 교과구분 등)은 테이블에 한 번만 저장되고, 로드 시에도 하나의 객체를 공유합니다.
+# 스키마 해시는 Lecture의 필드 구성이 스냅샷을 만들 때와 같은지 확인하는 데 사용합니다.
+MAGIC = b'SSAS'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sIII32s8s')
+STRING_FIELDS = (
+    'course_id', 'class_section', 'course_name', 'grade',
+    'department', 'course_type', 'detailed_area', 'raw_time_location',
+)
+# raw_time_location이 None인 경우를 나타내는 문자열 인덱스
+NONE_INDEX = 0xFFFFFFFF
+_LOW_64 = (1 << 64) - 1
+
+def lecture_schema_hash() -> bytes:
+    """Lecture 모델의 필드 이름과 타입, 스냅샷의 문자열 필드 목록으로 만든 8바이트 해시"""
+    fields = ";".join(f"{name}:{field.annotation!r}" for name, field in Lecture.model_fields.items())
+    return hashlib.sha256(f"{fields}|{','.join(STRING_FIELDS)}".encode('utf-8')).digest()[:8]
+
+def _typed_array(typecode: str, itemsize: int, values) -> array:
+    """지정한 바이트 크기의 타입 코드로 array를 생성합니다. (플랫폼별 크기 차이 대비)"""
+    result = array(typecode, values)
+    if result.itemsize != itemsize:
+        raise RuntimeError(f"array 타입 '{typecode}'의 크기가 {itemsize}바이트가 아닙니다.")
+    return result
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _column(buffer: memoryview, offset: int, fmt: str, count: int):
+    """버퍼의 offset 위치에서 count개의 값을 갖는 열을 복사 없이 읽습니다."""
+    size = struct.calcsize(fmt) * count
+    column = buffer[offset:offset + size]
+    if sys.byteorder == 'little':
+        return column.cast(fmt), offset + size
+    return struct.unpack(f'<{count}{fmt}', column), offset + size
+
+def _restore_lecture(values: Dict) -> Lecture:
+    """
+    이미 검증된 필드 값으로 Lecture 객체를 복원합니다.
+    model_construct보다 훨씬 빠른 pickle 복원 경로(__setstate__)를 사용합니다.
+    """
+    lecture = Lecture.__new__(Lecture)
+    lecture.__setstate__({'__dict__': values, '__pydantic_fields_set__': set(values)})
+    return lecture
+
+def write_snapshot(lectures: List[Lecture], source_digest: str, snapshot_path: str):
+    """
+    강의 목록을 스냅샷 파일로 저장합니다.
+    임시 파일에 먼저 쓴 뒤 교체하므로, 다른 프로세스가 반쯤 쓰인 파일을 읽지 않습니다.
+
+    :param lectures: 저장할 강의 목록
+    :param source_digest: 원본 CSV의 SHA-256 (16진수 문자열)
+    :param snapshot_path: 스냅샷 파일 경로
+    """
+    string_table: List[str] = []
+    string_index: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NONE_INDEX
+        if value not in string_index:
+            string_index[value] = len(string_table)
+            string_table.append(value)
+        return string_index[value]
+
+    field_columns = [
+        _typed_array('I', 4, (intern(getattr(lecture, field)) for lecture in lectures))
+        for field in STRING_FIELDS
+    ]
+
+    encoded = [value.encode('utf-8') for value in string_table]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+
+    parts = [
+        HEADER.pack(
+            MAGIC, FORMAT_VERSION, len(lectures), len(string_table), bytes.fromhex(source_digest),
+            lecture_schema_hash(),
+        ),
+        _to_little_endian(_typed_array('i', 4, (lecture.no for lecture in lectures))),
+        _to_little_endian(_typed_array('i', 4, (lecture.credits for lecture in lectures))),
+        _to_little_endian(_typed_array('Q', 8, (lecture.slot_mask & _LOW_64 for lecture in lectures))),
+        _to_little_endian(_typed_array('Q', 8, (lecture.slot_mask >> 64 for lecture in lectures))),
+    ]
+    parts.extend(_to_little_endian(column) for column in field_columns)
+    parts.append(_to_little_endian(_typed_array('I', 4, offsets)))
+    parts.append(b''.join(encoded))
+
+    temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(b''.join(parts))
+    os.replace(temp_path, snapshot_path)
+
+def load_snapshot(snapshot_path: str, expected_digest: Optional[str] = None) -> Optional[List[Lecture]]:
+    """
+    스냅샷 파일을 메모리 매핑하여 강의 목록을 복원합니다.
+    Pydantic 유효성 검사와 시간 문자열 파싱은 스냅샷을 만들 때 이미 끝났으므로 건너뜁니다.
+
+    :param snapshot_path: 스냅샷 파일 경로
+    :param expected_digest: 원본 CSV의 SHA-256. 주어지면 스냅샷의 값과 다를 때 오래된 스냅샷으로 간주합니다.
+    :return: 강의 목록. 파일이 없거나, 손상되었거나, 오래된 경우(원본 CSV 또는 Lecture 스키마가 바뀐 경우) None
+    """
+    try:
+        with open(snapshot_path, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                buffer = memoryview(mapped)
+                try:
+                    return _decode_snapshot(buffer, expected_digest)
+                finally:
+                    buffer.release()
+    except (OSError, ValueError, struct.error, UnicodeDecodeError, KeyError, TypeError) as e:
+        print(f"스냅샷을 읽을 수 없어 CSV를 사용합니다 ({snapshot_path}): {e}")
+        return None
+
+def _decode_snapshot(buffer: memoryview, expected_digest: Optional[str]) -> Optional[List[Lecture]]:
+    magic, version, count, string_count, digest, schema_hash = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION or schema_hash != lecture_schema_hash():
+        return None
+    if expected_digest is not None and digest.hex() != expected_digest:
+        return None
+
+    offset = HEADER.size
+    columns = []
+    try:
+        for fmt in ('i', 'i', 'Q', 'Q') + ('I',) * len(STRING_FIELDS):
+            column, offset = _column(buffer, offset, fmt, count)
+            columns.append(column)
+        string_offsets, offset = _column(buffer, offset, 'I', string_count + 1)
+        columns.append(string_offsets)
+
+        blob = bytes(buffer[offset:offset + string_offsets[string_count]])
+        strings = [
+            blob[string_offsets[i]:string_offsets[i + 1]].decode('utf-8')
+            for i in range(string_count)
+        ]
+
+        # 행 단위가 아닌 열 단위로 값을 만든 뒤 한 번에 묶어서 객체를 복원
+        values_by_field = {
+            field: [strings[index] if index != NONE_INDEX else None for index in column]
+            for field, column in zip(STRING_FIELDS, columns[4:4 + len(STRING_FIELDS)])
+        }
+        values_by_field['no'] = list(columns[0])
+        values_by_field['credits'] = list(columns[1])
+        values_by_field['slot_mask'] = [low | (high << 64) for low, high in zip(columns[2], columns[3])]
+
+        field_names = tuple(Lecture.model_fields)
+        lectures = [
+            _restore_lecture(dict(zip(field_names, row)))
+            for row in zip(*(values_by_field[name] for name in field_names))
+        ]
+        return lectures
+    finally:
+        # mmap을 닫기 전에 열 배열이 참조하는 memoryview를 모두 해제
+        for column in columns:
+            if isinstance(column, memoryview):
+                column.release()
+
+def default_snapshot_path(csv_path: str) -> str:
+    """CSV 파일 옆에 위치하는 기본 스냅샷 경로를 반환합니다. (예: 시간표.csv -> 시간표.snapshot)"""
+    return os.path.splitext(csv_path)[0] + '.snapshot'
+
+# --- 스냅샷 빌드 실행 블록 ---
+if __name__ == '__main__':
+    """
+    CSV를 스냅샷으로 컴파일합니다. CSV를 수정한 뒤 배포 전에 실행하세요.
+    사용법 (저장소 루트에서): python -m api.snapshot [CSV 경로]
+    """
+    from .data_loader import DEFAULT_CSV_PATH, load_lectures, compute_file_digest
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV_PATH
+    snapshot_path = default_snapshot_path(csv_path)
+
+    print("--- 카탈로그 스냅샷 빌드 시작 ---")
+    lectures = load_lectures(csv_path)
+    if not lectures:
+        print("실패: 강의 정보를 로드하지 못했습니다.")
+        sys.exit(1)
+
+    digest = compute_file_digest(csv_path)
+    write_snapshot(lectures, digest, snapshot_path)
+    restored = load_snapshot(snapshot_path, digest)
+
+    if restored is not None and [lec.model_dump() for lec in restored] == [lec.model_dump() for lec in lectures] \
+            and [lec.slot_mask for lec in restored] == [lec.slot_mask for lec in lectures]:
+        print(f"성공: {len(lectures)}개 강의 -> {snapshot_path} ({os.path.getsize(snapshot_path)} bytes)")
+    else:
+        print("실패: 스냅샷을 다시 읽은 결과가 CSV와 다릅니다.")
+        sys.exit(1)
+
+    print("--- 카탈로그 스냅샷 빌드 종료 ---")
@@ -0,0 +1,1040 @@
+import heapq
+import time
+from itertools import chain, count, product
+from typing import Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from .models import Lecture, UserPreferences, ScoringWeights, SearchConstraints
+from .data_loader import get_catalog
+from .scoring import (
+    ScoreAggregates, ScoreState, EMPTY_AGGREGATES,
+    add_lecture, score_from_aggregates, score_upper_bound,
+)
+from .utils import periods_mask, day_names_to_mask, MORNING_MASK, AFTERNOON_MASK
+
+def forbidden_slot_mask(preferences: UserPreferences) -> int:
+    """
+    rank_combinations의 하드 필터(공강 요일, 회피 교시, 오전/오후 회피 및 선호)를
+    '조합에 포함되면 안 되는 슬롯' 마스크 하나로 합칩니다.
+    """
+    mask = day_names_to_mask(preferences.no_class_days)
+    mask |= periods_mask(preferences.avoid_periods or [])
+    if preferences.avoid_morning or preferences.prefer_afternoon:
+        mask |= MORNING_MASK
+    if preferences.avoid_afternoon or preferences.prefer_morning:
+        mask |= AFTERNOON_MASK
+    return mask
+
+def compile_constraints(preferences: UserPreferences, weights: ScoringWeights) -> SearchConstraints:
+    """
+    사용자 선호도와 가중치를 탐색 중에 검사할 제약 조건으로 컴파일합니다.
+    (금지 슬롯 마스크, 학점 상한, 필수 포함 강의)
+    """
+    return SearchConstraints(
+        forbidden_mask=forbidden_slot_mask(preferences),
+        credit_limit=weights.credit_limit,
+        required_lecture_nos=frozenset(preferences.must_include_lectures or []),
+    )
+
+def group_by_course(lectures: List[Lecture]) -> List[List[Lecture]]:
+    """강의들을 교과번호별 그룹으로 묶습니다. (등장 순서 유지)"""
+    course_groups: Dict[str, List[Lecture]] = {}
+    for lec in lectures:
+        course_groups.setdefault(lec.course_id, []).append(lec)
+    return list(course_groups.values())
+
+class SectionClass(NamedTuple):
+    """
+    같은 교과목 안에서 수업 시간(슬롯 마스크)과 학점이 같은 분반들의 동치류.
+    시간표 관점에서 구분되지 않으므로 탐색은 대표 강의 하나로만 하고,
+    결과를 내보낼 때 expand_classes로 실제 분반 조합으로 펼칩니다.
+    """
+    index: int # 경로 인덱스 (동치류에서 가장 앞선 분반의 원래 인덱스)
+    lectures: List[Lecture]
+
+    @property
+    def representative(self) -> Lecture:
+        return self.lectures[0]
+
+def _section_key(lec: Lecture) -> Tuple[int, int]:
+    return lec.slot_mask, lec.credits
+
+def group_section_classes(
+    candidates: List[Tuple[int, Lecture]],
+    key: Callable[[Lecture], Hashable] = _section_key,
+) -> List[SectionClass]:
+    """(원래 분반 인덱스, 강의) 목록을 key가 같은 분반끼리 묶습니다. (처음 등장한 순서 유지)"""
+    classes: Dict[Hashable, SectionClass] = {}
+    for index, lec in candidates:
+        section_key = key(lec)
+        if section_key in classes:
+            classes[section_key].lectures.append(lec)
+        else:
+            classes[section_key] = SectionClass(index, [lec])
+    return list(classes.values())
+
+def expand_classes(classes: Sequence[SectionClass]) -> Iterator[List[Lecture]]:
+    """동치류 조합을 실제 분반 조합으로 펼칩니다. (필요한 만큼만 생성되는 지연 이터레이터)"""
+    for lectures in product(*(section_class.lectures for section_class in classes)):
+        yield list(lectures)
+
+class SearchGroup(NamedTuple):
+    """
+    탐색 단위가 되는 교과목 그룹.
+    candidates는 제약을 통과한 (원래 분반 인덱스, 강의) 목록, classes는 이를 동치류로 묶은 목록이며,
+    skip_index는 이 그룹을 건너뛰는 선택의 경로 인덱스(모든 분반 인덱스보다 큼)입니다.
+    """
+    candidates: List[Tuple[int, Lecture]]
+    classes: List[SectionClass]
+    skip_index: int
+    required: bool
+
+def build_search_groups(
+    selected_lecture_nos: List[int],
+    constraints: SearchConstraints,
+    stats: Optional['SearchStats'] = None,
+) -> Optional[List[SearchGroup]]:
+    """
+    선택된 강의들을 교과목 그룹으로 묶고, 제약을 위반하는 분반을 미리 제거합니다.
+    필수 포함 강의는 선택 목록에 없어도 추가되며, 해당 교과목 그룹은 건너뛸 수 없고
+    지정된 분반 중에서만 고를 수 있습니다.
+
+    :param stats: 주어지면 제외한 분반 수를 stats.preference_prunes에 더합니다.
+    :return: 탐색 그룹 목록. 필수 교과목을 만족할 수 있는 분반이 하나도 없으면 None
+    """
+    required_nos = constraints.required_lecture_nos
+    credit_limit = constraints.credit_limit
+    lecture_nos = list(selected_lecture_nos) + sorted(required_nos)
+
+    groups: List[SearchGroup] = []
+    for group in group_by_course(get_catalog().get_lectures(lecture_nos)):
+        required = any(lec.no in required_nos for lec in group)
+        candidates = [
+            (index, lec) for index, lec in enumerate(group)
+            if (not required or lec.no in required_nos)
+            and not lec.slot_mask & constraints.forbidden_mask
+            and (credit_limit is None or lec.credits <= credit_limit)
+        ]
+        if stats is not None:
+            stats.preference_prunes += len(group) - len(candidates)
+        if required and not candidates:
+            return None
+        groups.append(SearchGroup(candidates, group_section_classes(candidates), len(group), required))
+    return groups
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """비트셋에서 켜진 비트의 위치를 작은 것부터 반환합니다."""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+class SearchStats:
+    """
+    탐색 통계. 탐색 함수에 넘기면 방문한 노드 수와 가지치기 횟수를 누적합니다.
+    """
+
+    def __init__(self):
+        self.nodes = 0 # 방문한 탐색 노드 수
+        self.conflict_prunes = 0 # 전방 검사로 도메인에서 제거된 동치류 수 (시간 충돌)
+        self.credit_prunes = 0 # 학점 상한 때문에 시도하지 않은 선택지 수
+        self.dead_ends = 0 # 필수 그룹의 도메인이 비어 잘라낸 가지 수
+        # 선호도 제약(금지 시간대, 학점 상한, 필수 포함) 때문에 후보에서 미리 제외한 분반 수.
+        # 완화 탐색에서는 더 많은 조건을 어기게 되어 잘라낸 가지 수입니다.
+        self.preference_prunes = 0
+        self.combinations = 0 # 내보낸 조합 수
+        self.cap_hit = False # 조합 개수 제한에 도달했는지 여부
+        self.timed_out = False # 시간 예산이 끝나 탐색을 중단했는지 여부
+        # 탐색을 마친 부분의 비율(0~1). 각 노드의 몫을 자식 선택지 수로 균등하게 나눠,
+        # 끝까지 탐색했거나 잘라낸 가지의 몫을 더한 값입니다.
+        self.coverage = 0.0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+    def merge(self, other: 'SearchStats'):
+        """
+        같은 선택을 나눠 탐색한 다른 통계(병렬 탐색의 작업 단위 등)를 더합니다.
+        조합 수와 개수 제한 도달 여부는 결과를 합치는 쪽에서 정하므로 더하지 않습니다.
+        """
+        self.nodes += other.nodes
+        self.conflict_prunes += other.conflict_prunes
+        self.credit_prunes += other.credit_prunes
+        self.dead_ends += other.dead_ends
+        # 후보 제외는 탐색 전에 선택 전체에 대해 한 번 하는 일이므로, 단위마다 같은 값이 나옴
+        self.preference_prunes = max(self.preference_prunes, other.preference_prunes)
+        self.timed_out |= other.timed_out
+        self.coverage += other.coverage
+
+class Deadline:
+    """
+    탐색 시간 예산. 노드마다 시계를 읽지 않도록 CHECK_INTERVAL번에 한 번만 현재 시각을 확인합니다.
+    time_budget_ms가 None이면 만료되지 않습니다.
+    """
+    CHECK_INTERVAL = 64
+
+    def __init__(self, time_budget_ms: Optional[float] = None):
+        self.expires_at = None if time_budget_ms is None else time.monotonic() + time_budget_ms / 1000
+        self.expired = False
+        self._checks = 0
+
+    def check(self) -> bool:
+        if self.expires_at is None or self.expired:
+            return self.expired
+        self._checks += 1
+        if self._checks % self.CHECK_INTERVAL == 1:
+            self.expired = time.monotonic() >= self.expires_at
+        return self.expired
+
+    def remaining_ms(self) -> Optional[float]:
+        """남은 시간(ms). 예산이 없으면 None, 이미 지났으면 0입니다. 이어서 실행하는 탐색의 예산으로 넘깁니다."""
+        if self.expires_at is None:
+            return None
+        return max((self.expires_at - time.monotonic()) * 1000, 0.0)
+
+class ConflictGraph:
+    """
+    탐색 그룹들의 분반 동치류 사이의 시간 충돌 그래프.
+
+    모든 동치류에 요청 안에서 유일한 번호를 매기고, 각 동치류와 충돌하는 동치류 집합을
+    정수 비트셋(인접 비트셋)으로 미리 계산합니다. 그룹별 도메인(아직 고를 수 있는 동치류 집합)도
+    같은 비트셋으로 표현하므로, 강의를 하나 놓을 때의 전방 검사는 그룹마다 AND 한 번이면 됩니다.
+    """
+
+    def __init__(self, groups: List[SearchGroup]):
+        self.groups = groups
+        self.classes: List[SectionClass] = []
+        self.domains: List[int] = [] # 그룹별 초기 도메인
+        for group in groups:
+            domain = 0
+            for section_class in group.classes:
+                domain |= 1 << len(self.classes)
+                self.classes.append(section_class)
+            self.domains.append(domain)
+
+        # 슬롯별로 그 슬롯을 쓰는 동치류 비트셋을 만든 뒤, 동치류가 쓰는 슬롯들의 비트셋을 합칩니다.
+        slot_users: Dict[int, int] = {}
+        for class_id, section_class in enumerate(self.classes):
+            for slot in iter_bits(section_class.representative.slot_mask):
+                slot_users[slot] = slot_users.get(slot, 0) | (1 << class_id)
+        self.conflicts: List[int] = []
+        for class_id, section_class in enumerate(self.classes):
+            neighbors = 0
+            for slot in iter_bits(section_class.representative.slot_mask):
+                neighbors |= slot_users[slot]
+            self.conflicts.append(neighbors & ~(1 << class_id))
+
+        self.required_min_credits = [
+            min(lec.credits for _, lec in group.candidates) if group.required else 0
+            for group in groups
+        ]
+        self.max_credits = [
+            max(max((lec.credits for _, lec in group.candidates), default=0), 0)
+            for group in groups
+        ]
+
+    def select_group(
+        self,
+        domains: Sequence[int],
+        unassigned: Tuple[int, ...],
+        dynamic_order: bool = True,
+    ) -> Tuple[Optional[int], Tuple[int, ...]]:
+        """
+        다음에 분기할 그룹을 고릅니다.
+        고를 수 있는 동치류가 가장 적은 그룹(가장 제약이 심한 그룹)을 먼저 고르고, 같으면 원래 순서를 따릅니다.
+        도메인이 빈 선택 그룹은 건너뛰는 것 외에 선택지가 없으므로 분기 없이 제외합니다.
+
+        :return: (고른 그룹 인덱스 또는 None(남은 그룹 없음), 나머지 미배정 그룹)
+        """
+        remaining = tuple(index for index in unassigned if domains[index] or self.groups[index].required)
+        if not remaining:
+            return None, ()
+        if dynamic_order:
+            selected = min(remaining, key=lambda index: (domains[index].bit_count(), index))
+        else:
+            selected = remaining[0]
+        return selected, tuple(index for index in remaining if index != selected)
+
+    def forward_check_relaxed(
+        self,
+        domains: Sequence[int],
+        unassigned: Tuple[int, ...],
+        class_id: int,
+        stats: SearchStats,
+    ) -> Tuple[List[int], bool]:
+        """
+        forward_check와 같이 도메인에서 충돌하는 동치류를 제거하되, 필수 그룹의 도메인이 비어도 멈추지 않습니다.
+        (필수 포함을 완화할 수 있는 완화 탐색에서 사용)
+
+        :return: (새 도메인 목록, 필수 그룹의 도메인이 새로 비었는지 여부)
+        """
+        conflicts = self.conflicts[class_id]
+        new_domains = list(domains)
+        emptied_required = False
+        for index in unassigned:
+            removed = domains[index] & conflicts
+            if removed:
+                stats.conflict_prunes += removed.bit_count()
+                reduced = domains[index] & ~conflicts
+                if not reduced and self.groups[index].required:
+                    emptied_required = True
+                new_domains[index] = reduced
+        return new_domains, emptied_required
+
+    def forward_check(
+        self,
+        domains: Sequence[int],
+        unassigned: Tuple[int, ...],
+        class_id: int,
+        stats: SearchStats,
+    ) -> Optional[List[int]]:
+        """
+        동치류 class_id를 놓았을 때 미배정 그룹들의 도메인에서 충돌하는 동치류를 제거합니다.
+
+        :return: 새 도메인 목록. 필수 그룹의 도메인이 비게 되면 None
+        """
+        conflicts = self.conflicts[class_id]
+        new_domains = list(domains)
+        for index in unassigned:
+            removed = domains[index] & conflicts
+            if removed:
+                stats.conflict_prunes += removed.bit_count()
+                reduced = domains[index] & ~conflicts
+                if not reduced and self.groups[index].required:
+                    return None
+                new_domains[index] = reduced
+        return new_domains
+
+def search_combinations(
+    selected_lecture_nos: List[int],
+    constraints: SearchConstraints,
+    max_combinations: int = 10000,
+    aggregates_out: Optional[List[ScoreAggregates]] = None,
+    stats: Optional[SearchStats] = None,
+    dynamic_order: bool = True,
+    prefix: Sequence[Optional[int]] = (),
+    prefixes_out: Optional[List[Tuple[Optional[int], ...]]] = None,
+    split_depth: int = 0,
+    time_budget_ms: Optional[float] = None,
+) -> List[List[Lecture]]:
+    """
+    제약 조건을 탐색 중에 적용하는 백트래킹으로 시간표 조합을 찾습니다.
+    각 교과목 그룹에서 분반 하나를 고르는 경우를 먼저, 건너뛰는 경우를 나중에 시도하며
+    (필수 그룹은 건너뛸 수 없음), 금지 슬롯·학점 상한·필수 포함 조건을 어기는 가지는
+    해당 강의를 놓는 시점에 바로 잘라냅니다.
+    시간과 학점이 같은 분반은 하나의 동치류로 탐색하고, 완성된 조합만 실제 분반으로 펼칩니다.
+
+    그룹은 ConflictGraph.select_group으로 고를 수 있는 분반이 가장 적은 것부터 동적으로 고르고,
+    강의를 놓을 때마다 남은 그룹들의 도메인에서 충돌하는 분반을 미리 제거(전방 검사)합니다.
+    결과 조합 안의 강의는 탐색 순서와 관계없이 교과목 그룹 순서로 담깁니다.
+
+    :param aggregates_out: 주어지면 탐색 중 ScoreState로 유지한 조합별 점수 집계값을
+                           결과와 같은 순서로 채웁니다. (rank_combinations에 그대로 전달 가능)
+    :param stats: 주어지면 탐색 통계를 누적합니다.
+    :param dynamic_order: False이면 그룹을 원래 순서대로 탐색합니다. (비교용)
+    :param prefix: 주어지면 앞쪽 분기에서 이 선택(동치류 번호, 건너뛰기는 None)만 따라가
+                   해당 하위 트리만 탐색합니다. (병렬 탐색의 작업 단위)
+    :param prefixes_out: 주어지면 조합을 만드는 대신 split_depth번째 분기까지의 선택 경로를
+                         탐색 순서대로 채웁니다. 각 경로를 prefix로 탐색한 결과를 이어 붙이면
+                         전체 탐색 결과와 같습니다.
+    :param time_budget_ms: 주어지면 이 시간이 지났을 때 탐색을 멈추고 그때까지 찾은 조합을 반환합니다.
+                           중단 여부와 탐색한 비율은 stats.timed_out, stats.coverage에 기록됩니다.
+    """
+    if stats is None:
+        stats = SearchStats()
+    groups = build_search_groups(selected_lecture_nos, constraints, stats)
+    if not groups:
+        stats.coverage = 1.0
+        return []
+
+    credit_limit = constraints.credit_limit
+    graph = ConflictGraph(groups)
+    required_min_credits = graph.required_min_credits
+    if credit_limit is not None and sum(required_min_credits) > credit_limit:
+        stats.coverage = 1.0
+        return []
+
+    deadline = Deadline(time_budget_ms)
+    all_combinations: List[List[Lecture]] = []
+    score_state = ScoreState() if aggregates_out is not None else None
+    # 그룹별로 고른 동치류 (건너뛴 그룹은 None)
+    chosen: List[Optional[SectionClass]] = [None] * len(groups)
+
+    def emit():
+        classes = [section_class for section_class in chosen if section_class is not None]
+        if not classes:
+            return
+        for combination in expand_classes(classes):
+            if should_stop():
+                break
+            all_combinations.append(combination)
+            if score_state is not None:
+                aggregates_out.append(score_state.aggregates)
+        stats.combinations = len(all_combinations)
+
+    # 지금까지 내린 분기 선택 (동치류 번호, 건너뛰기는 None)
+    path: List[Optional[int]] = []
+
+    def should_stop() -> bool:
+        """최대 조합 개수에 도달했거나 시간 예산이 끝났는지 확인합니다."""
+        if len(all_combinations) >= max_combinations:
+            stats.cap_hit = True
+            return True
+        if deadline.check():
+            stats.timed_out = True
+            return True
+        return False
+
+    def backtrack(domains: List[int], unassigned: Tuple[int, ...], credits: int, required_credits: int,
+                  weight: float):
+        # 최대 조합 개수나 시간 예산 도달 시, 더 이상의 재귀를 막기 위해 함수 맨 위에서 확인
+        if should_stop():
+            return
+        stats.nodes += 1
+
+        group_index, rest = graph.select_group(domains, unassigned, dynamic_order)
+        if prefixes_out is not None and (group_index is None or len(path) == split_depth):
+            prefixes_out.append(tuple(path))
+            return
+        # 모든 그룹을 다 고려한 경우, 현재 조합을 실제 분반으로 펼쳐 최종 결과에 추가
+        if group_index is None:
+            emit()
+            if not stats.cap_hit and not stats.timed_out:
+                stats.coverage += weight
+            return
+        # prefix를 따라가는 중이면 지정된 선택만 시도
+        forced = len(path) < len(prefix)
+        forced_choice = prefix[len(path)] if forced else None
+
+        group = groups[group_index]
+        rest_required_credits = required_credits - required_min_credits[group_index]
+        # 이 노드의 몫을 자식 선택지(동치류들과 건너뛰기)에 균등하게 나눔
+        child_weight = weight / max(domains[group_index].bit_count() + (0 if group.required else 1), 1)
+        # 1. 현재 그룹의 각 과목(분반 동치류)을 포함하는 경우를 먼저 시도 (학점 높은 조합 우선 탐색)
+        for class_id in iter_bits(domains[group_index]):
+            # 루프 중간에도 최대 조합 개수와 시간 예산을 확인하여 불필요한 계산 방지
+            if should_stop():
+                return
+
+            if forced and class_id != forced_choice:
+                continue
+            section_class = graph.classes[class_id]
+            lecture_to_add = section_class.representative
+            new_credits = credits + lecture_to_add.credits
+            if credit_limit is not None and new_credits + rest_required_credits > credit_limit:
+                stats.credit_prunes += 1
+                stats.coverage += child_weight
+                continue # 남은 필수 과목까지 넣으면 학점 상한 초과
+            new_domains = graph.forward_check(domains, rest, class_id, stats)
+            if new_domains is None:
+                stats.dead_ends += 1
+                stats.coverage += child_weight
+                continue # 남은 필수 과목을 놓을 자리가 없음
+
+            chosen[group_index] = section_class
+            path.append(class_id)
+            if score_state is not None:
+                score_state.push(lecture_to_add)
+            backtrack(new_domains, rest, new_credits, rest_required_credits, child_weight)
+            if score_state is not None:
+                score_state.pop()
+            path.pop()
+            chosen[group_index] = None
+
+        # 2. 현재 그룹의 과목을 포함하지 않고 다음 그룹으로 넘어가는 경우 (필수 그룹 제외)
+        if not group.required and (not forced or forced_choice is None):
+            path.append(None)
+            backtrack(domains, rest, credits, rest_required_credits, child_weight)
+            path.pop()
+
+    backtrack(list(graph.domains), tuple(range(len(groups))), 0, sum(required_min_credits), 1.0)
+    return all_combinations
+
+def iter_top_combinations(
+    selected_lecture_nos: List[int],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    top_k: int = 10,
+    time_budget_ms: Optional[float] = None,
+    stats: Optional[SearchStats] = None,
+    relaxed_out: Optional[List[str]] = None,
+) -> Iterator[List[Lecture]]:
+    """
+    점수 상한을 이용한 최선 우선(best-first) 분기 한정 탐색으로 상위 top_k개의 시간표를 찾습니다.
+
+    모든 조합을 만든 뒤 rank_combinations로 정렬하는 대신, 부분 시간표에서 도달 가능한
+    점수의 상한이 가장 높은 가지부터 확장합니다. 완성된 시간표가 꺼내지는 순간 남은 어떤 가지도
+    그보다 높은 점수를 낼 수 없으므로, top_k개를 꺼내면 즉시 탐색을 멈춥니다.
+
+    하드 필터와 필수 포함 강의는 compile_constraints와 같은 조건으로 탐색 중에 적용되며,
+    조건을 모두 만족하는 조합이 있으면 결과 순서는 조합 개수 제한 없이
+    find_combinations_with_preferences + rank_combinations를 실행했을 때의 상위 top_k개와 같습니다.
+    (동점이면 search_combinations와 같은 동적 그룹 순서의 탐색 순서, 같은 동치류 안에서는 분반 순서를 따릅니다.)
+
+    조건을 어기는 선택지(금지 슬롯의 분반, 학점 상한 초과, 필수 포함 교과목의 다른 분반이나 건너뛰기)는
+    버리지 않고 한쪽에 미뤄 둡니다. 조건을 모두 만족하는 조합이 하나도 없다는 것이 확인되면,
+    같은 탐색을 이어서 미뤄 둔 가지를 (완화 비용, 점수 상한) 순서로 확장하므로 search_with_relaxation과 같이
+    가장 적은 조건만 완화한 조합 중 상위 top_k개를 찾습니다. 완화한 조건 목록은 relaxed_out에 채워지며,
+    완화된 조합의 점수는 relax_preferences로 완화한 조건을 제외하고 계산합니다. (동점 순서는 다를 수 있음)
+
+    time_budget_ms가 지나면 그때까지 확정된 결과 뒤에, 힙에 남아 있는 완성 조합을 점수순으로
+    채워 반환합니다. 조건을 모두 만족하는 가지를 탐색하던 중이었다면 상한이 높은 미완성 가지를
+    탐욕적으로 완성해 더 채웁니다. (이 경우 순서는 근사이며 stats.timed_out이 기록됩니다.)
+
+    시간표는 순위가 확정되는 즉시 순서대로 하나씩 반환되므로, 스트리밍 응답에서 첫 결과를
+    전체 탐색이 끝나기 전에 보낼 수 있습니다. 목록이 필요하면 find_top_combinations를 사용하세요.
+    """
+    if stats is None:
+        stats = SearchStats()
+    if top_k <= 0:
+        stats.coverage = 1.0
+        return
+
+    slot_masks = constraint_slot_masks(preferences)
+    required_nos = frozenset(preferences.must_include_lectures or [])
+    credit_limit = weights.credit_limit
+    groups = build_search_groups(list(selected_lecture_nos) + sorted(required_nos), SearchConstraints())
+    if not groups:
+        stats.coverage = 1.0
+        return
+
+    # 그룹별 분반 동치류와 동치류별 위반 비트 (search_with_relaxation과 같은 방식)
+    # strict_bits는 그룹별로 조건을 모두 지키는 동치류의 비트셋이며, 조건을 지키는 탐색은 이 동치류들만 확장합니다.
+    relaxed_groups: List[SearchGroup] = []
+    class_violations: List[int] = []
+    strict_bits: List[int] = []
+    strict_min_credits: List[int] = []
+    strict_max_credits: List[int] = []
+    for group in groups:
+        required = any(lec.no in required_nos for _, lec in group.candidates)
+
+        def lecture_violations(lec: Lecture) -> int:
+            violations = 0
+            for name, mask in slot_masks.items():
+                if lec.slot_mask & mask:
+                    violations |= _CONSTRAINT_BIT[name]
+            if required and lec.no not in required_nos:
+                violations |= _CONSTRAINT_BIT['must_include_lectures']
+            return violations
+
+        classes = group_section_classes(
+            group.candidates, key=lambda lec: (lec.slot_mask, lec.credits, lecture_violations(lec)))
+        relaxed_groups.append(SearchGroup(group.candidates, classes, group.skip_index, required))
+        bits = 0
+        strict_credits = []
+        for section_class in classes:
+            lec = section_class.representative
+            violations = lecture_violations(lec)
+            if not violations and (credit_limit is None or lec.credits <= credit_limit):
+                bits |= 1 << len(class_violations)
+                strict_credits.append(lec.credits)
+            else:
+                stats.preference_prunes += len(section_class.lectures)
+            class_violations.append(violations)
+        strict_bits.append(bits)
+        strict_min_credits.append(min(strict_credits, default=0) if required else 0)
+        strict_max_credits.append(max(strict_credits, default=0))
+    graph = ConflictGraph(relaxed_groups)
+    deadline = Deadline(time_budget_ms)
+    credit_bit = _CONSTRAINT_BIT['credit_limit']
+    must_include_bit = _CONSTRAINT_BIT['must_include_lectures']
+
+    # 위반 집합별 (완화한 선호도, 가중치) (완화된 조합의 점수와 상한 계산용)
+    relaxed_scoring: Dict[int, Tuple[UserPreferences, ScoringWeights]] = {0: (preferences, weights)}
+
+    def scoring_for(violations: int) -> Tuple[UserPreferences, ScoringWeights]:
+        if violations not in relaxed_scoring:
+            names = [name for name in RELAXABLE_CONSTRAINTS if violations & _CONSTRAINT_BIT[name]]
+            relaxed_scoring[violations] = relax_preferences(preferences, weights, names)
+        return relaxed_scoring[violations]
+
+    def bound(aggregates: ScoreAggregates, unassigned: Tuple[int, ...], violations: int, strict: bool) -> float:
+        # 남은 그룹에서 추가로 얻을 수 있는 최대 학점으로 상한 계산
+        max_credits = strict_max_credits if strict else graph.max_credits
+        max_additional_credits = sum(max_credits[index] for index in unassigned)
+        return score_upper_bound(aggregates, max_additional_credits, *scoring_for(violations))
+
+    # 노드 상태: (경로, 고른 (그룹 인덱스, 동치류) 튜플, 점수 집계값, 그룹별 도메인, 미배정 그룹,
+    #            남은 필수 최소 학점, 탐색 트리에서의 몫, 위반 비트)
+    # 힙 원소: (완화 비용, -점수 상한, 경로, 완성 여부, 순번, 노드 상태)
+    # 경로는 각 노드에서 고른 동치류의 대표 분반 인덱스(건너뛰기는 그룹 크기)의 튜플로,
+    # 그룹 선택 규칙이 search_combinations와 같으므로 사전순이 그 탐색 순서와 같아 동점일 때의 순서를 결정합니다.
+    all_groups = tuple(range(len(groups)))
+    root = ((), (), EMPTY_AGGREGATES, graph.domains, all_groups, sum(strict_min_credits), 1.0, 0)
+    heap = [((0, 0), -bound(EMPTY_AGGREGATES, all_groups, 0, True), (), False, 0, root)]
+    sequence = count(1)
+    # 조건을 어기는 선택지: ('node', 상태) 또는 ('class', 상태, 그룹 인덱스, 동치류 번호) 또는 ('skip', 상태, 그룹 인덱스)
+    deferred: List[Tuple] = []
+    relaxing = False
+    best_violations: Optional[int] = None
+    result_count = 0
+
+    def push(state: Tuple, is_complete: bool = False, score: Optional[float] = None):
+        path, _, aggregates, _, unassigned, _, _, violations = state
+        if score is None:
+            score = bound(aggregates, unassigned, violations, not relaxing)
+        heapq.heappush(heap, (_relaxation_cost(violations), -score, path, is_complete, next(sequence), state))
+
+    def strict_child(state: Tuple, group_index: int, rest: Tuple[int, ...], class_id: int,
+                     required_credits: int) -> Optional[Tuple]:
+        """조건을 지키는 동치류를 놓은 자식 상태. 남은 필수 교과목을 조건을 지키며 놓을 수 없으면 None"""
+        path, chosen, aggregates, domains, _, _, weight, violations = state
+        section_class = graph.classes[class_id]
+        lec = section_class.representative
+        if credit_limit is not None and aggregates.credits + lec.credits + required_credits > credit_limit:
+            stats.credit_prunes += 1
+            return None
+        new_domains, _ = graph.forward_check_relaxed(domains, rest, class_id, stats)
+        if any(relaxed_groups[index].required and not new_domains[index] & strict_bits[index] for index in rest):
+            stats.dead_ends += 1
+            return None
+        return (path + (section_class.index,), chosen + ((group_index, section_class),),
+                add_lecture(aggregates, lec), new_domains, rest, required_credits, weight, violations)
+
+    def strict_select(state: Tuple) -> Tuple[Optional[int], Tuple[int, ...], List[int]]:
+        """
+        조건을 지키는 탐색에서 다음에 분기할 그룹을 고릅니다. (search_combinations와 같은 규칙)
+        조건을 지키는 동치류가 없는 선택 그룹은 건너뛰는 것으로 처리하고 그 그룹들을 함께 반환합니다.
+
+        :return: (고른 그룹 인덱스 또는 None(남은 그룹 없음) 또는 -1(필수 그룹을 조건대로 놓을 수 없음),
+                  나머지 미배정 그룹, 건너뛴 그룹)
+        """
+        domains, unassigned = state[3], state[4]
+        remaining, skipped = [], []
+        for index in unassigned:
+            if domains[index] & strict_bits[index]:
+                remaining.append(index)
+            elif relaxed_groups[index].required:
+                return -1, (), skipped
+            elif domains[index]:
+                skipped.append(index)
+        if not remaining:
+            return None, (), skipped
+        selected = min(remaining, key=lambda index: ((domains[index] & strict_bits[index]).bit_count(), index))
+        return selected, tuple(index for index in remaining if index != selected), skipped
+
+    def expand_strict(state: Tuple):
+        """조건을 모두 지키는 가지를 확장하고, 조건을 어기는 선택지는 deferred에 미룹니다."""
+        path, chosen, aggregates, domains, unassigned, required_credits, weight, violations = state
+        group_index, rest, skipped = strict_select(state)
+        # 건너뛴 그룹의 (조건을 어기는) 동치류는, 그 앞의 건너뛴 그룹들을 건너뛴 상태에서 고르는 가지로 미룸
+        for position, index in enumerate(skipped):
+            later = tuple(other for other in unassigned if other != index and other not in skipped[:position])
+            skipped_state = (path, chosen, aggregates, domains, later, required_credits, 0.0, violations)
+            deferred.extend(('class', skipped_state, index, class_id) for class_id in iter_bits(domains[index]))
+        unassigned = tuple(index for index in unassigned if index not in skipped)
+        state = (path, chosen, aggregates, domains, unassigned, required_credits, weight, violations)
+        if group_index == -1:
+            deferred.append(('node', state))
+            stats.dead_ends += 1
+            stats.coverage += weight
+            return
+        if group_index is None:
+            if chosen:
+                push(state, True, score_from_aggregates(aggregates, preferences, weights))
+            stats.coverage += weight
+            return
+
+        group = relaxed_groups[group_index]
+        rest_required_credits = required_credits - strict_min_credits[group_index]
+        domain = domains[group_index]
+        # 이 노드의 몫을 조건을 지키는 자식 선택지(동치류들과 건너뛰기)에 균등하게 나눔
+        child_weight = weight / max((domain & strict_bits[group_index]).bit_count() + (0 if group.required else 1), 1)
+        for class_id in iter_bits(domain):
+            if not strict_bits[group_index] >> class_id & 1:
+                deferred.append(('class', (*state[:4], rest, rest_required_credits, 0.0, violations),
+                                 group_index, class_id))
+                continue
+            child = strict_child((*state[:6], child_weight, violations), group_index, rest, class_id,
+                                 rest_required_credits)
+            if child is None:
+                stats.coverage += child_weight
+                deferred.append(('class', (*state[:4], rest, rest_required_credits, 0.0, violations),
+                                 group_index, class_id))
+                continue
+            push(child)
+
+        # 현재 그룹을 건너뛰는 경우 (필수 그룹은 필수 포함 조건을 어기므로 미룸)
+        skip_state = (path + (group.skip_index,), chosen, aggregates, domains, rest, rest_required_credits,
+                      child_weight, violations)
+        if group.required:
+            deferred.append(('skip', skip_state, group_index))
+        else:
+            push(skip_state)
+
+    def relaxed_child(state: Tuple, group_index: int, class_id: Optional[int], weight: float) -> Tuple:
+        """완화 탐색에서 그룹 group_index에 동치류 class_id를 놓거나(None이면 건너뛰기) 만든 자식 상태"""
+        path, chosen, aggregates, domains, rest, required_credits, _, violations = state
+        group = relaxed_groups[group_index]
+        if class_id is None:
+            if group.required:
+                violations |= must_include_bit
+            return (path + (group.skip_index,), chosen, aggregates, domains, rest, required_credits, weight, violations)
+        section_class = graph.classes[class_id]
+        lec = section_class.representative
+        violations |= class_violations[class_id]
+        if credit_limit is not None and aggregates.credits + lec.credits > credit_limit:
+            violations |= credit_bit
+        new_domains, emptied_required = graph.forward_check_relaxed(domains, rest, class_id, stats)
+        if emptied_required:
+            violations |= must_include_bit
+        return (path + (section_class.index,), chosen + ((group_index, section_class),),
+                add_lecture(aggregates, lec), new_domains, rest, required_credits, weight, violations)
+
+    def push_relaxed(state: Tuple):
+        """완화 비용이 지금까지 찾은 결과보다 크지 않은 가지만 힙에 넣습니다."""
+        violations = state[7]
+        if best_violations is not None and _relaxation_cost(violations) > _relaxation_cost(best_violations):
+            stats.preference_prunes += 1
+            stats.coverage += state[6]
+            return
+        push(state)
+
+    def expand_relaxed(state: Tuple):
+        path, chosen, aggregates, domains, unassigned, required_credits, weight, violations = state
+        group_index, rest = graph.select_group(domains, unassigned)
+        if group_index is None:
+            if chosen:
+                push(state, True, score_from_aggregates(aggregates, *scoring_for(violations)))
+            stats.coverage += weight
+            return
+        child_weight = weight / (domains[group_index].bit_count() + 1)
+        base = (*state[:4], rest, required_credits, weight, violations)
+        for class_id in iter_bits(domains[group_index]):
+            push_relaxed(relaxed_child(base, group_index, class_id, child_weight))
+        push_relaxed(relaxed_child(base, group_index, None, child_weight))
+
+    def start_relaxing():
+        """조건을 모두 지키는 조합이 없으므로, 미뤄 둔 가지를 완화 비용 순서로 확장하기 시작합니다."""
+        nonlocal relaxing
+        relaxing = True
+        for item in deferred:
+            if item[0] == 'node':
+                push(item[1])
+            elif item[0] == 'skip':
+                push(relaxed_child(item[1], item[2], None, item[1][6]))
+            else:
+                push(relaxed_child(item[1], item[2], item[3], item[1][6]))
+        deferred.clear()
+
+    def complete_greedily(state: Tuple) -> Optional[Tuple[Tuple[int, SectionClass], ...]]:
+        """조건을 지키는 미완성 가지를 각 단계에서 상한이 가장 높은 선택지만 따라 완성합니다. (시간 예산 초과 시 사용)"""
+        while True:
+            group_index, rest, skipped = strict_select(state)
+            if group_index == -1:
+                return None
+            if group_index is None:
+                return state[1]
+            group = relaxed_groups[group_index]
+            rest_required_credits = state[5] - strict_min_credits[group_index]
+            # (상한, 다음 상태) 중 상한이 가장 높은 것, 같으면 먼저 나온 것
+            best_choice = None
+            if not group.required:
+                skip_state = (*state[:4], rest, rest_required_credits, 0.0, 0)
+                best_choice = (bound(state[2], rest, 0, True), skip_state)
+            for class_id in iter_bits(state[3][group_index] & strict_bits[group_index]):
+                child = strict_child(state, group_index, rest, class_id, rest_required_credits)
+                if child is None:
+                    continue
+                choice_bound = bound(child[2], rest, 0, True)
+                if best_choice is None or choice_bound > best_choice[0]:
+                    best_choice = (choice_bound, child)
+            if best_choice is None:
+                return None
+            state = best_choice[1]
+
+    def expand_results(chosen: Tuple[Tuple[int, SectionClass], ...]) -> Iterator[List[Lecture]]:
+        # 동치류 조합은 점수가 모두 같으므로 필요한 개수만큼만 펼침
+        classes = [section_class for _, section_class in sorted(chosen, key=lambda item: item[0])]
+        for combination in expand_classes(classes):
+            if result_count >= top_k:
+                break
+            yield combination
+
+    def accept(violations: int) -> bool:
+        """결과의 위반 집합을 확정합니다. 이미 확정된 결과보다 더 완화한 결과이면 False"""
+        nonlocal best_violations
+        if best_violations is None:
+            best_violations = violations
+            if relaxed_out is not None:
+                relaxed_out[:] = [name for name in RELAXABLE_CONSTRAINTS if violations & _CONSTRAINT_BIT[name]]
+        return violations == best_violations
+
+    while result_count < top_k:
+        if not heap:
+            # 조건을 모두 지키는 가지를 다 확장했는데 결과가 없으면 미뤄 둔 가지로 이어서 탐색
+            if not relaxing and result_count == 0 and deferred:
+                start_relaxing()
+                continue
+            break
+        if deadline.check():
+            stats.timed_out = True
+            break
+        cost, _, _, is_complete, _, state = heapq.heappop(heap)
+        if best_violations is not None and cost > _relaxation_cost(best_violations):
+            # 남은 가지는 모두 더 많이 완화해야 하므로 탐색 종료
+            heap.clear()
+            break
+        stats.nodes += 1
+
+        if is_complete:
+            accept(state[7])
+            for combination in expand_results(state[1]):
+                result_count += 1
+                yield combination
+            continue
+        if relaxing:
+            expand_relaxed(state)
+        else:
+            expand_strict(state)
+
+    if stats.timed_out:
+        # 시간 예산 초과: 아직 확정되지 않은 완성 조합 중 (완화 비용, 점수)가 좋은 것으로 채우고,
+        # 조건을 지키는 가지를 탐색하던 중이었으면 상한이 높은 미완성 가지부터 탐욕적으로 완성해 채움
+        entries = sorted(heap, key=lambda entry: entry[:5])
+        fallback = ((entry[5][1], entry[5][7]) for entry in entries if entry[3])
+        greedy = () if relaxing else (
+            (complete_greedily(entry[5]), 0) for entry in entries if not entry[3])
+        for chosen, violations in chain(fallback, greedy):
+            if result_count >= top_k:
+                break
+            if not chosen or not accept(violations):
+                continue
+            for combination in expand_results(chosen):
+                result_count += 1
+                yield combination
+    else:
+        # 남은 가지는 점수 상한이나 완화 비용으로 배제되었으므로 탐색을 마친 것으로 봄
+        stats.coverage = 1.0
+    stats.combinations = result_count
+
+def find_top_combinations(
+    selected_lecture_nos: List[int],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    top_k: int = 10,
+    time_budget_ms: Optional[float] = None,
+    stats: Optional[SearchStats] = None,
+    relaxed_out: Optional[List[str]] = None,
+) -> List[List[Lecture]]:
+    """
+    점수 상한을 이용한 분기 한정 탐색으로 상위 top_k개의 시간표를 찾습니다.
+    iter_top_combinations의 결과를 목록으로 모은 것입니다.
+    """
+    return list(iter_top_combinations(
+        selected_lecture_nos, preferences, weights, top_k, time_budget_ms, stats, relaxed_out,
+    ))
+
+# 결과가 없을 때 완화할 수 있는 선호 조건. 앞쪽일수록 먼저(쉽게) 완화합니다.
+RELAXABLE_CONSTRAINTS = [
+    'prefer_morning', 'prefer_afternoon', 'avoid_periods', 'avoid_morning',
+    'avoid_afternoon', 'no_class_days', 'credit_limit', 'must_include_lectures',
+]
+_CONSTRAINT_BIT = {name: 1 << index for index, name in enumerate(RELAXABLE_CONSTRAINTS)}
+# 학점 상한을 완화했을 때 사용할 사실상 무제한의 상한
+UNLIMITED_CREDITS = 10 ** 6
+
+class RelaxedSearchResult(NamedTuple):
+    """
+    완화 탐색 결과.
+    combinations는 relaxed_constraints를 완화했을 때 만족되는 조합 목록,
+    aggregates는 조합별 점수 집계값(combinations와 같은 순서),
+    blocked_counts는 각 선호 조건 때문에 잘려 나간 가지 수입니다.
+    """
+    combinations: List[List[Lecture]]
+    aggregates: List[ScoreAggregates]
+    relaxed_constraints: List[str]
+    blocked_counts: Dict[str, int]
+
+def constraint_slot_masks(preferences: UserPreferences) -> Dict[str, int]:
+    """슬롯으로 판정되는 선호 조건별 금지 슬롯 마스크를 반환합니다. (설정되지 않은 조건은 제외)"""
+    masks = {
+        'no_class_days': day_names_to_mask(preferences.no_class_days),
+        'avoid_periods': periods_mask(preferences.avoid_periods or []),
+        'avoid_morning': MORNING_MASK if preferences.avoid_morning else 0,
+        'avoid_afternoon': AFTERNOON_MASK if preferences.avoid_afternoon else 0,
+        'prefer_morning': AFTERNOON_MASK if preferences.prefer_morning else 0,
+        'prefer_afternoon': MORNING_MASK if preferences.prefer_afternoon else 0,
+    }
+    return {name: mask for name, mask in masks.items() if mask}
+
+def relax_preferences(
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    relaxed_constraints: List[str],
+) -> Tuple[UserPreferences, ScoringWeights]:
+    """완화된 조건을 제거한 선호도/가중치 사본을 반환합니다. (완화된 조합을 rank_combinations로 정렬할 때 사용)"""
+    preference_updates = {name: None for name in relaxed_constraints if name != 'credit_limit'}
+    relaxed_preferences = preferences.model_copy(update=preference_updates)
+    if 'credit_limit' in relaxed_constraints:
+        weights = weights.model_copy(update={'credit_limit': UNLIMITED_CREDITS})
+    return relaxed_preferences, weights
+
+def _relaxation_cost(violations: int) -> Tuple[int, int]:
+    """완화 비용: 완화하는 조건 수가 적을수록, 같다면 뒤쪽(완화하기 싫은) 조건이 적을수록 작습니다."""
+    return violations.bit_count(), violations
+
+def search_with_relaxation(
+    selected_lecture_nos: List[int],
+    preferences: UserPreferences,
+    weights: ScoringWeights,
+    max_combinations: int = 10000,
+    time_budget_ms: Optional[float] = None,
+    stats: Optional[SearchStats] = None,
+) -> RelaxedSearchResult:
+    """
+    한 번의 탐색으로, 가능한 가장 적은 선호 조건만 완화했을 때의 시간표 조합을 찾습니다.
+
+    각 가지가 위반한 조건 집합을 비트마스크로 들고 다니며, 지금까지 찾은 최선(최소 완화) 집합보다
+    나빠지는 가지는 잘라냅니다. 위반 집합은 강의를 추가할수록 커지기만 하므로 이 가지치기는 안전합니다.
+    각 그룹에서는 조건을 지키는 선택지를 먼저 시도하므로, 모든 조건을 만족하는 조합이 있으면
+    보통 첫 번째 완성 조합에서 바로 찾게 되고, 그 이후에는 search_combinations와 같은 조합을 찾습니다.
+
+    search_combinations와 같이 ConflictGraph로 고를 수 있는 분반이 가장 적은 그룹부터 고르고,
+    강의를 놓을 때마다 남은 그룹들의 도메인에서 충돌하는 분반을 제거(전방 검사)합니다.
+    필수 포함 교과목의 도메인이 비면 그 가지는 필수 포함 조건을 어기는 것으로 바로 기록합니다.
+    (조건을 어기는 분반도 도메인에 남아 있으므로 그룹 순서, 즉 조합 순서는 search_combinations와 다를 수 있습니다.)
+
+    time_budget_ms가 지나면 그때까지 찾은 최선의 완화 집합과 조합을 반환하며,
+    더 적게 완화한 조합이 남은 가지에 있을 수 있음을 stats.timed_out으로 알립니다.
+    """
+    if stats is None:
+        stats = SearchStats()
+    slot_masks = constraint_slot_masks(preferences)
+    required_nos = frozenset(preferences.must_include_lectures or [])
+    credit_limit = weights.credit_limit
+
+    groups = build_search_groups(list(selected_lecture_nos) + sorted(required_nos), SearchConstraints())
+    if not groups:
+        stats.coverage = 1.0
+        return RelaxedSearchResult([], [], [], {})
+    deadline = Deadline(time_budget_ms)
+
+    # 그룹별 분반 동치류. 필수 포함 위반은 분반마다 다르므로 위반 비트까지 같은 분반끼리만 묶습니다.
+    # 필수 포함 교과목 그룹은 required로 표시하지만, 건너뛰거나 다른 분반을 고르는 것도 (위반으로) 허용합니다.
+    relaxed_groups: List[SearchGroup] = []
+    # 동치류별 위반 비트 (ConflictGraph가 동치류 번호를 매기는 순서와 같음)
+    class_violations: List[int] = []
+    for group in groups:
+        required = any(lec.no in required_nos for _, lec in group.candidates)
+
+        def lecture_violations(lec: Lecture) -> int:
+            violations = 0
+            for name, mask in slot_masks.items():
+                if lec.slot_mask & mask:
+                    violations |= _CONSTRAINT_BIT[name]
+            if required and lec.no not in required_nos:
+                violations |= _CONSTRAINT_BIT['must_include_lectures']
+            return violations
+
+        classes = group_section_classes(
+            group.candidates, key=lambda lec: (lec.slot_mask, lec.credits, lecture_violations(lec)))
+        relaxed_groups.append(SearchGroup(group.candidates, classes, group.skip_index, required))
+        class_violations.extend(lecture_violations(section_class.representative) for section_class in classes)
+    graph = ConflictGraph(relaxed_groups)
+
+    credit_bit = _CONSTRAINT_BIT['credit_limit']
+    must_include_bit = _CONSTRAINT_BIT['must_include_lectures']
+    blocked_counts: Dict[str, int] = {}
+    # 지금까지 찾은 최소 완화 위반 집합(없으면 None)과, 그 집합으로 만족되는 조합 목록
+    best = {'violations': None, 'combinations': [], 'aggregates': []}
+    score_state = ScoreState()
+    # 그룹별로 고른 동치류 (건너뛴 그룹은 None)
+    chosen: List[Optional[SectionClass]] = [None] * len(relaxed_groups)
+
+    def is_acceptable(violations: int) -> bool:
+        """이 위반 집합을 가진 가지가 결과에 기여할 수 있는지 판단합니다."""
+        if best['violations'] is None:
+            return True
+        cost = _relaxation_cost(violations)
+        best_cost = _relaxation_cost(best['violations'])
+        if len(best['combinations']) >= max_combinations:
+            return cost < best_cost
+        return cost <= best_cost
+
+    def record_block(new_violations: int):
+        for name, bit in _CONSTRAINT_BIT.items():
+            if new_violations & bit:
+                blocked_counts[name] = blocked_counts.get(name, 0) + 1
+
+    def is_finished() -> bool:
+        if best['violations'] == 0 and len(best['combinations']) >= max_combinations:
+            stats.cap_hit = True
+            return True
+        if deadline.check():
+            stats.timed_out = True
+            return True
+        return False
+
+    def emit(violations: int):
+        classes = [section_class for section_class in chosen if section_class is not None]
+        if not classes:
+            return
+        if best['violations'] is None or _relaxation_cost(violations) < _relaxation_cost(best['violations']):
+            best['violations'] = violations
+            best['combinations'] = []
+            best['aggregates'] = []
+        # 동치류 조합을 실제 분반 조합으로 펼쳐 개수 제한까지 추가
+        for combination in expand_classes(classes):
+            if len(best['combinations']) >= max_combinations:
+                break
+            best['combinations'].append(combination)
+            best['aggregates'].append(score_state.aggregates)
+
+    def backtrack(domains: List[int], unassigned: Tuple[int, ...], credits: int, violations: int, weight: float):
+        if is_finished():
+            return
+        stats.nodes += 1
+
+        group_index, rest = graph.select_group(domains, unassigned)
+        if group_index is None:
+            stats.coverage += weight
+            emit(violations)
+            return
+
+        group = relaxed_groups[group_index]
+        # (동치류 번호 또는 None(건너뛰기), 이 선택으로 새로 위반하는 조건 비트)
+        # 시간이 충돌하는 분반은 전방 검사로 이미 도메인에서 빠져 있음 (시간 충돌은 완화할 수 없는 제약)
+        choices = []
+        child_weight = weight / (domains[group_index].bit_count() + 1)
+        for class_id in iter_bits(domains[group_index]):
+            new_violations = class_violations[class_id]
+            if credit_limit is not None and credits + graph.classes[class_id].representative.credits > credit_limit:
+                new_violations |= credit_bit
+            choices.append((class_id, new_violations & ~violations))
+        choices.append((None, must_include_bit & ~violations if group.required else 0))
+
+        # 조건을 지키는 선택지(건너뛰기 포함)를 먼저, 위반하는 선택지를 나중에 시도 (각각 원래 순서 유지)
+        for class_id, new_violations in sorted(choices, key=lambda choice: choice[1] != 0):
+            if is_finished():
+                return
+            next_violations = violations | new_violations
+            if class_id is None:
+                new_domains = domains
+            else:
+                new_domains, emptied_required = graph.forward_check_relaxed(domains, rest, class_id, stats)
+                if emptied_required:
+                    # 남은 필수 포함 교과목을 놓을 자리가 없으므로 필수 포함 조건을 어기게 됨
+                    new_violations |= must_include_bit & ~violations
+                    next_violations |= must_include_bit
+            if not is_acceptable(next_violations):
+                record_block(new_violations)
+                stats.preference_prunes += 1
+                stats.coverage += child_weight
+                continue
+            if class_id is None:
+                backtrack(new_domains, rest, credits, next_violations, child_weight)
+            else:
+                section_class = graph.classes[class_id]
+                lec = section_class.representative
+                chosen[group_index] = section_class
+                score_state.push(lec)
+                backtrack(new_domains, rest, credits + lec.credits, next_violations, child_weight)
+                score_state.pop()
+                chosen[group_index] = None
+
+    backtrack(list(graph.domains), tuple(range(len(relaxed_groups))), 0, 0, 1.0)
+    stats.combinations = len(best['combinations'])
+
+    if best['violations'] is None:
+        return RelaxedSearchResult([], [], [], blocked_counts)
+    relaxed = [name for name in RELAXABLE_CONSTRAINTS if best['violations'] & _CONSTRAINT_BIT[name]]
+    return RelaxedSearchResult(best['combinations'], best['aggregates'], relaxed, blocked_counts)
@@ -1,5 +1,11 @@
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Optional
+
+# 시간 슬롯 비트마스크 설정
+# 요일마다 PERIODS_PER_DAY 비트를 할당하며, (요일, 교시) 슬롯은 day * PERIODS_PER_DAY + period 번째 비트에 대응합니다.
+PERIODS_PER_DAY = 16
+NUM_DAYS = 5
+DAY_NAMES = ['월', '화', '수', '목', '금']
 
 def parse_time_location(raw_str: Optional[str]) -> List[Dict[str, int]]:
     """
@@ -34,6 +40,66 @@ def parse_time_location(raw_str: Optional[str]) -> List[Dict[str, int]]:
             
     return parsed_slots
 
+def slots_to_mask(slots: Iterable[Dict[str, int]]) -> int:
+    """
+    parse_time_location이 반환한 슬롯 리스트를 정수 비트마스크로 변환합니다.
+    표현 범위를 벗어난 교시는 무시합니다.
+    """
+    mask = 0
+    for slot in slots:
+        if 0 <= slot['period'] < PERIODS_PER_DAY:
+            mask |= 1 << (slot['day'] * PERIODS_PER_DAY + slot['period'])
+    return mask
+
+def time_slot_mask(raw_str: Optional[str]) -> int:
+    """
+    원본 시간 문자열을 바로 (요일 x 교시) 비트마스크로 변환합니다.
+    예: '월[1,2]' -> (1 << 1) | (1 << 2)
+    """
+    return slots_to_mask(parse_time_location(raw_str))
+
+def mask_to_slots(mask: int) -> List[Dict[str, int]]:
+    """
+    비트마스크를 parse_time_location과 같은 형태의 슬롯 리스트로 되돌립니다.
+    (요일, 교시) 오름차순으로 정렬됩니다.
+    """
+    slots = []
+    while mask:
+        low_bit = mask & -mask
+        index = low_bit.bit_length() - 1
+        slots.append({'day': index // PERIODS_PER_DAY, 'period': index % PERIODS_PER_DAY})
+        mask ^= low_bit
+    return slots
+
+def day_mask(day: int) -> int:
+    """주어진 요일(0=월, ..., 4=금)의 모든 교시를 덮는 마스크를 반환합니다."""
+    return ((1 << PERIODS_PER_DAY) - 1) << (day * PERIODS_PER_DAY)
+
+def periods_mask(periods: Iterable[int]) -> int:
+    """주어진 교시들을 모든 요일에 걸쳐 덮는 마스크를 반환합니다."""
+    mask = 0
+    for period in periods:
+        if 0 <= period < PERIODS_PER_DAY:
+            for day in range(NUM_DAYS):
+                mask |= 1 << (day * PERIODS_PER_DAY + period)
+    return mask
+
+def day_names_to_mask(days: Optional[List[str]]) -> int:
+    """
+    '월', '금요일' 등의 요일 이름 목록을 해당 요일 전체를 덮는 마스크로 변환합니다.
+    인식할 수 없는 요일 이름은 무시합니다.
+    """
+    mask = 0
+    for day_str in days or []:
+        day_name = day_str.replace('요일', '').upper()
+        if day_name in DAY_NAMES:
+            mask |= day_mask(DAY_NAMES.index(day_name))
+    return mask
+
+# 오전(1-4교시) / 오후(5교시 이후) 슬롯 마스크
+MORNING_MASK = periods_mask(range(1, 5))
+AFTERNOON_MASK = periods_mask(range(5, PERIODS_PER_DAY))
+
 def normalize_day_format(days: List[str]) -> List[str]:
     """
     LLM이 반환한 다양한 형태의 요일 문자열을 표준 형식('월', '화', ...)으로 변환합니다.
@@ -101,5 +167,7 @@ if __name__ == '__main__':
         print(f"입력: {case}")
         result = parse_time_location(case)
         print(f"결과: {result}")
+        mask = slots_to_mask(result)
+        print(f"마스크: {mask:#x} -> {mask_to_slots(mask)}")
 
     print("\n--- 시간 파싱 유틸리티 테스트 종료 ---")
\ No newline at end of file
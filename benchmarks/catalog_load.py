@@ -0,0 +1,72 @@
+"""
+카탈로그 콜드 로드 벤치마크: CSV 경로와 스냅샷 경로를 비교합니다.
+
+서버리스 콜드 스타트를 흉내 내기 위해 매 시도마다 새 파이썬 프로세스에서
+모듈 임포트 후 카탈로그를 한 번 로드하고, 로드 시간과 메모리(RSS)를 측정합니다.
+
+사용법 (저장소 루트에서):
+    python -m api.snapshot                 # 스냅샷 생성
+    python benchmarks/catalog_load.py [시도 횟수]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 자식 프로세스에서 실행되는 측정 코드
+CHILD_SCRIPT = r"""
+import json, resource, sys, time
+
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+from api.data_loader import LectureCatalog, DEFAULT_CSV_PATH
+mode = sys.argv[1]
+snapshot_path = None if mode == 'snapshot' else '/nonexistent/catalog.snapshot'
+
+rss_before = rss_kb()
+start = time.perf_counter()
+catalog = LectureCatalog(DEFAULT_CSV_PATH, snapshot_path=snapshot_path)
+catalog.refresh()
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    'load_ms': elapsed_ms,
+    'rss_delta_kb': rss_kb() - rss_before,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'lectures': len(catalog.lectures),
+}))
+"""
+
+def run_trial(mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, mode],
+        cwd=REPO_ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(mode: str, trials: list):
+    load_ms = [trial['load_ms'] for trial in trials]
+    rss_delta = [trial['rss_delta_kb'] for trial in trials]
+    max_rss = [trial['max_rss_kb'] for trial in trials]
+    print(f"[{mode:8}] 강의 {trials[0]['lectures']}개 | "
+          f"로드 중앙값 {statistics.median(load_ms):7.1f} ms (최소 {min(load_ms):.1f}, 최대 {max(load_ms):.1f}) | "
+          f"RSS 증가 {statistics.median(rss_delta) / 1024:5.1f} MiB | "
+          f"최대 RSS {statistics.median(max_rss) / 1024:5.1f} MiB")
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    sys.path.insert(0, REPO_ROOT)
+    from api.data_loader import DEFAULT_CSV_PATH
+    from api.snapshot import default_snapshot_path
+    if not os.path.exists(default_snapshot_path(DEFAULT_CSV_PATH)):
+        print("스냅샷이 없습니다. 먼저 'python -m api.snapshot'을 실행하세요.")
+        sys.exit(1)
+
+    print(f"--- 카탈로그 콜드 로드 벤치마크 ({repeat}회) ---")
+    for mode in ('csv', 'snapshot'):
+        summarize(mode, [run_trial(mode) for _ in range(repeat)])
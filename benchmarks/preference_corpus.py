@@ -0,0 +1,73 @@
+"""
+규칙 기반 선호도 분석기의 적용 범위와 LLM 결과와의 일치율을 측정합니다.
+
+말뭉치는 preference_cache.json에 저장된 LLM 분석 결과(문장 -> 선호도)와,
+아래 HAND_LABELED의 직접 정답을 단 문장으로 구성됩니다.
+각 문장은 서버와 같은 전처리(preprocess_preference_text)를 거친 뒤 분석하며,
+요일 표기는 normalize_day_format으로 통일하고 값이 None인 필드는 무시하고 비교합니다.
+
+  적용 범위: 규칙 분석기가 확신하고 결과를 낸 문장의 비율 (나머지는 LLM 호출)
+  일치율: 규칙 분석기가 결과를 낸 문장 중 기준 결과와 같은 문장의 비율
+
+LLM 결과 자체가 틀린 경우(예: '수 공강' -> 빈 결과)도 불일치로 나오므로, 불일치 목록을 함께 출력합니다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/preference_corpus.py
+"""
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_FILE = os.path.join(REPO_ROOT, 'preference_cache.json')
+
+# 캐시에 없는 정형 문장과 직접 단 정답
+HAND_LABELED = {
+    "금공강": {"no_class_days": ["금"]},
+    "1교시 싫어": {"avoid_periods": [1]},
+    "1, 9교시 제외": {"avoid_periods": [1, 9]},
+    "연강 없게": {"no_consecutive_classes": True},
+    "20학점": {"target_credits": 20},
+    "점심시간 확보": {"prefer_empty_lunch": True},
+    "18학점 정도로 해줘": {"target_credits": 18},
+    "월공강에 9교시는 빼줘": {"no_class_days": ["월"], "avoid_periods": [9]},
+    "저녁 수업 없애줘": {"avoid_afternoon": True},
+    "밥 먹을 시간 챙겨줘": {"prefer_empty_lunch": True},
+}
+
+def canonical(preferences):
+    """비교를 위해 None 필드를 빼고 요일 표기와 리스트 순서를 통일합니다."""
+    from api.utils import normalize_day_format
+
+    values = {key: value for key, value in (preferences or {}).items() if value is not None}
+    if 'no_class_days' in values:
+        values['no_class_days'] = normalize_day_format(values['no_class_days'])
+    for key in ('avoid_periods', 'must_include_lectures'):
+        if key in values:
+            values[key] = sorted(values[key])
+    return {key: value for key, value in values.items() if value != []}
+
+if __name__ == '__main__':
+    sys.path.insert(0, REPO_ROOT)
+    from api.rule_parser import parse_preferences_locally
+    from api.utils import preprocess_preference_text
+
+    with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        corpus = [("LLM", text, expected) for text, expected in json.load(f).items()]
+    corpus += [("정답", text, expected) for text, expected in HAND_LABELED.items()]
+
+    print(f"--- 규칙 기반 선호도 분석 말뭉치 ({len(corpus)}문장) ---")
+    covered = agreed = 0
+    for source, text, expected in corpus:
+        parsed = parse_preferences_locally(preprocess_preference_text(text))
+        if parsed is None:
+            print(f"[LLM 필요] {text!r}")
+            continue
+        covered += 1
+        if canonical(parsed) == canonical(expected):
+            agreed += 1
+        else:
+            print(f"[불일치]   {text!r}: 규칙={canonical(parsed)} {source}={canonical(expected)}")
+
+    print(f"적용 범위 {covered}/{len(corpus)} ({covered / len(corpus):.0%}), "
+          f"일치 {agreed}/{covered} ({agreed / max(covered, 1):.0%})")
@@ -0,0 +1,224 @@
+"""
+조합 탐색/순위 매기기 벤치마크 모음.
+
+synthetic_catalog.py로 고정 seed의 합성 카탈로그를 만든 뒤, 그 카탈로그를 서버와 같은 경로
+(TIMETABLE_CATALOG_CSV → get_catalog())로 불러와 다음 시나리오를 측정합니다.
+
+  선택 크기: small(4과목) / medium(8과목) / pathological(분반이 많은 12과목, 조합 수 상한에 도달)
+             → engine.find_combinations + engine.rank_combinations
+  선호도 종류: medium 선택에 선호도 하나씩 적용
+             → engine.find_combinations_with_preferences + engine.rank_combinations
+
+시나리오마다 지연 시간 백분위수(p50/p95/p99, 탐색+순위), 방문 노드 수, 최대 메모리(tracemalloc),
+조합 수를 출력하고 저장된 기준값(search_baseline.json)과 비교합니다.
+기본으로는 기계와 무관한 값만 비교하며, 다음 중 하나라도 해당하면 회귀로 보고 종료 코드 1로 끝납니다.
+
+  - 조합 수 또는 순위 결과 수가 기준값과 다름 (결과가 바뀜)
+  - 방문 노드 수가 기준값보다 --node-tolerance 넘게 많음
+
+--check-performance를 주면 다음도 회귀로 봅니다. 지연 시간과 메모리는 측정하는 기계와 파이썬/NumPy
+버전에 따라 다르므로, 같은 기계에서 --update-baseline으로 저장한 기준값과 비교할 때만 사용하세요.
+
+  - p50 지연 시간이 기준값보다 --latency-tolerance 넘게, 그리고 1 ms 넘게 느림
+  - 최대 메모리가 기준값보다 --memory-tolerance 넘게, 그리고 64 KiB 넘게 많음
+
+사용법 (저장소 루트에서):
+    python benchmarks/search_suite.py [--repeat 20] [--scenario 이름 일부] [--update-baseline] [--check-performance]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'search_baseline.json')
+
+# 합성 카탈로그 설정 (바꾸면 기준값도 다시 저장해야 함)
+CATALOG_OPTIONS = {
+    'courses': 240,
+    'sections': (1, 4),
+    'slots_per_section': 3,
+    'conflict_rate': 0.3,
+    'courses_per_department': 12,
+    'seed': 0,
+}
+# 선택 크기별 (학부 번호, 교과목 수). pathological은 분반이 많은 순서로 고릅니다.
+SELECTIONS = {'small': (0, 4), 'medium': (1, 8), 'pathological': (2, 12)}
+
+# 선호도 시나리오 (이름, UserPreferences 인자). must_include는 선택의 첫 교과목 분반 전체로 채웁니다.
+PREFERENCE_SCENARIOS = [
+    ('none', {}),
+    ('no_class_days', {'no_class_days': ['금']}),
+    ('avoid_periods', {'avoid_periods': [1, 9]}),
+    ('avoid_morning', {'avoid_morning': True}),
+    ('avoid_afternoon', {'avoid_afternoon': True}),
+    ('prefer_morning', {'prefer_morning': True}),
+    ('prefer_afternoon', {'prefer_afternoon': True}),
+    ('no_consecutive_classes', {'no_consecutive_classes': True}),
+    ('target_credits', {'target_credits': 18}),
+    ('must_include_lectures', None),
+    ('prefer_empty_lunch', {'prefer_empty_lunch': True}),
+]
+
+class Scenario(NamedTuple):
+    name: str
+    lecture_nos: List[int]
+    # None이면 선호도 없이 find_combinations로 탐색
+    preferences: Optional[dict]
+
+def build_scenarios(catalog) -> List[Scenario]:
+    departments = sorted(catalog.by_department)
+    selections = {}
+    for name, (department_index, course_count) in SELECTIONS.items():
+        course_ids = sorted({lec.course_id for lec in catalog.by_department[departments[department_index]]})
+        if name == 'pathological':
+            course_ids.sort(key=lambda course_id: -len(catalog.by_course_id[course_id]))
+        chosen = course_ids[:course_count]
+        selections[name] = [lec.no for course_id in chosen for lec in catalog.by_course_id[course_id]]
+
+    scenarios = [Scenario(f"select/{name}", nos, None) for name, nos in selections.items()]
+    medium = selections['medium']
+    for name, preferences in PREFERENCE_SCENARIOS:
+        if preferences is None:
+            first_course = catalog.by_no[medium[0]].course_id
+            preferences = {'must_include_lectures': [lec.no for lec in catalog.by_course_id[first_course]]}
+        scenarios.append(Scenario(f"prefer/{name}", medium, preferences))
+    return scenarios
+
+def run_once(scenario: Scenario):
+    """시나리오를 한 번 실행하고 (탐색 통계, 조합 수, 순위 결과 수)를 반환합니다."""
+    from api.engine import find_combinations, find_combinations_with_preferences, rank_combinations
+    from api.models import ScoringWeights, UserPreferences
+    from api.solver import SearchStats
+
+    stats = SearchStats()
+    weights = ScoringWeights()
+    preferences = UserPreferences(**(scenario.preferences or {}))
+    if scenario.preferences is None:
+        combinations = find_combinations(scenario.lecture_nos, stats=stats)
+    else:
+        combinations = find_combinations_with_preferences(
+            scenario.lecture_nos, preferences, weights=weights, stats=stats,
+        )
+    ranked = rank_combinations(combinations, preferences, weights)
+    return stats, len(combinations), len(ranked)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """정렬된 값에서 최근접 순위 방식의 백분위수를 구합니다."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def measure(scenario: Scenario, repeat: int) -> Dict:
+    run_once(scenario)  # 워밍업 (카탈로그 로드, 임포트)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stats, combinations, ranked = run_once(scenario)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    run_once(scenario)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'nodes': stats.nodes,
+        'combinations': combinations,
+        'ranked': ranked,
+        'cap_hit': stats.cap_hit,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+def find_regressions(name: str, result: Dict, baseline: Dict, args) -> List[str]:
+    problems = []
+    for field in ('combinations', 'ranked'):
+        if result[field] != baseline[field]:
+            problems.append(f"{field} {baseline[field]} -> {result[field]}")
+    if result['nodes'] > baseline['nodes'] * (1 + args.node_tolerance):
+        problems.append(f"노드 {baseline['nodes']} -> {result['nodes']}")
+    if not args.check_performance:
+        return [f"{name}: {problem}" for problem in problems]
+    if (result['p50_ms'] > baseline['p50_ms'] * (1 + args.latency_tolerance)
+            and result['p50_ms'] - baseline['p50_ms'] > 1.0):
+        problems.append(f"p50 {baseline['p50_ms']:.2f} ms -> {result['p50_ms']:.2f} ms")
+    if (result['peak_kib'] > baseline['peak_kib'] * (1 + args.memory_tolerance)
+            and result['peak_kib'] - baseline['peak_kib'] > 64):
+        problems.append(f"메모리 {baseline['peak_kib']:.0f} KiB -> {result['peak_kib']:.0f} KiB")
+    return [f"{name}: {problem}" for problem in problems]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="조합 탐색/순위 매기기 벤치마크")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--scenario', default='', help="이름에 이 문자열이 들어간 시나리오만 실행")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help="현재 결과를 기준값으로 저장")
+    parser.add_argument('--latency-tolerance', type=float, default=0.5)
+    parser.add_argument('--node-tolerance', type=float, default=0.05)
+    parser.add_argument('--memory-tolerance', type=float, default=0.25)
+    parser.add_argument('--check-performance', action='store_true',
+                        help="지연 시간과 최대 메모리도 기준값과 비교 (같은 기계에서 저장한 기준값일 때만)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, BENCHMARK_DIR)
+    from synthetic_catalog import write_catalog
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'synthetic.csv')
+        lecture_count = write_catalog(csv_path, **CATALOG_OPTIONS)
+        # api 모듈을 임포트하기 전에 지정해야 get_catalog()가 합성 카탈로그를 사용
+        os.environ['TIMETABLE_CATALOG_CSV'] = csv_path
+        from api.data_loader import get_catalog
+
+        scenarios = [scenario for scenario in build_scenarios(get_catalog()) if args.scenario in scenario.name]
+        print(f"--- 탐색 벤치마크 (합성 카탈로그 강의 {lecture_count}개, 시나리오 {len(scenarios)}개, {args.repeat}회) ---")
+        results = {}
+        for scenario in scenarios:
+            result = results[scenario.name] = measure(scenario, args.repeat)
+            print(f"{scenario.name:32} | 강의 {len(scenario.lecture_nos):3}개 | "
+                  f"p50 {result['p50_ms']:8.2f} ms | p95 {result['p95_ms']:8.2f} ms | p99 {result['p99_ms']:8.2f} ms | "
+                  f"노드 {result['nodes']:7} | 조합 {result['combinations']:6}{'+' if result['cap_hit'] else ' '} | "
+                  f"순위 {result['ranked']:6} | 메모리 {result['peak_kib']:8.1f} KiB")
+
+    if args.update_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                stored = json.load(f).get('scenarios', {})
+        stored.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'catalog': CATALOG_OPTIONS, 'scenarios': stored}, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"기준값 저장: {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"기준값 파일이 없습니다. 먼저 --update-baseline으로 저장하세요: {args.baseline}")
+        sys.exit(1)
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('catalog') != json.loads(json.dumps(CATALOG_OPTIONS)):
+        print("기준값의 합성 카탈로그 설정이 현재 설정과 다릅니다. --update-baseline으로 다시 저장하세요.")
+        sys.exit(1)
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline['scenarios']:
+            print(f"{name}: 기준값 없음 (건너뜀)")
+            continue
+        regressions += find_regressions(name, result, baseline['scenarios'][name], args)
+    if regressions:
+        print("\n회귀 발견:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\n기준값 대비 회귀 없음")
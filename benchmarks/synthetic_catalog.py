@@ -0,0 +1,141 @@
+"""
+벤치마크용 합성 강의 카탈로그 생성기.
+
+data/시간표.csv와 같은 열 구성의 CSV를 만들며, 다음 값을 조절할 수 있습니다.
+
+  courses               교과목 수
+  sections              교과목당 분반 수 (정수 하나 또는 "최소-최대" 범위)
+  slots_per_section     분반 하나가 차지하는 주당 교시 수 (슬롯 밀도, 학점과 같음)
+  conflict_rate         분반이 같은 학부(과)의 다른 교과목 분반과 같은 시간을 쓸 확률 (시간 충돌 비율)
+  courses_per_department 학부(과) 하나에 속한 교과목 수
+
+같은 인자와 seed로 만들면 항상 같은 파일이 생성됩니다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/synthetic_catalog.py 출력.csv [--courses 240] [--sections 1-4]
+        [--slots-per-section 3] [--conflict-rate 0.3] [--courses-per-department 12] [--seed 0]
+
+생성한 카탈로그로 서버나 스크립트를 실행하려면 TIMETABLE_CATALOG_CSV 환경 변수에 경로를 지정합니다.
+"""
+import argparse
+import csv
+import random
+from typing import List, Tuple
+
+# data/시간표.csv의 열 순서
+CSV_COLUMNS = [
+    'NO.', '수업계획서', '수강가능학과', '학부(과)', '교과구분', '세부영역', '교과번호', '분반', '교과목명', '학년',
+    '학점', '주야', '강의유형', '수업시간(강의실)', '집중수업주차', '학년별 수강인원', '학년별수강정원',
+    '전체 수강인원', '전체 수강정원', '타학과 허용여부', '복수전공', '부전공', '융복합과목여부', '교류학과여부',
+]
+DAYS = '월화수목금'
+# 합성 강의가 사용하는 교시 범위
+FIRST_PERIOD, LAST_PERIOD = 1, 9
+
+# 분반 하나의 수업 시간: ((요일, (교시, ...)), ...)
+TimePattern = Tuple[Tuple[str, Tuple[int, ...]], ...]
+
+def parse_sections(value: str) -> Tuple[int, int]:
+    """'3' 또는 '1-4' 형식의 분반 수를 (최소, 최대)로 변환합니다."""
+    low, _, high = value.partition('-')
+    return int(low), int(high or low)
+
+def random_time_pattern(rng: random.Random, slots: int) -> TimePattern:
+    """주당 slots개 교시를 하루(3교시 이하) 또는 서로 다른 두 요일에 연속 교시로 나눠 배치합니다."""
+    if slots <= 3:
+        lengths = [slots]
+    else:
+        lengths = [(slots + 1) // 2, slots // 2]
+    days = rng.sample(DAYS, len(lengths))
+    pattern = []
+    for day, length in sorted(zip(days, lengths), key=lambda item: DAYS.index(item[0])):
+        start = rng.randint(FIRST_PERIOD, LAST_PERIOD - length + 1)
+        pattern.append((day, tuple(range(start, start + length))))
+    return tuple(pattern)
+
+def format_time_pattern(pattern: TimePattern, room: str) -> str:
+    """'월[1,2]/01-101,수[3]/01-101' 형식의 수업시간(강의실) 문자열을 만듭니다."""
+    return ','.join(f"{day}[{','.join(map(str, periods))}]/{room}" for day, periods in pattern)
+
+def generate_rows(
+    courses: int = 240,
+    sections: Tuple[int, int] = (1, 4),
+    slots_per_section: int = 3,
+    conflict_rate: float = 0.3,
+    courses_per_department: int = 12,
+    seed: int = 0,
+) -> List[dict]:
+    """합성 카탈로그의 CSV 행 목록을 만듭니다."""
+    rng = random.Random(seed)
+    rows: List[dict] = []
+    # 학부(과)별로 이미 배정한 (교과번호, 수업 시간) 목록. 시간 충돌을 만들 때 다른 교과목의 시간을 재사용합니다.
+    department_patterns: dict = {}
+    for course_index in range(courses):
+        department = f"합성학부{course_index // courses_per_department:02d}"
+        course_id = f"{80000 + course_index}"
+        used = department_patterns.setdefault(department, [])
+        others = [pattern for owner, pattern in used if owner != course_id]
+        for section_index in range(rng.randint(*sections)):
+            if others and rng.random() < conflict_rate:
+                pattern = rng.choice(others)
+            else:
+                pattern = random_time_pattern(rng, slots_per_section)
+            used.append((course_id, pattern))
+            room = f"{course_index % 40 + 1:02d}-{section_index + 101}"
+            rows.append({
+                'NO.': len(rows) + 1,
+                '수업계획서': '수업계획서',
+                '수강가능학과': '수강가능학과',
+                '학부(과)': department,
+                '교과구분': rng.choice(['전공필수', '전공선택', '교양선택']),
+                '세부영역': '전공선택',
+                '교과번호': course_id,
+                '분반': f"{section_index + 1:02d}",
+                '교과목명': f"합성과목{course_index:04d}",
+                '학년': str(rng.randint(1, 4)),
+                '학점': slots_per_section,
+                '주야': '주간',
+                '강의유형': '',
+                '수업시간(강의실)': format_time_pattern(pattern, room),
+                '집중수업주차': '(~)',
+                '학년별 수강인원': 0,
+                '학년별수강정원': 40,
+                '전체 수강인원': 0,
+                '전체 수강정원': 40,
+                '타학과 허용여부': 'Y',
+                '복수전공': 'N',
+                '부전공': 'N',
+                '융복합과목여부': 'N',
+                '교류학과여부': 'N',
+            })
+    return rows
+
+def write_catalog(path: str, **options) -> int:
+    """
+    합성 카탈로그를 path에 CSV로 저장합니다. options는 generate_rows의 인자입니다.
+
+    :return: 생성한 강의 수
+    """
+    rows = generate_rows(**options)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 강의 카탈로그(CSV) 생성")
+    parser.add_argument('output')
+    parser.add_argument('--courses', type=int, default=240)
+    parser.add_argument('--sections', type=parse_sections, default=(1, 4))
+    parser.add_argument('--slots-per-section', type=int, default=3)
+    parser.add_argument('--conflict-rate', type=float, default=0.3)
+    parser.add_argument('--courses-per-department', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    count = write_catalog(
+        args.output, courses=args.courses, sections=args.sections, slots_per_section=args.slots_per_section,
+        conflict_rate=args.conflict_rate, courses_per_department=args.courses_per_department, seed=args.seed,
+    )
+    print(f"{args.output}: 교과목 {args.courses}개, 강의 {count}개")